@@ -0,0 +1,63 @@
+"""
+Time `import py2gui` with python -X importtime and check it stays light
+
+    python benchmarks/import_time.py [--runs N] [--max-ms MS]
+
+Each run imports the package in a fresh interpreter. The fastest run is reported,
+and the script fails if the import loaded tkinter or typing, or took longer than
+--max-ms.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+# Modules the entry point must not import
+_HEAVY_MODULES = ("tkinter", "typing")
+
+_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_once() -> Dict[str, int]:
+    """Cumulative import time in microseconds of every module loaded by `import py2gui`"""
+    check = f"import py2gui, sys; sys.exit(sorted(set({_HEAVY_MODULES!r}) & set(sys.modules)) or None)"
+    env = dict(os.environ, PYTHONPATH=_REPO)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", check],
+                            capture_output=True, text=True, env=env, cwd=_REPO)
+    times: Dict[str, int] = {}
+    errors: List[str] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            errors.append(line)
+            continue
+        fields = line[len("import time:"):].split("|")
+        if fields[1].strip().isdigit():
+            times[fields[2].strip()] = int(fields[1])
+    if result.returncode:
+        raise SystemExit(f"import py2gui loaded {' '.join(errors) or 'something it should not'}")
+    return times
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="imports to time (default: %(default)s)")
+    parser.add_argument("--max-ms", type=float, help="fail if the fastest import is slower")
+    options = parser.parse_args(argv)
+
+    best: Optional[Dict[str, int]] = None
+    for _ in range(max(options.runs, 1)):
+        times = _import_once()
+        if best is None or times["py2gui"] < best["py2gui"]:
+            best = times
+    assert best is not None
+    total = best["py2gui"] / 1000
+    print(f"import py2gui: {total:.2f} ms (best of {options.runs})")
+    if options.max_ms is not None and total > options.max_ms:
+        print(f"slower than the {options.max_ms} ms budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Py2GUI - Enhanced Python Terminal-style GUI
+
+The public API is loaded on first use, so ``import py2gui`` does not import
+tkinter (or typing). Tk is only loaded when a GUI name is looked up.
+"""
+from __future__ import annotations
+
+import importlib
+
+# typing.TYPE_CHECKING without paying for the typing import
+_TYPE_CHECKING = False
+
+__version__ = "0.1.1.1"
+
+__all__ = [
+    "Py2GUI", "ScriptedInput",
+    "display", "display_colored", "display_paragraph", "display_frame", "end_frame", "write",
+    "user_write", "user_type_in", "set_input_source", "focus_input",
+    "clear", "copy_text", "select_all", "open_window", "exit_gui", "run",
+    "scroll_to_end", "set_scroll_lock", "set_wrap", "set_max_line_length",
+    "set_filter", "clear_filter", "export", "add_sink", "remove_sink", "listen", "stop_listening",
+    "start_recording", "stop_recording", "replay", "set_theme", "set_zoom", "zoom",
+    "start_mirror", "stop_mirror", "metrics", "show_metrics", "start_watchdog", "stop_watchdog",
+    "start_trace", "stop_trace", "start_tcl_accounting", "stop_tcl_accounting", "tcl_stats",
+    "start_profile", "stop_profile",
+]
+
+if _TYPE_CHECKING:
+    from typing import Any, List
+
+    from .py2gui import (
+        Py2GUI, ScriptedInput,
+        display, display_colored, display_paragraph, display_frame, end_frame, write,
+        user_write, user_type_in, set_input_source, focus_input,
+        clear, copy_text, select_all, open_window, exit_gui, run,
+        scroll_to_end, set_scroll_lock, set_wrap, set_max_line_length,
+        set_filter, clear_filter, export, add_sink, remove_sink, listen, stop_listening,
+        start_recording, stop_recording, replay, set_theme, set_zoom, zoom,
+        start_mirror, stop_mirror, metrics, show_metrics, start_watchdog, stop_watchdog,
+        start_trace, stop_trace, start_tcl_accounting, stop_tcl_accounting, tcl_stats,
+        start_profile, stop_profile,
+    )
+
+
+def __getattr__(name: str) -> Any:
+    """Import the GUI module the first time one of its names is used"""
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(".py2gui", __name__)
+    # Cache every public name so later lookups skip this hook
+    globals().update((attr, getattr(module, attr)) for attr in __all__)
+    return globals()[name]
+
+
+def __dir__() -> List[str]:
+    # The public API and module attributes, not this file's helper names
+    return sorted({name for name in globals() if name.startswith("__")} | set(__all__))
@@ -0,0 +1,302 @@
+"""
+Run a Python script or module in a Py2GUI window, without changing it
+
+    python -m py2gui [options] script.py [args ...]
+    python -m py2gui [options] -m module [args ...]
+
+The script runs on the worker side of Py2GUI: sys.stdout and sys.stderr go to the
+output area and input() / sys.stdin are answered from the input field.
+"""
+import argparse
+import builtins
+import io
+import os
+import re
+import runpy
+import sys
+import threading
+import traceback
+from typing import Any, List, Optional
+
+# How long written text may wait in the buffer, and how much it may hold, before a flush
+_FLUSH_MS = 16
+_FLUSH_CHARS = 65536
+
+# Default scrollback for hosted scripts, which may print without bound
+_SCROLLBACK_LINES = 10000
+
+# An escape sequence cut off at the end of a chunk; held back until it is complete
+_PARTIAL_ESCAPE_RE = re.compile(r'\x1b(?:\[[0-9;?]*)?$')
+
+_builtin_input = builtins.input
+
+
+class _OutputBuffer:
+    """Text written by the script, batched into few Py2GUI.write calls
+
+    Writes only append to a list. Delivery always happens on the Tk thread, scheduled at
+    most _FLUSH_MS after the first waiting write (at once past _FLUSH_CHARS), so chunks
+    stay in order and Tk is never called with the lock held. Until a window is attached
+    everything is kept, so the script can start before Tk is up.
+    """
+
+    def __init__(self) -> None:
+        self._parts: List[str] = []
+        self._size = 0
+        self._lock = threading.Lock()
+        self._delivered = threading.Condition(self._lock)
+        self._gui: Any = None
+        self._scheduled: Optional[int] = None
+        # Count of writes, and how many of them the Tk thread has taken
+        self._writes = 0
+        self._taken = 0
+
+    def attach(self, gui: Any) -> None:
+        """Start delivering to gui, beginning with everything written so far (Tk thread)"""
+        with self._lock:
+            self._gui = gui
+        self._deliver()
+
+    def write(self, text: str) -> None:
+        with self._lock:
+            self._parts.append(text)
+            self._size += len(text)
+            self._writes += 1
+            delay = 0 if self._size >= _FLUSH_CHARS else _FLUSH_MS
+            if self._gui is None or (self._scheduled is not None and self._scheduled <= delay):
+                return
+            self._scheduled = delay
+        self._schedule(delay)
+
+    def flush(self) -> None:
+        """Hand waiting text to the Tk thread now"""
+        with self._lock:
+            if self._gui is None or not self._parts or self._scheduled == 0:
+                return
+            self._scheduled = 0
+        self._schedule(0)
+
+    def drain(self) -> None:
+        """Flush and wait until the Tk thread has taken everything written so far
+
+        Tk calls made afterwards (an input prompt, an echo) are then queued behind it.
+        """
+        self.flush()
+        with self._lock:
+            target = self._writes
+            while self._taken < target and self._gui is not None and self._gui.running:
+                self._delivered.wait(0.1)
+
+    def _schedule(self, delay: int) -> None:
+        """Queue a delivery behind the window's other Tk-thread calls, delay ms from then"""
+        gui = self._gui
+        if not gui.running:
+            return
+        if delay:
+            gui._call_soon(lambda: gui.root.after(delay, self._deliver))
+        else:
+            gui._call_soon(self._deliver)
+
+    def _deliver(self) -> None:
+        """Write out everything waiting except a cut-off escape sequence (Tk thread)"""
+        with self._lock:
+            self._scheduled = None
+            self._taken = self._writes
+            self._delivered.notify_all()
+            text = "".join(self._parts)
+            partial = _PARTIAL_ESCAPE_RE.search(text, max(len(text) - 32, 0))
+            if partial:
+                text, held = text[:partial.start()], text[partial.start():]
+                self._parts, self._size = [held], len(held)
+            else:
+                self._parts, self._size = [], 0
+        if text:
+            self._gui.write(text)
+
+
+class _OutputStream(io.TextIOBase):
+    """sys.stdout / sys.stderr replacement feeding a shared _OutputBuffer"""
+
+    def __init__(self, buffer: _OutputBuffer, name: str) -> None:
+        super().__init__()
+        self._buffer = buffer
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def encoding(self) -> str:
+        return "utf-8"
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return False
+
+    def write(self, text: str) -> int:
+        if not isinstance(text, str):
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        if text:
+            self._buffer.write(text)
+        return len(text)
+
+    def flush(self) -> None:
+        self._buffer.flush()
+
+
+class _InputStream(io.TextIOBase):
+    """sys.stdin replacement: each line is read with Py2GUI.user_type_in"""
+
+    def __init__(self, output: _OutputBuffer, ready: threading.Event) -> None:
+        super().__init__()
+        self._output = output
+        self._ready = ready
+        self.gui: Any = None
+
+    @property
+    def name(self) -> str:
+        return "<stdin>"
+
+    @property
+    def encoding(self) -> str:
+        return "utf-8"
+
+    def readable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return False
+
+    def ask(self, prompt: str) -> Optional[str]:
+        """Show pending output, then wait for one line from the input field (None at close)"""
+        self._ready.wait()
+        self._output.drain()
+        return self.gui.user_type_in(prompt)
+
+    def readline(self, size: Optional[int] = -1) -> str:
+        line = self.ask("")
+        # The window was closed: end of file
+        return "" if line is None else line + "\n"
+
+    def read(self, size: Optional[int] = -1) -> str:
+        # There is no end of input short of closing the window, so read a line at a time
+        return self.readline()
+
+
+def _input(prompt: Any = "") -> str:
+    """builtins.input replacement for hosted scripts: the prompt labels the input field"""
+    if not isinstance(sys.stdin, _InputStream):
+        # The script replaced sys.stdin itself
+        return _builtin_input(prompt)
+    line = sys.stdin.ask(str(prompt))
+    if line is None:
+        raise EOFError
+    return line
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m py2gui",
+        description="Run a Python script or module with its console in a Py2GUI window.")
+    parser.add_argument("-m", dest="module", nargs=argparse.REMAINDER, metavar="module",
+                        help="run a library module as a script (like python -m); ends the options")
+    parser.add_argument("--title", help="window title (default: the script or module name)")
+    parser.add_argument("--theme", help="colour theme: default, dark, light or matrix")
+    parser.add_argument("--config", default="config.json", metavar="PATH",
+                        help="Py2GUI config file (default: %(default)s)")
+    parser.add_argument("--scrollback", type=int, default=_SCROLLBACK_LINES, metavar="LINES",
+                        help="lines of output to keep, 0 for no limit (default: %(default)s)")
+    parser.add_argument("--width", type=int, default=80, help="window width in characters")
+    parser.add_argument("--height", type=int, default=20, help="window height in lines")
+    parser.add_argument("--profile", metavar="PATH", help="profile the script and GUI threads")
+    parser.add_argument("args", nargs=argparse.REMAINDER,
+                        help="script path (unless -m is given) and its arguments")
+    options = parser.parse_args(argv)
+    if options.module is not None:
+        if not options.module:
+            parser.error("argument -m: expected a module name")
+        options.args = options.module[1:]
+        options.module = options.module[0]
+    elif not options.args:
+        parser.error("a script path or -m module is required")
+    else:
+        options.script = options.args.pop(0)
+    if options.scrollback < 0:
+        parser.error("--scrollback must not be negative")
+    return options
+
+
+def _run_script(options: argparse.Namespace) -> int:
+    """Run the target as __main__ (worker thread); returns its exit status"""
+    try:
+        if options.module is not None:
+            sys.argv = [options.module] + options.args
+            runpy.run_module(options.module, run_name="__main__", alter_sys=True)
+        else:
+            sys.argv = [options.script] + options.args
+            sys.path[0] = os.path.dirname(os.path.abspath(options.script))
+            runpy.run_path(options.script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException as e:
+        # Report like the interpreter would, without the runner's own frames
+        tb = e.__traceback__
+        while tb is not None and (tb.tb_frame.f_code.co_filename == __file__
+                                  or tb.tb_frame.f_globals.get("__name__") == "runpy"):
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb)
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    options = _parse_args(argv)
+    title = options.title or options.module or os.path.basename(options.script)
+
+    # Redirect first, so the script can start while the window is still being built
+    output = _OutputBuffer()
+    ready = threading.Event()
+    stdin = _InputStream(output, ready)
+    saved = sys.stdin, sys.stdout, sys.stderr, builtins.input
+    sys.stdin = stdin
+    sys.stdout = _OutputStream(output, "<stdout>")
+    sys.stderr = _OutputStream(output, "<stderr>")
+    builtins.input = _input
+
+    status: List[int] = []
+
+    def _target() -> None:
+        status.append(_run_script(options))
+
+    try:
+        from .py2gui import Py2GUI, _start_worker
+
+        worker = _start_worker(_target, (), {}, sys.stderr.write)
+        gui = Py2GUI(title, width=options.width, height=options.height, config_file=options.config,
+                     max_lines=options.scrollback or None)
+        if options.theme:
+            gui.set_theme(options.theme)
+        stdin.gui = gui
+        output.attach(gui)
+        ready.set()
+        gui._main_loop(worker, options.profile)
+    finally:
+        sys.stdin, sys.stdout, sys.stderr, builtins.input = saved
+
+    # Closing the window while the script still runs stops it
+    return status[0] if status else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
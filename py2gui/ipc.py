@@ -0,0 +1,417 @@
+"""
+Local IPC for Py2GUI: other processes write to a running window
+
+A window started with Py2GUI.listen() accepts connections on a Unix socket or a
+localhost TCP port. Clients send frames, each a 4-byte big-endian length followed by
+a UTF-8 JSON array of messages:
+
+    {"op": "display", "text": "build ok"}
+    {"op": "display_colored", "text": "FAILED", "fg_color": "red", "bold": true}
+    {"op": "clear", "pane": "tests"}
+
+Any message may name a "pane": a window of its own, opened on first use. Client
+batches messages into few frames; this module does not import tkinter, so tools
+that only report to a window stay light.
+"""
+import json
+import os
+import re
+import selectors
+import socket
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Frame header (payload length) and the largest payload accepted
+_HEADER = struct.Struct("!I")
+_MAX_FRAME = 16 * 1024 * 1024
+
+_RECV_SIZE = 65536
+
+# Message operations and the display_colored options a message may carry: strings and flags
+_OPS = frozenset(("display", "display_colored", "clear"))
+_STYLE_STRINGS = ("fg_color", "bg_color", "font_family")
+_STYLE_FLAGS = ("bold", "underline", "italic", "strikethrough", "reverse")
+_STYLE_KEYS = frozenset(_STYLE_STRINGS + _STYLE_FLAGS)
+
+_TCP_ADDRESS_RE = re.compile(r'\[?([\w.:-]*?)\]?:(\d+)')
+
+# Clients connect here when no address is given
+ADDRESS_ENV = "PY2GUI_ADDRESS"
+
+
+def parse_address(address: Any) -> Tuple[int, Any]:
+    """Socket family and address for a port, (host, port), "host:port" or a Unix socket path"""
+    if isinstance(address, int):
+        return socket.AF_INET, ("127.0.0.1", address)
+    if isinstance(address, tuple):
+        host, port = address
+        return socket.AF_INET6 if ":" in host else socket.AF_INET, (host, int(port))
+    if isinstance(address, (str, os.PathLike)):
+        address = os.fspath(address)
+        match = _TCP_ADDRESS_RE.fullmatch(address)
+        if match:
+            return parse_address((match.group(1) or "127.0.0.1", int(match.group(2))))
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError(f"Unix sockets are not available here; use a port, not {address!r}")
+        return socket.AF_UNIX, address
+    raise TypeError(f"address must be a port, (host, port) or a path, not {address!r}")
+
+
+def encode(messages: List[Dict[str, Any]]) -> bytes:
+    """One frame holding messages"""
+    payload = json.dumps(messages, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(payload) > _MAX_FRAME:
+        raise ValueError(f"frame of {len(payload)} bytes is over the {_MAX_FRAME} byte limit")
+    return _HEADER.pack(len(payload)) + payload
+
+
+def _check(message: Any) -> Dict[str, Any]:
+    """message if it is well-formed, otherwise ValueError"""
+    if not isinstance(message, dict) or message.get("op") not in _OPS:
+        raise ValueError(f"not a message: {message!r:.80}")
+    if message["op"] != "clear" and not isinstance(message.get("text"), str):
+        raise ValueError(f"{message['op']} needs a text string")
+    for key in ("pane",) + _STYLE_STRINGS:
+        value = message.get(key)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{key} must be a string, not {value!r:.80}")
+    for key in _STYLE_FLAGS:
+        if not isinstance(message.get(key, False), bool):
+            raise ValueError(f"{key} must be true or false, not {message[key]!r:.80}")
+    return message
+
+
+def decode(buffer: bytearray) -> List[Dict[str, Any]]:
+    """Messages of the complete frames at the start of buffer, which are removed from it"""
+    messages: List[Dict[str, Any]] = []
+    start = 0
+    while len(buffer) - start >= _HEADER.size:
+        (size,) = _HEADER.unpack_from(buffer, start)
+        if size > _MAX_FRAME:
+            raise ValueError(f"frame of {size} bytes is over the {_MAX_FRAME} byte limit")
+        end = start + _HEADER.size + size
+        if end > len(buffer):
+            break
+        batch = json.loads(bytes(buffer[start + _HEADER.size:end]).decode("utf-8"))
+        if not isinstance(batch, list):
+            raise ValueError("a frame must hold a JSON array of messages")
+        messages.extend(_check(message) for message in batch)
+        start = end
+    del buffer[:start]
+    return messages
+
+
+class Client:
+    """Sends output to a window listening with Py2GUI.listen()
+
+    address defaults to the PY2GUI_ADDRESS environment variable; pane is the default
+    pane for messages. Messages are buffered and sent as one frame on flush() and
+    close(), once max_bytes of text is waiting, or at the next call once the oldest
+    waiting message is interval seconds old. Use it as a context manager so nothing is
+    left unsent.
+    """
+
+    def __init__(self, address: Any = None, pane: Optional[str] = None, interval: float = 0.05,
+                 max_bytes: int = 65536, timeout: Optional[float] = 5.0) -> None:
+        if address is None:
+            address = os.environ.get(ADDRESS_ENV)
+            if not address:
+                raise ValueError(f"no address given and {ADDRESS_ENV} is not set")
+        family, target = parse_address(address)
+        self.pane = pane
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self._messages: List[Dict[str, Any]] = []
+        self._size = 0
+        self._since: Optional[float] = None
+        self._lock = threading.Lock()
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            self._sock.settimeout(timeout)
+            self._sock.connect(target)
+        except OSError:
+            self._sock.close()
+            raise
+
+    def display(self, text: Any, pane: Optional[str] = None) -> None:
+        """Show text followed by a newline; ANSI codes are applied"""
+        self._add({"op": "display", "text": str(text)}, pane)
+
+    def display_colored(self, text: Any, fg_color: Optional[str] = None, bg_color: Optional[str] = None,
+                        bold: bool = False, underline: bool = False, italic: bool = False,
+                        strikethrough: bool = False, reverse: bool = False,
+                        font_family: Optional[str] = None, pane: Optional[str] = None) -> None:
+        """Show text in one style, as Py2GUI.display_colored"""
+        message: Dict[str, Any] = {"op": "display_colored", "text": str(text)}
+        for key, value in (("fg_color", fg_color), ("bg_color", bg_color), ("bold", bold),
+                           ("underline", underline), ("italic", italic),
+                           ("strikethrough", strikethrough), ("reverse", reverse),
+                           ("font_family", font_family)):
+            if value:
+                message[key] = value
+        self._add(message, pane)
+
+    def clear(self, pane: Optional[str] = None) -> None:
+        """Clear the output area"""
+        self._add({"op": "clear"}, pane)
+
+    def _add(self, message: Dict[str, Any], pane: Optional[str]) -> None:
+        pane = pane if pane is not None else self.pane
+        if pane is not None:
+            message["pane"] = pane
+        with self._lock:
+            if self._since is None:
+                self._since = time.monotonic()
+            self._messages.append(message)
+            self._size += len(message.get("text", ""))
+            due = self._size >= self.max_bytes or time.monotonic() - self._since >= self.interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Send every waiting message now"""
+        with self._lock:
+            messages, self._messages = self._messages, []
+            self._size = 0
+            self._since = None
+            if messages:
+                self._sock.sendall(encode(messages))
+
+    def close(self) -> None:
+        """Send what is waiting and disconnect"""
+        try:
+            self.flush()
+        finally:
+            self._sock.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class _Pane:
+    """A pane's window as the listener thread sees it
+
+    The window is opened on the Tk thread. Calls made before it exists are kept and
+    made there, in order, once it is open, so the selector loop never waits for the GUI.
+    """
+
+    def __init__(self, owner: Any, name: str) -> None:
+        self._owner = owner
+        self._name = name
+        self._gui: Any = None
+        self._opened = False
+        self._calls: List[Tuple[str, Tuple[Any, ...], Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+        owner._call_soon(self._open)
+
+    @property
+    def running(self) -> bool:
+        """False once the window failed to open or was closed"""
+        with self._lock:
+            return not self._opened or (self._gui is not None and self._gui.running)
+
+    def write(self, text: str) -> None:
+        self._call("write", text)
+
+    def display_colored(self, text: str, **style: Any) -> None:
+        self._call("display_colored", text, **style)
+
+    def clear(self) -> None:
+        self._call("clear")
+
+    def _call(self, method: str, *args: Any, **kwargs: Any) -> None:
+        with self._lock:
+            if not self._opened:
+                self._calls.append((method, args, kwargs))
+                return
+            gui = self._gui
+        if gui is not None:
+            getattr(gui, method)(*args, **kwargs)
+
+    def _open(self) -> None:
+        """Open the window and make the calls kept for it (Tk thread)"""
+        try:
+            gui = self._owner.open_window(self._name)
+        except Exception as e:
+            self._owner._safe_print(f"IPC pane {self._name!r} could not be opened: {e}")
+            gui = None
+        # Holding the lock keeps later calls behind these; each only queues work
+        with self._lock:
+            calls, self._calls = self._calls, []
+            self._gui, self._opened = gui, True
+            for method, args, kwargs in calls if gui is not None else ():
+                try:
+                    getattr(gui, method)(*args, **kwargs)
+                except Exception as e:
+                    self._owner._safe_print(f"IPC message for pane {self._name!r} failed: {e}")
+
+
+class Listener:
+    """Endpoint serving a window's clients from one selector thread
+
+    Each select() round reads whatever every ready connection has sent and hands the
+    decoded messages to the GUI together, joining consecutive display() lines for one
+    pane into a single write. Panes are opened on the Tk thread without waiting for
+    them. A connection that sends a malformed frame, or a message the GUI cannot
+    handle, is dropped; the others are unaffected.
+    """
+
+    def __init__(self, gui: Any, address: Any = None, backlog: int = 128) -> None:
+        self.gui = gui
+        family, target = parse_address(("127.0.0.1", 0) if address is None else address)
+        self._path = target if family == getattr(socket, "AF_UNIX", None) else None
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            if self._path is not None:
+                self._remove_stale_socket(self._path)
+            else:
+                self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._sock.bind(target)
+            self._sock.listen(backlog)
+            self._sock.setblocking(False)
+        except OSError:
+            self._sock.close()
+            raise
+        self.address = self._sock.getsockname()
+        self._panes: Dict[str, _Pane] = {}
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._sock, selectors.EVENT_READ, "accept")
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._selector.register(self._wake_reader, selectors.EVENT_READ, "wake")
+        self._thread = threading.Thread(target=self._serve, daemon=True, name="py2gui-ipc")
+        self._thread.start()
+
+    @staticmethod
+    def _remove_stale_socket(path: str) -> None:
+        """Remove a socket file left behind by a listener that is gone"""
+        if not os.path.exists(path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except OSError:
+            os.unlink(path)
+        else:
+            raise OSError(f"another process is listening on {path}")
+        finally:
+            probe.close()
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Stop accepting, disconnect every client and remove the socket file"""
+        if self._thread.is_alive():
+            self._wake_writer.send(b"\0")
+            self._thread.join(timeout)
+        if self._path is not None:
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+
+    def _serve(self) -> None:
+        """Selector loop (listener thread)"""
+        try:
+            while True:
+                messages: List[Tuple[socket.socket, Dict[str, Any]]] = []
+                for key, _ in self._selector.select():
+                    if key.data == "wake":
+                        return
+                    if key.data == "accept":
+                        self._accept()
+                    else:
+                        self._read(key.fileobj, key.data, messages)
+                if messages:
+                    self._dispatch(messages)
+        except Exception as e:
+            self.gui._safe_print(f"IPC listener stopped: {e}")
+        finally:
+            for key in list(self._selector.get_map().values()):
+                key.fileobj.close()
+            self._selector.close()
+            self._wake_writer.close()
+
+    def _accept(self) -> None:
+        """Take every pending connection"""
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            conn.setblocking(False)
+            self._selector.register(conn, selectors.EVENT_READ, bytearray())
+
+    def _read(self, conn: socket.socket, buffer: bytearray,
+              messages: List[Tuple[socket.socket, Dict[str, Any]]]) -> None:
+        """Add the messages of conn's complete frames, with conn, to messages"""
+        try:
+            chunk = conn.recv(_RECV_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            chunk = b""
+        if chunk:
+            buffer += chunk
+            try:
+                messages.extend((conn, message) for message in decode(buffer))
+                return
+            except ValueError as e:
+                self.gui._safe_print(f"IPC client sent a bad frame, disconnecting: {e}")
+        self._drop(conn)
+
+    def _drop(self, conn: socket.socket) -> None:
+        """Disconnect one client"""
+        try:
+            self._selector.unregister(conn)
+        except KeyError:
+            return  # Already dropped
+        conn.close()
+
+    def _dispatch(self, messages: List[Tuple[socket.socket, Dict[str, Any]]]) -> None:
+        """Hand messages to their windows in order; a client whose message fails is dropped"""
+        lines: List[str] = []
+        target = None
+        for conn, message in messages:
+            if conn.fileno() < 0:
+                continue  # Dropped earlier in this round
+            try:
+                gui = self._pane(message.get("pane"))
+            except Exception as e:
+                self._reject(conn, e)
+                continue
+            op = message["op"]
+            if op == "display" and gui is target:
+                lines.append(message["text"] + "\n")
+                continue
+            if lines:
+                target.write("".join(lines))
+            lines, target = [], None
+            try:
+                if op == "display":
+                    lines, target = [message["text"] + "\n"], gui
+                elif op == "display_colored":
+                    gui.display_colored(message["text"],
+                                        **{key: message[key] for key in _STYLE_KEYS if key in message})
+                else:
+                    gui.clear()
+            except Exception as e:
+                self._reject(conn, e)
+        if lines:
+            target.write("".join(lines))
+
+    def _reject(self, conn: socket.socket, error: Exception) -> None:
+        self.gui._safe_print(f"IPC client message failed, disconnecting: {error}")
+        self._drop(conn)
+
+    def _pane(self, name: Optional[str]) -> Any:
+        """The window for a pane name, opened on first use; the listening window for None"""
+        if name is None:
+            return self.gui
+        pane = self._panes.get(name)
+        if pane is None or not pane.running:
+            pane = self._panes[name] = _Pane(self.gui, name)
+        return pane
+
@@ -0,0 +1,529 @@
+"""
+Browser mirror of a Py2GUI window's output
+
+Py2GUI.start_mirror() serves a page over local HTTP that shows the output as it
+arrives, with colours and styles, over a WebSocket. A viewer first gets a snapshot of
+the recent output, then deltas batched once per frame. The mirror is fed by the sink
+writer thread and serves every viewer from its own selector thread, so the Tk thread
+does the same work however many viewers are connected. Needs no network access and
+no third-party packages; this module does not import tkinter.
+"""
+import base64
+import hashlib
+import html
+import json
+import selectors
+import socket
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Deltas are sent at most this often
+_FRAME_SECONDS = 1 / 60
+
+# A viewer this far behind is disconnected; its page reconnects and starts from a snapshot
+_MAX_BACKLOG = 8 * 1024 * 1024
+
+_RECV_SIZE = 65536
+_MAX_REQUEST = 16384
+_MAX_CLIENT_FRAME = 65536
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_WS_TEXT, _WS_CLOSE, _WS_PING, _WS_PONG = 0x1, 0x8, 0x9, 0xA
+
+_LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1", "[::1]")
+
+_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+html, body { margin: 0; height: 100%; background: var(--bg); color: var(--fg); }
+#out { margin: 0; padding: 6px; height: 100%; box-sizing: border-box; overflow: auto;
+       font: 13px/1.3 Menlo, Consolas, "DejaVu Sans Mono", monospace; white-space: pre-wrap; }
+#status { position: fixed; top: 4px; right: 8px; font: 12px sans-serif; opacity: .7; }
+</style>
+</head>
+<body>
+<pre id="out"></pre><div id="status">connecting</div>
+<script>
+"use strict";
+const THEME = __THEME__, MAX_NODES = __MAX_NODES__;
+const out = document.getElementById("out"), status = document.getElementById("status");
+document.documentElement.style.setProperty("--bg", THEME.background);
+document.documentElement.style.setProperty("--fg", THEME.foreground);
+
+function sgrColor(code, n) {
+  return THEME.colors[code] || color256(n);
+}
+
+function color256(n) {
+  if (n < THEME.palette.length) return THEME.palette[n];
+  if (n < 16) return THEME.palette[n % THEME.palette.length];
+  if (n >= 232) { const v = 8 + 10 * (n - 232); return `rgb(${v},${v},${v})`; }
+  n -= 16;
+  const level = i => (i ? 55 + 40 * i : 0);
+  return `rgb(${level(Math.floor(n / 36))},${level(Math.floor(n / 6) % 6)},${level(n % 6)})`;
+}
+
+let style = {}, carry = "";
+
+function applySgr(params) {
+  const codes = params === "" ? [0] : params.split(";").map(p => (p === "" ? 0 : +p));
+  for (let i = 0; i < codes.length; i++) {
+    const c = codes[i];
+    if (c === 0) style = {};
+    else if (c === 1) style.bold = true;
+    else if (c === 3) style.italic = true;
+    else if (c === 4) style.underline = true;
+    else if (c === 7) style.reverse = true;
+    else if (c === 9) style.strike = true;
+    else if (c === 22) delete style.bold;
+    else if (c === 23) delete style.italic;
+    else if (c === 24) delete style.underline;
+    else if (c === 27) delete style.reverse;
+    else if (c === 29) delete style.strike;
+    else if (c >= 30 && c <= 37) style.fg = sgrColor(c, c - 30);
+    else if (c >= 90 && c <= 97) style.fg = sgrColor(c, c - 82);
+    else if (c >= 40 && c <= 47) style.bg = sgrColor(c, c - 40);
+    else if (c >= 100 && c <= 107) style.bg = sgrColor(c, c - 92);
+    else if (c === 39) delete style.fg;
+    else if (c === 49) delete style.bg;
+    else if (c === 38 || c === 48) {
+      let value = null;
+      if (codes[i + 1] === 5) { value = sgrColor(`${c};5;${codes[i + 2]}`, codes[i + 2]); i += 2; }
+      else if (codes[i + 1] === 2) { value = `rgb(${codes[i + 2]},${codes[i + 3]},${codes[i + 4]})`; i += 4; }
+      if (value !== null) style[c === 38 ? "fg" : "bg"] = value;
+    }
+  }
+}
+
+function span(text, fragment) {
+  if (!text) return;
+  let fg = style.fg, bg = style.bg;
+  if (style.reverse) { [fg, bg] = [bg || THEME.background, fg || THEME.foreground]; }
+  if (!fg && !bg && !style.bold && !style.italic && !style.underline && !style.strike) {
+    fragment.appendChild(document.createTextNode(text));
+    return;
+  }
+  const node = document.createElement("span");
+  node.textContent = text;
+  if (fg) node.style.color = fg;
+  if (bg) node.style.background = bg;
+  if (style.bold) node.style.fontWeight = "bold";
+  if (style.italic) node.style.fontStyle = "italic";
+  const lines = [style.underline && "underline", style.strike && "line-through"].filter(Boolean);
+  if (lines.length) node.style.textDecoration = lines.join(" ");
+  fragment.appendChild(node);
+}
+
+function clearOutput() { out.textContent = ""; style = {}; carry = ""; }
+
+function append(text) {
+  text = carry + text;
+  // Hold back an escape sequence cut off at the end of the batch
+  const partial = text.match(/\\x1b(\\[[0-9;?]*)?$/);
+  carry = partial ? partial[0] : "";
+  if (partial) text = text.slice(0, partial.index);
+  const fragment = document.createDocumentFragment();
+  const escape = /\\x1b\\[([0-9;?]*)([A-Za-z])/g;
+  let last = 0, match;
+  while ((match = escape.exec(text)) !== null) {
+    span(text.slice(last, match.index), fragment);
+    last = escape.lastIndex;
+    if (match[2] === "m") applySgr(match[1]);
+    else if (match[2] === "J" && match[1] === "2") { out.textContent = ""; fragment.textContent = ""; }
+  }
+  span(text.slice(last), fragment);
+  const follow = out.scrollTop + out.clientHeight >= out.scrollHeight - 4;
+  out.appendChild(fragment);
+  while (out.childNodes.length > MAX_NODES) out.removeChild(out.firstChild);
+  if (follow) out.scrollTop = out.scrollHeight;
+}
+
+function connect(delay) {
+  const socket = new WebSocket(`ws://${location.host}/ws`);
+  socket.onopen = () => { status.textContent = ""; delay = 500; };
+  socket.onmessage = event => {
+    for (const [op, text] of JSON.parse(event.data)) {
+      if (op === "s") { clearOutput(); append(text); }
+      else if (op === "o") append(text);
+      else if (op === "c") clearOutput();
+    }
+  };
+  socket.onclose = () => {
+    status.textContent = "disconnected, retrying";
+    setTimeout(() => connect(Math.min(delay * 2, 10000)), delay);
+  };
+}
+connect(500);
+</script>
+</body>
+</html>
+"""
+
+
+def _ws_frame(payload: bytes, opcode: int = _WS_TEXT) -> bytes:
+    """One unmasked, unfragmented server-to-client WebSocket frame"""
+    size = len(payload)
+    if size < 126:
+        header = struct.pack("!BB", 0x80 | opcode, size)
+    elif size < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, size)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, size)
+    return header + payload
+
+
+def _ws_read(buffer: bytearray) -> Optional[Tuple[int, bytes]]:
+    """Take one client frame (opcode, payload) from buffer; None until it is complete"""
+    if len(buffer) < 2:
+        return None
+    opcode, size, pos = buffer[0] & 0x0F, buffer[1] & 0x7F, 2
+    if size == 126:
+        if len(buffer) < 4:
+            return None
+        (size,), pos = struct.unpack_from("!H", buffer, 2), 4
+    elif size == 127:
+        if len(buffer) < 10:
+            return None
+        (size,), pos = struct.unpack_from("!Q", buffer, 2), 10
+    if size > _MAX_CLIENT_FRAME:
+        raise ValueError(f"client frame of {size} bytes is too large")
+    masked = buffer[1] & 0x80
+    end = pos + (4 if masked else 0) + size
+    if len(buffer) < end:
+        return None
+    payload = bytes(buffer[end - size:end])
+    if masked:
+        mask = buffer[pos:pos + 4]
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    del buffer[:end]
+    return opcode, payload
+
+
+class _Viewer:
+    """One connection: an HTTP request, then possibly a WebSocket"""
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.inbox = bytearray()
+        self.outbox = bytearray()
+        self.websocket = False
+        self.closing = False
+        # Registered for writability while outbox holds what the socket did not take
+        self.waiting = False
+
+
+class Mirror:
+    """HTTP + WebSocket server mirroring output text written to it as a sink
+
+    write() and marker() come from the sink writer thread and only add to the pending
+    delta. At most once per frame the server thread sends the delta to all viewers,
+    encoded once for all of them, and adds it to the retained history (the last
+    max_lines lines), which is what a new viewer gets as its snapshot. Nothing is sent
+    until seed() has supplied the output from before the mirror was added as a sink;
+    output written in the meantime is kept and follows the seed.
+    """
+
+    def __init__(self, title: str, theme: Dict[str, Any], address: Any = None,
+                 max_lines: int = 10000) -> None:
+        if address is None:
+            address = ("127.0.0.1", 0)
+        elif isinstance(address, int):
+            address = ("127.0.0.1", address)
+        self.max_lines = max_lines
+        self._page = (_PAGE.replace("__TITLE__", html.escape(title))
+                      .replace("__THEME__", json.dumps({key: theme[key] for key in ("background", "foreground", "palette", "colors")})
+                               .replace("</", "<\\/"))
+                      .replace("__MAX_NODES__", str(max(max_lines * 4, 1000)))).encode("utf-8")
+        self._lock = threading.Lock()
+        self._history: List[str] = []
+        self._history_lines = 0
+        self._pending: List[List[str]] = []
+        self._seeded = False
+        self._woken = False
+        self._closed = False
+
+        family = socket.AF_INET6 if ":" in address[0] else socket.AF_INET
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._sock.bind(address)
+            self._sock.listen(64)
+            self._sock.setblocking(False)
+        except OSError:
+            self._sock.close()
+            raise
+        self.address = self._sock.getsockname()[:2]
+        self._loopback = address[0] in _LOOPBACK_HOSTS
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._sock, selectors.EVENT_READ, None)
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._selector.register(self._wake_reader, selectors.EVENT_READ, None)
+        self._viewers: Dict[socket.socket, _Viewer] = {}
+        self._thread = threading.Thread(target=self._serve, daemon=True, name="py2gui-mirror")
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        """Address of the page to open in a browser"""
+        host, port = self.address
+        return f"http://[{host}]:{port}/" if ":" in host else f"http://{host}:{port}/"
+
+    @property
+    def viewers(self) -> int:
+        """Number of connected browser viewers"""
+        return sum(1 for viewer in list(self._viewers.values()) if viewer.websocket)
+
+    # Sink interface (sink writer thread)
+
+    def write(self, text: str) -> None:
+        with self._lock:
+            if self._pending and self._pending[-1][0] == "o":
+                self._pending[-1][1] += text
+            else:
+                self._pending.append(["o", text])
+        self._wake()
+
+    def flush(self) -> None:
+        pass
+
+    def seed(self, text: str) -> None:
+        """Supply the output shown before this mirror started receiving writes"""
+        with self._lock:
+            self._pending.insert(0, ["o", text])
+            self._seeded = True
+        self._wake()
+
+    def marker(self, label: str) -> None:
+        """Apply a non-output action; "clear" empties the history and every viewer"""
+        if label != "clear":
+            return
+        with self._lock:
+            # Output still pending would be cleared anyway
+            self._pending = [["c"]]
+        self._wake()
+
+    def _trim_history(self) -> None:
+        """Drop the oldest lines until max_lines remain (server thread)"""
+        history, lines, drop = self._history, self._history_lines, 0
+        while lines > self.max_lines:
+            newlines = history[drop].count("\n")
+            if lines - newlines < self.max_lines:
+                # Cut inside the oldest chunk kept
+                chunk, cut = history[drop], -1
+                for _ in range(lines - self.max_lines):
+                    cut = chunk.index("\n", cut + 1)
+                history[drop] = chunk[cut + 1:]
+                lines = self.max_lines
+                break
+            lines -= newlines
+            drop += 1
+        self._history, self._history_lines = history[drop:], lines
+
+    def _wake(self) -> None:
+        """Have the server thread look at the pending delta"""
+        with self._lock:
+            if self._woken or self._closed:
+                return
+            self._woken = True
+        try:
+            self._wake_writer.send(b"\0")
+        except OSError:
+            pass  # Closed
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Disconnect every viewer and stop serving"""
+        with self._lock:
+            self._closed = True
+        try:
+            self._wake_writer.send(b"\0")
+        except OSError:
+            pass
+        self._thread.join(timeout)
+
+    # Server thread
+
+    def _serve(self) -> None:
+        next_frame = 0.0
+        try:
+            while not self._closed:
+                timeout = None
+                if self._pending and self._seeded:
+                    timeout = max(next_frame - time.monotonic(), 0.0)
+                for key, events in self._selector.select(timeout):
+                    if key.fileobj is self._sock:
+                        self._accept()
+                    elif key.fileobj is self._wake_reader:
+                        self._drain_wakeups()
+                    else:
+                        viewer = self._viewers[key.fileobj]
+                        if events & selectors.EVENT_READ:
+                            self._read(viewer)
+                        if events & selectors.EVENT_WRITE and viewer.sock in self._viewers:
+                            self._send(viewer)
+                if self._pending and self._seeded and time.monotonic() >= next_frame:
+                    self._broadcast()
+                    next_frame = time.monotonic() + _FRAME_SECONDS
+        finally:
+            for viewer in list(self._viewers.values()):
+                self._drop(viewer)
+            self._selector.close()
+            for sock in (self._sock, self._wake_reader, self._wake_writer):
+                sock.close()
+
+    def _drain_wakeups(self) -> None:
+        with self._lock:
+            self._woken = False
+        try:
+            while self._wake_reader.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                sock, _ = self._sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            sock.setblocking(False)
+            self._viewers[sock] = _Viewer(sock)
+            self._selector.register(sock, selectors.EVENT_READ)
+
+    def _broadcast(self) -> None:
+        """Send the pending delta to every WebSocket viewer, encoded once, and keep it"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for op in pending:
+            if op[0] == "c":
+                self._history, self._history_lines = [], 0
+            else:
+                self._history.append(op[1])
+                self._history_lines += op[1].count("\n")
+        if self._history_lines > self.max_lines + self.max_lines // 8:
+            self._trim_history()
+        viewers = [viewer for viewer in self._viewers.values() if viewer.websocket]
+        if not viewers:
+            return
+        frame = _ws_frame(json.dumps(pending, separators=(",", ":")).encode("utf-8"))
+        for viewer in viewers:
+            self._queue(viewer, frame)
+
+    def _queue(self, viewer: _Viewer, data: bytes) -> None:
+        """Add data to a viewer's outgoing bytes; slow viewers are dropped"""
+        if len(viewer.outbox) + len(data) > _MAX_BACKLOG:
+            self._drop(viewer)
+            return
+        was_empty = not viewer.outbox
+        viewer.outbox += data
+        if was_empty:
+            self._send(viewer)
+
+    def _send(self, viewer: _Viewer) -> None:
+        """Send what the socket takes now; wait for writability for the rest"""
+        try:
+            sent = viewer.sock.send(viewer.outbox)
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self._drop(viewer)
+            return
+        del viewer.outbox[:sent]
+        if not viewer.outbox and viewer.closing:
+            self._drop(viewer)
+            return
+        waiting = bool(viewer.outbox)
+        if waiting != viewer.waiting:
+            viewer.waiting = waiting
+            self._selector.modify(viewer.sock, selectors.EVENT_READ | (selectors.EVENT_WRITE if waiting else 0))
+
+    def _drop(self, viewer: _Viewer) -> None:
+        if self._viewers.pop(viewer.sock, None) is not None:
+            self._selector.unregister(viewer.sock)
+            viewer.sock.close()
+
+    def _read(self, viewer: _Viewer) -> None:
+        try:
+            chunk = viewer.sock.recv(_RECV_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            chunk = b""
+        if not chunk:
+            self._drop(viewer)
+            return
+        viewer.inbox += chunk
+        try:
+            if viewer.websocket:
+                self._read_frames(viewer)
+            else:
+                self._read_request(viewer)
+        except ValueError:
+            self._drop(viewer)
+
+    def _read_frames(self, viewer: _Viewer) -> None:
+        """Answer pings and closes; viewers send nothing else that matters"""
+        while viewer.sock in self._viewers:
+            frame = _ws_read(viewer.inbox)
+            if frame is None:
+                return
+            opcode, payload = frame
+            if opcode == _WS_CLOSE:
+                viewer.closing = True
+                self._queue(viewer, _ws_frame(payload[:2], _WS_CLOSE))
+            elif opcode == _WS_PING:
+                self._queue(viewer, _ws_frame(payload, _WS_PONG))
+
+    def _read_request(self, viewer: _Viewer) -> None:
+        """Serve the page, or upgrade /ws to a WebSocket and send the snapshot"""
+        end = viewer.inbox.find(b"\r\n\r\n")
+        if end < 0:
+            if len(viewer.inbox) > _MAX_REQUEST:
+                raise ValueError("request head too large")
+            return
+        lines = bytes(viewer.inbox[:end]).decode("latin-1").split("\r\n")
+        del viewer.inbox[:end + 4]
+        parts = lines[0].split()
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        path = parts[1] if len(parts) == 3 and parts[0] == "GET" else None
+        viewer.closing = True
+        if path is None:
+            self._queue(viewer, _response("405 Method Not Allowed"))
+        elif not self._allowed(headers):
+            self._queue(viewer, _response("403 Forbidden"))
+        elif path in ("/", "/index.html"):
+            self._queue(viewer, _response("200 OK", self._page, "text/html; charset=utf-8"))
+        elif path == "/ws" and headers.get("upgrade", "").lower() == "websocket" and "sec-websocket-key" in headers:
+            accept = base64.b64encode(hashlib.sha1(
+                (headers["sec-websocket-key"] + _WS_GUID).encode("ascii")).digest()).decode("ascii")
+            viewer.closing = False
+            viewer.websocket = True
+            snapshot = "".join(self._history)
+            self._queue(viewer, ("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                                 f"Connection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n").encode("ascii")
+                        + _ws_frame(json.dumps([["s", snapshot]], separators=(",", ":")).encode("utf-8")))
+        else:
+            self._queue(viewer, _response("404 Not Found"))
+
+    def _allowed(self, headers: Dict[str, str]) -> bool:
+        """Refuse other web sites' pages, and DNS-rebound host names on a loopback address"""
+        host = headers.get("host", "")
+        origin = headers.get("origin")
+        if origin is not None and origin.partition("://")[2] != host:
+            return False
+        return not self._loopback or host.rpartition(":")[0] in _LOOPBACK_HOSTS
+
+
+def _response(status: str, body: bytes = b"", content_type: str = "text/plain") -> bytes:
+    if not body:
+        body = status.encode("ascii")
+    return (f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            "Cache-Control: no-store\r\nConnection: close\r\n\r\n").encode("ascii") + body
@@ -3,98 +3,1452 @@ Py2GUI - Enhanced Python Terminal-style GUI
 Fixed version: Fixed potential errors and issues
 """
 import tkinter as tk
-from tkinter import scrolledtext, simpledialog, Menu, Frame, Entry, Button, StringVar, font
+from tkinter import scrolledtext, simpledialog, filedialog, Menu, Frame, Entry, Button, StringVar, font
 import queue
 import threading
 import traceback
 import re
 import json
+import time
 import os
 import sys
-from typing import Callable, Any, Optional, List, Tuple, Dict, Set
+import itertools
+import collections
+import operator
+import bisect
+import html
+import marshal
+from typing import Callable, Any, Optional, List, Tuple, Dict, Set, FrozenSet, Pattern, Deque
 import warnings
 
 
+# Cursor-addressing escapes understood by frame mode (CUP, ED, EL, cursor moves, private modes)
+_CURSOR_ESCAPE_RE = re.compile(r'\x1b\[(\??)(\d*)(?:;(\d*))?([HfJKABCDhl])')
+# Any CSI escape, removed from text written to sinks that do not understand ANSI
+_ANSI_ESCAPE_RE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+# Escapes that switch plain output into frame mode
+_SCREEN_ENTER_RE = re.compile(r'\x1b\[\d*(?:;\d*)?[HfJ]')
+
+# Built-in themes. palette holds the 16 ANSI colors (0-7 normal, 8-15 bright) used for
+# SGR 30-37/40-47, 90-97/100-107 and 38;5;0-15; a theme may list all 256 colors, otherwise
+# 16-255 are the standard xterm color cube and gray ramp. colors gives exact colors for
+# single SGR codes, over the palette. Keys a theme leaves out come from the default
+# theme, except that its colors only go with its palette.
+_THEMES: Dict[str, Dict[str, Any]] = {
+    "default": {
+        "label": "Default Theme",
+        "background": "black",
+        "foreground": "white",
+        "cursor": "white",
+        "palette": [
+            "#000000", "#800000", "#008000", "#808000", "#000080", "#800080", "#008080", "#c0c0c0",
+            "#808080", "#ff0000", "#00ff00", "#ffff00", "#0000ff", "#ff00ff", "#00ffff", "#ffffff",
+        ],
+        # The basic colors Py2GUI has always used
+        "colors": {
+            "30": "#000000", "31": "#ff0000", "32": "#00ff00", "33": "#ffff00",
+            "34": "#0000ff", "35": "#ff00ff", "36": "#00ffff", "37": "#ffffff",
+            "90": "#808080", "91": "#ff8080", "92": "#80ff80", "93": "#ffff80",
+            "94": "#8080ff", "95": "#ff80ff", "96": "#80ffff", "97": "#ffffff",
+            "40": "#1a1a1a", "41": "#ff0000", "42": "#00ff00", "43": "#ffff00",
+            "44": "#0000ff", "45": "#ff00ff", "46": "#00ffff", "47": "#ffffff",
+        },
+    },
+    "dark": {
+        "label": "Dark Theme",
+        "background": "black",
+        "foreground": "white",
+        "cursor": "white",
+        "palette": [
+            "#555753", "#cc0000", "#4e9a06", "#c4a000", "#3465a4", "#75507b", "#06989a", "#d3d7cf",
+            "#888a85", "#ef2929", "#8ae234", "#fce94f", "#729fcf", "#ad7fa8", "#34e2e2", "#eeeeec",
+        ],
+    },
+    "light": {
+        "label": "Light Theme",
+        "background": "white",
+        "foreground": "black",
+        "cursor": "black",
+        "palette": [
+            "#000000", "#cd3131", "#00bc00", "#949800", "#0451a5", "#bc05bc", "#0598bc", "#555555",
+            "#666666", "#cd3131", "#14ce14", "#b5ba00", "#0451a5", "#bc05bc", "#0598bc", "#a5a5a5",
+        ],
+    },
+    "matrix": {
+        "label": "Green on Black",
+        "background": "black",
+        "foreground": "#00ff00",
+        "cursor": "#00ff00",
+        "palette": [
+            "#2f4f2f", "#5fd75f", "#00ff00", "#afff00", "#00af5f", "#5faf5f", "#00d787", "#afffaf",
+            "#3f7f3f", "#87ff87", "#5fff5f", "#d7ff87", "#00d75f", "#87d787", "#5fffaf", "#d7ffd7",
+        ],
+    },
+}
+_THEME_KEYS = ("label", "background", "foreground", "cursor", "palette", "colors")
+
+
+def _xterm_colors() -> List[str]:
+    """Colors 16-255 of the xterm palette: a 6x6x6 color cube, then 24 grays"""
+    levels = (0, 95, 135, 175, 215, 255)
+    cube = [f"#{r:02x}{g:02x}{b:02x}" for r in levels for g in levels for b in levels]
+    grays = [f"#{v:02x}{v:02x}{v:02x}" for v in range(8, 248, 10)]
+    return cube + grays
+
+
+_XTERM_COLORS = _xterm_colors()
+
+
+def _theme_colors(theme: Dict[str, Any]) -> Dict[str, str]:
+    """SGR color code -> color for a complete theme (true color is computed per code)"""
+    palette = theme["palette"]
+    full = list(palette) if len(palette) == 256 else list(palette[:16]) + _XTERM_COLORS
+    colors = {}
+    for index in range(8):
+        colors[str(30 + index)] = colors[str(40 + index)] = full[index]
+        colors[str(90 + index)] = colors[str(100 + index)] = full[8 + index]
+    for index, color in enumerate(full):
+        colors[f"38;5;{index}"] = colors[f"48;5;{index}"] = color
+    colors.update(theme["colors"])
+    return colors
+
+
+def _complete_theme(theme: Dict[str, Any]) -> Dict[str, Any]:
+    """theme with the keys it leaves out taken from the default theme"""
+    complete = {**_THEMES["default"], **theme}
+    if "palette" in theme:
+        # The default theme's exact colors belong to its palette
+        complete["colors"] = theme.get("colors", {})
+    return complete
+
+
+def _validate_theme(name: str, theme: Any) -> Dict[str, Any]:
+    """Check a theme definition from the config; raises ValueError saying what is wrong"""
+    if not isinstance(theme, dict):
+        raise ValueError(f"theme {name!r} must be an object, not {theme!r}")
+    unknown = sorted(set(theme) - set(_THEME_KEYS))
+    if unknown:
+        raise ValueError(f"theme {name!r} has unknown keys {unknown}; expected some of {_THEME_KEYS}")
+    for key in _THEME_KEYS[:-2]:
+        if key in theme and not isinstance(theme[key], str):
+            raise ValueError(f"theme {name!r}: {key} must be a string, not {theme[key]!r}")
+    palette = theme.get("palette")
+    if palette is not None and (not isinstance(palette, list) or len(palette) not in (16, 256)
+                                or not all(isinstance(color, str) for color in palette)):
+        raise ValueError(f"theme {name!r}: palette must be a list of 16 or 256 colors")
+    colors = theme.get("colors")
+    if colors is not None and (not isinstance(colors, dict)
+                               or not all(isinstance(color, str) for color in colors.values())):
+        raise ValueError(f"theme {name!r}: colors must map SGR codes to colors")
+    return dict(theme)
+
+
+# SGR color codes of the default theme
+_ANSI_COLORS = _theme_colors(_THEMES["default"])
+
+# Basic foreground and background SGR color codes
+_FG_CODES = frozenset([str(code) for code in range(30, 38)] + [str(code) for code in range(90, 98)])
+_BG_CODES = frozenset([str(code) for code in range(40, 48)] + [str(code) for code in range(100, 108)])
+_TRUE_COLOR_RE = re.compile(r'[34]8;2;(\d{1,3});(\d{1,3});(\d{1,3})$')
+
+
+def _ansi_color(code: str, colors: Dict[str, str]) -> Optional[str]:
+    """Color for an SGR color code from a palette map, or computed for 38;2;r;g;b true color"""
+    color = colors.get(code)
+    if color is None:
+        match = _TRUE_COLOR_RE.match(code)
+        if match and all(int(value) <= 255 for value in match.groups()):
+            color = "#" + "".join(f"{int(value):02x}" for value in match.groups())
+    return color
+
+# A rendered line is a tuple of (text, tags) runs
+Run = Tuple[str, Tuple[str, ...]]
+
+# Largest count shown by the "N new lines" indicator
+_MAX_UNSEEN_LINES = 9999
+
+# Text widget wrap modes and what to do with lines longer than max_line_length
+_WRAP_MODES = ("none", "char", "word")
+_LONG_LINE_MODES = ("truncate", "fold")
+
+# Export formats, lines written per chunk, and how style tags map back to SGR codes / CSS
+_EXPORT_FORMATS = ("text", "ansi", "html")
+_EXPORT_CHUNK_LINES = 1000
+_STYLE_TAG_CODES = {'bold': '1', 'italic': '3', 'underline': '4', 'reverse': '7', 'strikethrough': '9'}
+_STYLE_TAG_CSS = {
+    'bold': 'font-weight:bold',
+    'italic': 'font-style:italic',
+    'underline': 'text-decoration:underline',
+    'strikethrough': 'text-decoration:line-through',
+}
+
+# How often the metrics overlay redraws
+_METRICS_REFRESH_MS = 500
+
+# Spans kept by the timeline tracer; older ones are overwritten
+_TRACE_CAPACITY = 200000
+
+# Seconds between stack samples taken by the profiler
+_PROFILE_INTERVAL = 0.005
+
+# How often the config file's modification time is checked for a reload, while it exists
+_CONFIG_POLL_MS = 1000
+
+# Zoom levels: each step scales every text font by 10% of its own size
+_ZOOM_STEP = 0.1
+_ZOOM_LEVELS = (-5, 20)
+
+# Output kept for new browser viewers when the window has no scrollback limit
+_MIRROR_LINES = 10000
+
+
+def _is_color(code: str) -> bool:
+    """Whether an SGR code, as _parse_sgr keeps it, sets a color"""
+    return code in _FG_CODES or code in _BG_CODES or code.startswith(('38;', '48;'))
+
+
+def _is_background(code: str) -> bool:
+    """Whether an SGR color code sets the background (40-47, 100-107, 48;...)"""
+    return code.startswith(('4', '10'))
+
+
+_SGR_RE = re.compile(r'(\x1b\[[\d;]*m)')
+
+# SGR codes that switch a style off, and the style code each one cancels
+_STYLE_RESETS = {'22': '1', '23': '3', '24': '4', '27': '7', '29': '9'}
+
+
+def _parse_sgr(text: str, disabled_colors: Any = ()) -> List[Tuple[str, List[str]]]:
+    """Split text at SGR escapes into (text, active codes) parts; needs no Tk
+    
+    Extended colors stay one code: "38;5;n" (256 colors) and "38;2;r;g;b" (true color),
+    likewise for 48 (background).
+    """
+    parts = []
+    last_end = 0
+    current_codes: List[str] = []
+    
+    for match in _SGR_RE.finditer(text):
+        # Add normal text
+        if match.start() > last_end:
+            normal_text = text[last_end:match.start()]
+            if normal_text:
+                parts.append((normal_text, current_codes.copy()))
+        
+        last_end = match.end()
+        
+        # Parse the parameters between \x1b[ and m; an empty one means reset
+        params = match.group(0)[2:-1].split(';')
+        index = 0
+        while index < len(params):
+            code = params[index]
+            index += 1
+            if code in ('38', '48'):
+                # Extended color: the next parameters belong to this code
+                mode = params[index] if index < len(params) else ''
+                count = 1 if mode == '5' else 3 if mode == '2' else 0
+                values = params[index + 1:index + 1 + count]
+                index += 1 + len(values)
+                if not count or len(values) < count or not all(v.isdigit() and int(v) <= 255 for v in values):
+                    # Malformed: skip it with its parameters and go on with the rest
+                    continue
+                code = ';'.join([code, mode] + [str(int(v)) for v in values])
+            
+            if code in ('', '0'):
+                # Reset (an empty code list renders with the default tag)
+                current_codes = []
+            elif code in ('1', '3', '4', '7', '9'):
+                # Style codes
+                if code not in current_codes:
+                    if code == '1' and '22' in current_codes:
+                        current_codes.remove('22')
+                    current_codes.append(code)
+            elif code in _STYLE_RESETS:
+                # Reset specific styles
+                if _STYLE_RESETS[code] in current_codes:
+                    current_codes.remove(_STYLE_RESETS[code])
+            elif code == '39' or code == '49':
+                # Default foreground / background color
+                background = code == '49'
+                current_codes = [c for c in current_codes if not _is_color(c) or _is_background(c) != background]
+            elif _is_color(code):
+                # Color codes
+                if code in disabled_colors:
+                    continue
+                # Replace the active color of the same kind
+                background = _is_background(code)
+                current_codes = [c for c in current_codes if not _is_color(c) or _is_background(c) != background]
+                current_codes.append(code)
+    
+    # Add remaining text
+    if last_end < len(text):
+        remaining_text = text[last_end:]
+        if remaining_text:
+            parts.append((remaining_text, current_codes.copy()))
+    
+    return parts
+
+
+class _LineIndex:
+    """Plain-text copy of text_area, one entry per line, searched in joined chunks"""
+    
+    CHUNK_LINES = 4096
+    
+    def __init__(self) -> None:
+        self.lines: List[str] = [""]
+        self._chunks: Dict[int, Tuple[str, List[int]]] = {}
+        self._folded: Dict[int, Optional[str]] = {}
+    
+    def __len__(self) -> int:
+        return len(self.lines)
+    
+    def reset(self, lines: Optional[List[str]] = None) -> None:
+        """Replace the whole index (an empty buffer still has one line)"""
+        self.lines = list(lines) if lines else [""]
+        self._chunks.clear()
+        self._folded.clear()
+    
+    def append(self, text: str) -> None:
+        """Record text appended at the end of the buffer"""
+        first = len(self.lines) - 1
+        pieces = text.split('\n')
+        self.lines[-1] += pieces[0]
+        self.lines.extend(pieces[1:])
+        self._invalidate(first, len(self.lines) - 1)
+    
+    def drop(self, count: int) -> None:
+        """Forget the first count lines (scrollback trimming)"""
+        # Rebind rather than delete in place: exports may hold the old list
+        self.lines = self.lines[count:]
+        self._chunks.clear()
+        self._folded.clear()
+    
+    def set_line(self, line: int, text: str) -> None:
+        """Record that one line changed in place"""
+        self.lines[line] = text
+        self._invalidate(line, line)
+    
+    def replace_from(self, first: int, lines: List[str]) -> None:
+        """Record that every line from first on was replaced by lines (a frame redraw)"""
+        last = max(len(self.lines), first + len(lines)) - 1
+        self.lines[first:] = lines
+        self._invalidate(first, last)
+    
+    def _invalidate(self, first: int, last: int) -> None:
+        """Drop cached chunk text covering lines first..last"""
+        for chunk in range(first // self.CHUNK_LINES, last // self.CHUNK_LINES + 1):
+            self._chunks.pop(chunk, None)
+            self._folded.pop(chunk, None)
+    
+    def _chunk(self, chunk: int) -> Tuple[str, List[int]]:
+        """Joined text of one chunk and the offset of each of its lines"""
+        cached = self._chunks.get(chunk)
+        if cached is None:
+            lines = self.lines[chunk * self.CHUNK_LINES:(chunk + 1) * self.CHUNK_LINES]
+            offsets = list(itertools.accumulate((len(line) + 1 for line in lines[:-1]), initial=0))
+            cached = ("\n".join(lines), offsets)
+            self._chunks[chunk] = cached
+        return cached
+    
+    def _folded_chunk(self, chunk: int) -> Optional[str]:
+        """Lowercased chunk text, or None when lowercasing would shift offsets"""
+        if chunk not in self._folded:
+            text = self._chunk(chunk)[0]
+            folded = text.lower()
+            self._folded[chunk] = folded if len(folded) == len(text) else None
+        return self._folded[chunk]
+    
+    def search(self, pattern: Pattern, line: int, col: int, backwards: bool = False,
+               folded_pattern: Optional[Pattern] = None) -> Optional[Tuple[int, int, int]]:
+        """Find the next (or previous) match from line/col, wrapping around; returns (line, col, length)
+        
+        folded_pattern, if given, is a case-sensitive equivalent of pattern for lowercased
+        text; plain case-insensitive searches use it because re.IGNORECASE is much slower.
+        """
+        chunk_count = (len(self.lines) - 1) // self.CHUNK_LINES + 1
+        start_chunk = min(max(line, 0) // self.CHUNK_LINES, chunk_count - 1)
+        text, offsets = self._chunk(start_chunk)
+        row = line - start_chunk * self.CHUNK_LINES
+        pos = min(offsets[row] + col, len(text)) if 0 <= row < len(offsets) else len(text)
+        
+        # (chunk, start, end) slices in search order, ending with the wrapped-around part
+        if backwards:
+            order = ([(start_chunk, 0, pos)] +
+                     [(chunk, 0, None) for chunk in range(start_chunk - 1, -1, -1)] +
+                     [(chunk, 0, None) for chunk in range(chunk_count - 1, start_chunk, -1)] +
+                     [(start_chunk, pos, None)])
+        else:
+            order = ([(start_chunk, pos, None)] +
+                     [(chunk, 0, None) for chunk in range(start_chunk + 1, chunk_count)] +
+                     [(chunk, 0, None) for chunk in range(0, start_chunk)] +
+                     [(start_chunk, 0, pos)])
+        
+        for chunk, start, end in order:
+            text, offsets = self._chunk(chunk)
+            chunk_pattern = pattern
+            if folded_pattern is not None:
+                folded = self._folded_chunk(chunk)
+                if folded is not None:
+                    text, chunk_pattern = folded, folded_pattern
+            found = None
+            for match in chunk_pattern.finditer(text, start, len(text) if end is None else end):
+                if match.end() > match.start():
+                    found = match
+                    if not backwards:
+                        break
+            if found is not None:
+                row = bisect.bisect_right(offsets, found.start()) - 1
+                return (chunk * self.CHUNK_LINES + row, found.start() - offsets[row],
+                        found.end() - found.start())
+        return None
+    
+    def matching_lines(self, pattern: Pattern, last: Optional[int] = None) -> List[int]:
+        """Numbers of the lines (up to last) that contain a match, one regex scan per chunk"""
+        last = len(self.lines) - 1 if last is None else last
+        found = []
+        for chunk in range(last // self.CHUNK_LINES + 1):
+            text, offsets = self._chunk(chunk)
+            pos = 0
+            while True:
+                match = pattern.search(text, pos)
+                if match is None:
+                    break
+                row = bisect.bisect_right(offsets, match.start()) - 1
+                line = chunk * self.CHUNK_LINES + row
+                if line > last:
+                    break
+                found.append(line)
+                
+                # One hit per line is enough; continue on the next line
+                if row + 1 >= len(offsets):
+                    break
+                pos = offsets[row + 1]
+        return found
+    
+    def find_all(self, pattern: Pattern, first: int, last: int) -> List[Tuple[int, int, int]]:
+        """All matches on lines first..last as (line, col, length)"""
+        matches = []
+        for line in range(max(first, 0), min(last, len(self.lines) - 1) + 1):
+            for match in pattern.finditer(self.lines[line]):
+                if match.end() > match.start():
+                    matches.append((line, match.start(), match.end() - match.start()))
+        return matches
+
+
+class _LineStore(_LineIndex):
+    """Complete output history: searchable text plus the styled runs of every line"""
+    
+    def __init__(self) -> None:
+        super().__init__()
+        self.runs: List[List[Run]] = [[]]
+    
+    def reset(self) -> None:
+        """Forget all history"""
+        super().reset()
+        self.runs = [[]]
+    
+    def drop(self, count: int) -> None:
+        """Forget the first count lines and their runs"""
+        super().drop(count)
+        self.runs = self.runs[count:]
+    
+    def append_runs(self, runs: List[Run]) -> None:
+        """Record styled output appended at the end of the buffer"""
+        for run_text, tags in runs:
+            pieces = run_text.split('\n')
+            if pieces[0]:
+                self.runs[-1].append((pieces[0], tags))
+            for piece in pieces[1:]:
+                self.runs.append([(piece, tags)] if piece else [])
+        self.append("".join(run_text for run_text, _ in runs))
+    
+    def line_runs(self, lines: List[int]) -> List[Run]:
+        """Styled runs for the given lines, each followed by a newline"""
+        newline: Run = ("\n", ('default',))
+        result: List[Run] = []
+        for line in lines:
+            result.extend(self.runs[line])
+            result.append(newline)
+        return result
+
+
+class _SinkWriter:
+    """Background thread that tees output text to files and streams in batches"""
+    
+    BATCH_SIZE = 1024
+    
+    def __init__(self, on_error: Callable[[str], None]) -> None:
+        self._on_error = on_error
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self.active = False
+    
+    def add(self, sink: Any, strip_ansi: Optional[bool] = None) -> None:
+        """Add a path (opened for append) or a writable stream"""
+        if isinstance(sink, (str, os.PathLike)):
+            stream = open(sink, 'a', encoding='utf-8')
+            owned = True
+        else:
+            stream = sink
+            owned = False
+        if strip_ansi is None:
+            # Keep colours only for terminals
+            isatty = getattr(stream, 'isatty', None)
+            strip_ansi = not (callable(isatty) and isatty())
+        
+        self._queue.put(('add', (sink, stream, strip_ansi, owned)))
+        self.active = True
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="py2gui-sinks")
+            self._thread.start()
+    
+    def remove(self, sink: Any) -> None:
+        """Stop writing to sink (paths are closed, streams are only flushed)"""
+        if self.active:
+            self._queue.put(('remove', sink))
+    
+    def write(self, text: str) -> None:
+        """Queue text for every sink; never blocks"""
+        if self.active:
+            self._queue.put(text)
+    
+    def marker(self, label: str) -> None:
+        """Pass a non-output action such as clear, in order with the text, to sinks with marker()"""
+        if self.active:
+            self._queue.put(('marker', label))
+    
+    def backlog(self) -> int:
+        """Number of writes still queued for the writer thread"""
+        return self._queue.qsize()
+    
+    def close(self, timeout: float = 2.0) -> None:
+        """Flush pending output and stop the writer thread"""
+        if self._thread is not None:
+            self.active = False
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def _run(self) -> None:
+        """Writer loop: take everything already queued and write it as one batch"""
+        sinks: List[Tuple[Any, Any, bool, bool]] = []
+        running = True
+        while running:
+            items = [self._queue.get()]
+            while len(items) < self.BATCH_SIZE:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            batch: List[str] = []
+            for item in items:
+                if isinstance(item, str):
+                    batch.append(item)
+                    continue
+                
+                # Commands apply in order with the text around them
+                self._write(sinks, batch)
+                batch = []
+                if item is None:
+                    running = False
+                    break
+                command, entry = item
+                if command == 'add':
+                    sinks.append(entry)
+                elif command == 'marker':
+                    self._mark(sinks, entry)
+                else:
+                    for removed in [s for s in sinks if s[0] is entry or s[0] == entry]:
+                        sinks.remove(removed)
+                        self._close(removed)
+            self._write(sinks, batch)
+        
+        for entry in sinks:
+            self._close(entry)
+    
+    def _write(self, sinks: List[Tuple[Any, Any, bool, bool]], batch: List[str]) -> None:
+        """Write one batch to every sink"""
+        if not batch or not sinks:
+            return
+        text = "".join(batch)
+        stripped = None
+        for sink, stream, strip_ansi, _ in sinks:
+            try:
+                if strip_ansi:
+                    if stripped is None:
+                        stripped = _ANSI_ESCAPE_RE.sub('', text)
+                    stream.write(stripped)
+                else:
+                    stream.write(text)
+                stream.flush()
+            except Exception as e:
+                self._on_error(f"Error writing to sink {sink!r}: {e}")
+    
+    def _mark(self, sinks: List[Tuple[Any, Any, bool, bool]], label: str) -> None:
+        """Hand a marker to the sinks that take them"""
+        for sink, stream, _, _ in sinks:
+            marker = getattr(stream, 'marker', None)
+            if marker is None:
+                continue
+            try:
+                marker(label)
+            except Exception as e:
+                self._on_error(f"Error writing to sink {sink!r}: {e}")
+    
+    def _close(self, entry: Tuple[Any, Any, bool, bool]) -> None:
+        """Flush a sink, closing it if it was opened from a path"""
+        sink, stream, _, owned = entry
+        try:
+            if owned:
+                stream.close()
+            else:
+                stream.flush()
+        except Exception as e:
+            self._on_error(f"Error closing sink {sink!r}: {e}")
+
+
+class _Recorder:
+    """Writes output chunks and input lines as asciicast v2 events with monotonic timestamps"""
+    
+    def __init__(self, path: str, width: int, height: int, title: str,
+                 on_error: Callable[[str], None]) -> None:
+        self._file = open(path, 'w', encoding='utf-8')
+        self._writer = _SinkWriter(on_error)
+        self._writer.add(self._file, strip_ansi=False)
+        self._start = time.monotonic()
+        header = {
+            "version": 2,
+            "width": width,
+            "height": height,
+            "timestamp": int(time.time()),
+            "title": title,
+            "env": {"TERM": "xterm-256color"},
+        }
+        self._writer.write(json.dumps(header) + "\n")
+    
+    def _event(self, code: str, data: str) -> None:
+        """Queue one event line; the file is written by the writer thread"""
+        elapsed = round(time.monotonic() - self._start, 6)
+        self._writer.write(json.dumps([elapsed, code, data]) + "\n")
+    
+    def output(self, text: str) -> None:
+        """Record an output chunk (terminal newlines, so players render it correctly)"""
+        self._event("o", text.replace("\n", "\r\n"))
+    
+    def input(self, text: str) -> None:
+        """Record a submitted input line"""
+        self._event("i", text)
+    
+    def marker(self, label: str) -> None:
+        """Record a non-output action such as clear"""
+        self._event("m", label)
+    
+    def close(self) -> None:
+        """Flush pending events and close the file"""
+        self._writer.close()
+        self._file.close()
+
+
+class ScriptedInput:
+    """Answers user_type_in/user_write from a file, an iterable or a callable
+    
+    Iterables may yield plain lines or (line, delay) pairs; a callable is called with
+    the prompt and returns the line, or None when it has nothing more to say. The time
+    between handing out one line and the next prompt is kept in latencies, which is the
+    per-turn processing time of the application being driven.
+    """
+    
+    def __init__(self, source: Any, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.latencies: List[float] = []
+        self.lines_sent = 0
+        self.exhausted = False
+        self._last_answer: Optional[float] = None
+        self._file = None
+        self._callable: Optional[Callable[[str], Optional[str]]] = None
+        self._iterator = None
+        
+        if isinstance(source, (str, os.PathLike)):
+            self._file = open(source, 'r', encoding='utf-8')
+            self._iterator = iter(self._file)
+        elif callable(source):
+            self._callable = source
+        else:
+            self._iterator = iter(source)
+    
+    def next_line(self, prompt: str = "") -> Optional[str]:
+        """Next scripted line for prompt, or None once the script is exhausted"""
+        if self.exhausted:
+            return None
+        if self._last_answer is not None:
+            self.latencies.append(time.perf_counter() - self._last_answer)
+        
+        delay = self.delay
+        if self._callable is not None:
+            item = self._callable(prompt)
+        else:
+            item = next(self._iterator, None)
+        if isinstance(item, tuple):
+            item, delay = item
+        if item is None:
+            self.close()
+            return None
+        
+        if delay:
+            time.sleep(delay)
+        self.lines_sent += 1
+        self._last_answer = time.perf_counter()
+        return str(item).rstrip("\r\n")
+    
+    def close(self) -> None:
+        """Stop answering; interactive input takes over"""
+        self.exhausted = True
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _Histogram:
+    """Latency histogram with power-of-two microsecond buckets; adding a sample is O(1)"""
+    
+    BUCKETS = 32
+    
+    def __init__(self) -> None:
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def add(self, seconds: float) -> None:
+        """Record one sample"""
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.counts[min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)] += 1
+    
+    def summary(self) -> Dict[str, Any]:
+        """Count, mean, percentiles (bucket upper bounds) and max, in milliseconds"""
+        result: Dict[str, Any] = {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+        }
+        buckets = [(min(2 ** bucket / 1000, self.max * 1000), count)
+                   for bucket, count in enumerate(self.counts) if count]
+        for name, fraction in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+            result[name] = 0.0
+            seen = 0
+            for upper, count in buckets:
+                seen += count
+                if seen >= fraction * self.count:
+                    result[name] = upper
+                    break
+        result["buckets"] = buckets
+        return result
+
+
+class _Metrics:
+    """Counters and histograms for the output path, cheap enough to leave always on
+    
+    Producers call submit() from any thread; everything else runs on the Tk thread.
+    Throughput is counted in characters and averaged over the last RATE_WINDOW seconds.
+    """
+    
+    RATE_WINDOW = 5
+    
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self._sequence = itertools.count(1)
+        self.submitted = 0
+        self.delivered = 0
+        self.max_queue_depth = 0
+        self.lines = 0
+        self.chars = 0
+        self.latency = _Histogram()
+        self.parse = _Histogram()
+        self.insert = _Histogram()
+        self.loop_lag = _Histogram()
+        self._second = int(self.started)
+        self._current = [0, 0]
+        self._recent: List[Tuple[int, int]] = []
+    
+    def submit(self) -> None:
+        """Count one update queued for the Tk thread"""
+        self.submitted = next(self._sequence)
+    
+    def deliver(self, called: float) -> None:
+        """Count one update applied on the Tk thread, called at perf_counter() time called"""
+        self.delivered += 1
+        self.latency.add(time.perf_counter() - called)
+        depth = self.submitted - self.delivered
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+    
+    def output(self, lines: int, chars: int) -> None:
+        """Count output added to the history"""
+        self.lines += lines
+        self.chars += chars
+        second = int(time.perf_counter())
+        if second != self._second:
+            # Close the current second, plus empty ones for any idle gap
+            self._recent.append((self._current[0], self._current[1]))
+            self._recent.extend([(0, 0)] * min(second - self._second - 1, self.RATE_WINDOW))
+            del self._recent[:-self.RATE_WINDOW]
+            self._current = [0, 0]
+            self._second = second
+        self._current[0] += lines
+        self._current[1] += chars
+    
+    def rates(self) -> Tuple[float, float]:
+        """Lines and characters per second over the last few complete seconds"""
+        now = time.perf_counter()
+        recent = list(self._recent)
+        second = int(now)
+        if second > self._second:
+            recent.append((self._current[0], self._current[1]))
+            recent.extend([(0, 0)] * min(second - self._second - 1, self.RATE_WINDOW))
+        recent = recent[-self.RATE_WINDOW:]
+        if not recent:
+            # Still inside the first second of output
+            elapsed = max(now - self.started, 1e-3)
+            return self._current[0] / elapsed, self._current[1] / elapsed
+        return (sum(lines for lines, _ in recent) / len(recent),
+                sum(chars for _, chars in recent) / len(recent))
+
+
+class _Watchdog:
+    """Event-loop heartbeat plus a thread that logs the Tk thread's stack when beats stop
+    
+    The heartbeat is an after() callback that records how late it ran (loop lag). When no
+    beat has run for interval + threshold seconds the watchdog thread reports a stall with
+    the Tk thread's current stack, taken from sys._current_frames, and logs again with the
+    total duration once the loop recovers.
+    """
+    
+    def __init__(self, root: tk.Misc, threshold: float, interval: float, log: Any,
+                 lag: _Histogram, on_error: Callable[[str], None]) -> None:
+        self.root = root
+        self.threshold = threshold
+        self.interval = interval
+        self.lag = lag
+        self.stalls = 0
+        self.longest = 0.0
+        self._on_error = on_error
+        if isinstance(log, (str, os.PathLike)):
+            self._log = open(log, 'a', encoding='utf-8')
+            self._owned = True
+        else:
+            self._log = log if log is not None else sys.stderr
+            self._owned = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._tk_thread: Optional[int] = None
+        self._last_beat: Optional[float] = None
+        self._expected: Optional[float] = None
+        self._after_id: Optional[str] = None
+    
+    def start(self) -> None:
+        """Schedule the first beat and start the watchdog thread"""
+        self._after_id = self.root.after(0, self._beat)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="py2gui-watchdog")
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop beating and watching; closes the log if it was opened from a path"""
+        self._stop.set()
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except tk.TclError:
+                pass  # Window already destroyed
+        if self._thread is not None:
+            self._thread.join(self.interval * 4)
+            self._thread = None
+        if self._owned:
+            self._log.close()
+    
+    def _beat(self) -> None:
+        """Heartbeat: record lag against the scheduled time and reschedule (Tk thread)"""
+        now = time.perf_counter()
+        if self._expected is not None:
+            self.lag.add(max(now - self._expected, 0.0))
+        self._tk_thread = threading.get_ident()
+        self._last_beat = now
+        if not self._stop.is_set():
+            self._expected = now + self.interval
+            self._after_id = self.root.after(int(self.interval * 1000), self._beat)
+    
+    def _run(self) -> None:
+        """Watchdog loop: report a stall once per missed heartbeat"""
+        stalled_beat: Optional[float] = None
+        while not self._stop.wait(self.interval):
+            last = self._last_beat
+            if last is None:
+                # The event loop has not started yet
+                continue
+            if stalled_beat is not None and last != stalled_beat:
+                # Beats resumed: the stall lasted until the first late beat
+                duration = last - stalled_beat - self.interval
+                self.longest = max(self.longest, duration)
+                self._write(f"GUI thread resumed after {duration:.3f} s\n")
+                stalled_beat = None
+            blocked = time.perf_counter() - last - self.interval
+            if stalled_beat is None and blocked >= self.threshold:
+                stalled_beat = last
+                self.stalls += 1
+                self._report(blocked)
+    
+    def _report(self, blocked: float) -> None:
+        """Log the Tk thread's stack as it is right now"""
+        frame = sys._current_frames().get(self._tk_thread) if self._tk_thread is not None else None
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "  (stack unavailable)\n"
+        self._write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} GUI thread stalled for "
+                    f"{blocked:.3f} s, stack:\n{stack}")
+    
+    def _write(self, text: str) -> None:
+        """Write and flush one report"""
+        try:
+            self._log.write(text)
+            self._log.flush()
+        except (OSError, ValueError) as e:
+            self._on_error(f"Error writing stall report: {e}")
+
+
+class _Tracer:
+    """Timed spans in a preallocated ring buffer, written out as Chrome trace-event JSON
+    
+    span() may be called from any thread: slots come from an itertools counter and each
+    field is a single list store, so recording takes no lock and allocates nothing
+    beyond the floats themselves. Once the buffer is full the oldest spans are dropped.
+    """
+    
+    def __init__(self, capacity: int = _TRACE_CAPACITY) -> None:
+        self.capacity = capacity
+        self.origin = time.perf_counter()
+        self.recorded = 0
+        self._slots = itertools.count()
+        self._names: List[Optional[str]] = [None] * capacity
+        self._categories: List[Optional[str]] = [None] * capacity
+        self._threads = [0] * capacity
+        self._starts = [0.0] * capacity
+        self._ends = [0.0] * capacity
+        self._thread_names: Dict[int, str] = {}
+    
+    def span(self, name: str, category: str, start: float, end: float) -> None:
+        """Record one span between two perf_counter() times on the calling thread"""
+        slot = next(self._slots)
+        self.recorded = slot + 1
+        slot %= self.capacity
+        self._names[slot] = name
+        self._categories[slot] = category
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            # Named now, since the thread may be gone when the trace is written
+            self._thread_names[tid] = threading.current_thread().name
+        self._threads[slot] = tid
+        self._starts[slot] = start
+        self._ends[slot] = end
+    
+    def events(self) -> List[Dict[str, Any]]:
+        """Trace events for the spans still in the buffer, oldest first, plus thread names"""
+        pid = os.getpid()
+        count = min(self.recorded, self.capacity)
+        first = self.recorded - count
+        events: List[Dict[str, Any]] = []
+        threads: Set[int] = set()
+        for index in range(first, first + count):
+            slot = index % self.capacity
+            if self._names[slot] is None:
+                continue
+            tid = self._threads[slot]
+            threads.add(tid)
+            events.append({
+                "name": self._names[slot],
+                "cat": self._categories[slot],
+                "ph": "X",
+                "ts": (self._starts[slot] - self.origin) * 1e6,
+                "dur": (self._ends[slot] - self._starts[slot]) * 1e6,
+                "pid": pid,
+                "tid": tid,
+            })
+        for tid in sorted(threads):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                           "args": {"name": self._thread_names.get(tid, f"thread {tid}")}})
+        return events
+    
+    def write(self, path: str) -> int:
+        """Write the buffer as a trace file; returns the number of spans written"""
+        events = self.events()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"dropped_spans": max(self.recorded - self.capacity, 0)}}, f)
+        return sum(1 for event in events if event["ph"] == "X")
+
+
+class _TclCounter:
+    """Stands in for the Tk interpreter, counting and timing call()/eval() per Py2GUI method
+    
+    A Tcl call is charged to the innermost public Py2GUI method on the calling stack
+    (closures count as the method that created them), else to the outermost private
+    one such as _flush_autoscroll, else to "(tk)" for calls made by tkinter itself.
+    """
+    
+    def __init__(self, tkapp: Any, operations: Dict[Any, str]) -> None:
+        self.tkapp = tkapp
+        self.active = True
+        self.stats: Dict[str, List[float]] = {}
+        self.commands: Dict[str, Dict[str, int]] = {}
+        self._operations = operations
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.tkapp, name)
+    
+    def call(self, *args: Any) -> Any:
+        if not self.active:
+            return self.tkapp.call(*args)
+        start = time.perf_counter()
+        try:
+            return self.tkapp.call(*args)
+        finally:
+            self._count(sys._getframe(1), args, time.perf_counter() - start)
+    
+    def eval(self, script: str) -> Any:
+        if not self.active:
+            return self.tkapp.eval(script)
+        start = time.perf_counter()
+        try:
+            return self.tkapp.eval(script)
+        finally:
+            self._count(sys._getframe(1), ("eval",), time.perf_counter() - start)
+    
+    def _count(self, frame: Any, args: Tuple[Any, ...], elapsed: float) -> None:
+        """Charge one call to the operation that made it"""
+        operation = "(tk)"
+        while frame is not None:
+            name = self._operations.get(frame.f_code)
+            if name is not None:
+                if not name.startswith('_'):
+                    operation = name
+                    break
+                operation = name
+            frame = frame.f_back
+        
+        if len(args) == 1 and isinstance(args[0], tuple):
+            # tkinter sometimes passes the whole command as one tuple
+            args = args[0]
+        command = str(args[0]) if args else "?"
+        if command.startswith('.') and len(args) > 1:
+            # Widget command: the subcommand says more than the widget path
+            command = str(args[1])
+        
+        entry = self.stats.setdefault(operation, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+        commands = self.commands.setdefault(operation, {})
+        commands[command] = commands.get(command, 0) + 1
+    
+    @staticmethod
+    def operations_of(cls: type) -> Dict[Any, str]:
+        """Map the code of every method of cls, and of closures inside them, to the method name"""
+        operations: Dict[Any, str] = {}
+        for klass in cls.__mro__:
+            for name, value in vars(klass).items():
+                code = getattr(getattr(value, '__func__', value), '__code__', None)
+                stack = [code] if code is not None else []
+                while stack:
+                    code = stack.pop()
+                    operations.setdefault(code, name)
+                    stack.extend(const for const in code.co_consts if isinstance(const, type(code)))
+        return operations
+
+
+class _TclFanout:
+    """Stands in for the shared root's interpreter while any window counts Tcl calls
+    
+    The calls every window makes through the root (after() callbacks and the render
+    scheduler's drains) are charged to each window counting at the time.
+    """
+    
+    def __init__(self, tkapp: Any) -> None:
+        self.tkapp = tkapp
+        self.counters: List[_TclCounter] = []
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.tkapp, name)
+    
+    def call(self, *args: Any) -> Any:
+        if not self.counters:
+            return self.tkapp.call(*args)
+        start = time.perf_counter()
+        try:
+            return self.tkapp.call(*args)
+        finally:
+            self._count(sys._getframe(1), args, time.perf_counter() - start)
+    
+    def eval(self, script: str) -> Any:
+        if not self.counters:
+            return self.tkapp.eval(script)
+        start = time.perf_counter()
+        try:
+            return self.tkapp.eval(script)
+        finally:
+            self._count(sys._getframe(1), ("eval",), time.perf_counter() - start)
+    
+    def _count(self, frame: Any, args: Tuple[Any, ...], elapsed: float) -> None:
+        for counter in self.counters:
+            counter._count(frame, args, elapsed)
+
+
+class _Sampler:
+    """Sampling profiler for named threads, saved as one pstats file per thread
+    
+    A background thread reads the sampled threads' stacks from sys._current_frames every
+    interval seconds, so it can be switched on and off from any thread and costs the
+    profiled code nothing. Each sample is weighted by the real time since the previous
+    one; in the saved stats "calls" are sample counts. Samples of the Tk thread idling
+    in mainloop are left out.
+    """
+    
+    def __init__(self, threads: Dict[str, int], interval: float = _PROFILE_INTERVAL) -> None:
+        self.threads = threads
+        self.interval = interval
+        self.samples = 0
+        self._stats: Dict[str, Dict[Tuple[str, int, str], List[Any]]] = {label: {} for label in threads}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Start sampling"""
+        self._thread = threading.Thread(target=self._run, daemon=True, name="py2gui-profiler")
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop sampling"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+    
+    def _run(self) -> None:
+        """Sampler loop"""
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            frames = sys._current_frames()
+            for label, ident in self.threads.items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    self._sample(self._stats[label], frame, weight)
+            self.samples += 1
+    
+    @staticmethod
+    def _sample(stats: Dict[Tuple[str, int, str], List[Any]], frame: Any, weight: float) -> None:
+        """Add one stack: self time to the leaf, inclusive time and a caller edge up the stack"""
+        code = frame.f_code
+        if code.co_name == 'mainloop' and os.path.basename(os.path.dirname(code.co_filename)) == 'tkinter':
+            return  # Idle event loop
+        seen: Set[Tuple[str, int, str]] = set()
+        callee: Optional[List[Any]] = None
+        leaf = True
+        while frame is not None:
+            code = frame.f_code
+            func = (code.co_filename, code.co_firstlineno, code.co_name)
+            entry = stats.get(func)
+            if entry is None:
+                # samples, self seconds, inclusive seconds, callers
+                entry = stats[func] = [0, 0.0, 0.0, {}]
+            if leaf:
+                entry[1] += weight
+                leaf = False
+            if func not in seen:
+                # Recursion counts once per sample
+                seen.add(func)
+                entry[0] += 1
+                entry[2] += weight
+            if callee is not None:
+                callers = callee[3]
+                count, total = callers.get(func, (0, 0.0))
+                callers[func] = (count + 1, total + weight)
+            callee = entry
+            frame = frame.f_back
+    
+    def write(self, label: str, path: str) -> None:
+        """Save one thread's samples in the marshalled format pstats.Stats loads"""
+        stats = {}
+        for func, (samples, self_time, total_time, callers) in list(self._stats[label].items()):
+            stats[func] = (samples, samples, self_time, total_time,
+                           {caller: (count, count, 0.0, total) for caller, (count, total) in callers.items()})
+        with open(path, 'wb') as f:
+            marshal.dump(stats, f)
+
+
+class _Config:
+    """Validated settings from the config file, with the disabled_* lists as frozensets
+    
+    Dict-style access (config["disabled_colors"]) still works as it did on the raw dict;
+    assigning a key that way validates it too.
+    """
+    
+    SETS = ("disabled_menus", "disabled_views", "disabled_colors")
+    FLAGS = ("show_clear_button", "show_demo_button")
+    
+    def __init__(self, data: Optional[Dict[str, Any]] = None, base_dir: str = ".") -> None:
+        # Theme files named in the config are relative to its directory
+        self.base_dir = base_dir
+        self.disabled_menus: FrozenSet[str] = frozenset()
+        self.disabled_views: FrozenSet[str] = frozenset()
+        self.disabled_colors: FrozenSet[str] = frozenset()
+        self.show_clear_button = True
+        self.show_demo_button = True
+        self.theme: Optional[str] = None
+        self.themes: Dict[str, Dict[str, Any]] = {}
+        # Keys this version does not know, kept as given
+        self.extra: Dict[str, Any] = {}
+        for key, value in (data or {}).items():
+            self[key] = value
+    
+    @classmethod
+    def from_file(cls, path: str) -> "_Config":
+        """Read and validate a config file; raises OSError or ValueError saying what is wrong"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"expected a JSON object, not {type(data).__name__}")
+        return cls(data, os.path.dirname(os.path.abspath(path)))
+    
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self.SETS:
+            if not isinstance(value, (list, tuple, set, frozenset)):
+                raise ValueError(f"{key} must be a list of strings, not {value!r}")
+            # Color codes may be written as numbers
+            setattr(self, key, frozenset(str(item) for item in value))
+        elif key in self.FLAGS:
+            if not isinstance(value, bool):
+                raise ValueError(f"{key} must be true or false, not {value!r}")
+            setattr(self, key, value)
+        elif key == "theme":
+            if value is not None and not isinstance(value, str):
+                raise ValueError(f"theme must be a theme name, not {value!r}")
+            self.theme = value
+        elif key == "themes":
+            if not isinstance(value, dict):
+                raise ValueError(f"themes must map theme names to themes or theme files, not {value!r}")
+            self.themes = {}
+            for name, theme in value.items():
+                if isinstance(theme, str):
+                    theme = self._read_theme(theme)
+                self.themes[name] = _validate_theme(name, theme)
+        else:
+            self.extra[key] = value
+    
+    def _read_theme(self, path: str) -> Any:
+        """Load a theme file named in the config"""
+        try:
+            with open(os.path.join(self.base_dir, path), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"theme file {path}: {e}") from e
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in self.SETS:
+            return sorted(getattr(self, key))
+        if key in self.FLAGS or key in ("theme", "themes"):
+            return getattr(self, key)
+        return self.extra[key]
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.SETS or key in self.FLAGS or key in ("theme", "themes") or key in self.extra
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+
+class _Window(tk.Toplevel):
+    """Toplevel holding one Py2GUI window on the shared Tk root
+    
+    after() and after_idle() callbacks are registered on the root rather than on this
+    window, and ones still pending when the window is destroyed are skipped, instead of
+    firing as Tcl commands that were deleted with it.
+    """
+    
+    def __init__(self, master: tk.Tk) -> None:
+        super().__init__(master)
+        self.closed = False
+    
+    def destroy(self) -> None:
+        self.closed = True
+        super().destroy()
+    
+    def after(self, ms: Any, func: Optional[Callable] = None, *args: Any) -> Any:
+        if func is None:
+            return super().after(ms)
+        
+        def _call():
+            if not self.closed:
+                func(*args)
+        
+        return self.master.after(ms, _call)
+    
+    def after_idle(self, func: Callable, *args: Any) -> Any:
+        def _call():
+            if not self.closed:
+                func(*args)
+        
+        return self.master.after_idle(_call)
+    
+    def after_cancel(self, id: str) -> None:
+        self.master.after_cancel(id)
+
+
+class _RenderScheduler:
+    """One FIFO of Tk-thread calls for every window on the shared root
+    
+    Thread-safe methods queue their updates here instead of each making its own after()
+    call; the first call into an empty queue schedules a single drain, and everything
+    queued until it runs is handled in that one callback. Calls for closed windows are
+    dropped.
+    """
+    
+    def __init__(self, root: tk.Tk) -> None:
+        self.root = root
+        self._calls: Deque[Tuple[Any, Callable[[], None]]] = collections.deque()
+        self._lock = threading.Lock()
+        self._scheduled = False
+    
+    def submit(self, gui: Any, call: Callable[[], None]) -> None:
+        """Queue call to run on the Tk thread while gui is open (any thread)"""
+        with self._lock:
+            self._calls.append((gui, call))
+            if self._scheduled:
+                return
+            self._scheduled = True
+        # Outside the lock: from another thread this waits for the Tk thread
+        try:
+            self.root.after(0, self._drain)
+        except (tk.TclError, RuntimeError):
+            pass  # Root already destroyed
+    
+    def _drain(self) -> None:
+        """Run the calls queued so far, in order (Tk thread)
+        
+        Calls are taken one at a time, so a nested event loop (a modal dialog) that
+        drains again continues from the same queue; later calls wait for the next drain.
+        """
+        with self._lock:
+            count = len(self._calls)
+            self._scheduled = False
+        for _ in range(count):
+            with self._lock:
+                if not self._calls:
+                    break
+                gui, call = self._calls.popleft()
+            if not gui.running:
+                continue
+            try:
+                call()
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+
+
+# The hidden Tk root shared by all windows, with its scheduler and open windows
+_tk_root: Optional[tk.Tk] = None
+_scheduler: Optional[_RenderScheduler] = None
+_windows: List[Any] = []
+
+def _open_window(gui: Any) -> Tuple[_Window, _RenderScheduler]:
+    """A new Toplevel for gui, creating the shared root with the first window"""
+    global _tk_root, _scheduler
+    if _tk_root is None:
+        _tk_root = tk.Tk()
+        _tk_root.withdraw()
+        _scheduler = _RenderScheduler(_tk_root)
+    window = _Window(_tk_root)
+    _windows.append(gui)
+    return window, _scheduler
+
+def _count_shared_calls(counter: _TclCounter) -> None:
+    """Also charge calls made through the shared root to counter; the first one wraps it"""
+    if _tk_root is None:
+        return
+    fanout = _tk_root.tk
+    if not isinstance(fanout, _TclFanout):
+        fanout = _tk_root.tk = _TclFanout(_tk_root.tk)
+    fanout.counters.append(counter)
+
+def _uncount_shared_calls(counter: _TclCounter) -> None:
+    """Stop charging shared calls to counter; the last one restores the root's interpreter"""
+    if _tk_root is None or not isinstance(_tk_root.tk, _TclFanout):
+        return
+    fanout = _tk_root.tk
+    if counter in fanout.counters:
+        fanout.counters.remove(counter)
+    if fanout.counters:
+        return
+    # Widgets and variables created meanwhile took the wrapper from the root
+    widgets: List[Any] = [_tk_root]
+    while widgets:
+        widget = widgets.pop()
+        if widget.tk is fanout:
+            widget.tk = fanout.tkapp
+        widgets.extend(widget.children.values())
+    for gui in _windows:
+        for value in vars(gui).values():
+            if isinstance(value, tk.Variable) and value._tk is fanout:
+                value._tk = fanout.tkapp
+
+def _close_all_windows() -> None:
+    """Close every open window, which also ends the event loop"""
+    for gui in list(_windows):
+        gui.exit()
+
+def _close_window(gui: Any) -> None:
+    """Forget gui; closing the last window ends the event loop and destroys the root"""
+    global _tk_root, _scheduler
+    if gui in _windows:
+        _windows.remove(gui)
+    if _windows or _tk_root is None:
+        return
+    root, _tk_root, _scheduler = _tk_root, None, None
+    try:
+        root.quit()
+        root.destroy()
+    except tk.TclError:
+        pass  # Already destroyed
+
+
 class Py2GUI:
-    def __init__(self, title: str = "Py2GUI", width: int = 80, height: int = 20, config_file: str = "config.json"):
+    def __init__(self, title: str = "Py2GUI", width: int = 80, height: int = 20, config_file: str = "config.json",
+                 wrap: str = "word", max_line_length: Optional[int] = None, long_lines: str = "truncate",
+                 sinks: Optional[List[Any]] = None, record: Optional[str] = None,
+                 input_source: Any = None, max_lines: Optional[int] = None):
         """Initialize Py2GUI instance"""
-        self.root = tk.Tk()
+        if wrap not in _WRAP_MODES:
+            raise ValueError(f"wrap must be one of {_WRAP_MODES}, not {wrap!r}")
+        if long_lines not in _LONG_LINE_MODES:
+            raise ValueError(f"long_lines must be one of {_LONG_LINE_MODES}, not {long_lines!r}")
+        if max_lines is not None and max_lines < 1:
+            raise ValueError(f"max_lines must be at least 1, not {max_lines!r}")
+        started = time.perf_counter()
+        # Each window is a Toplevel on one hidden Tk root and event loop
+        self.root, self._scheduler = _open_window(self)
         self.root.title(title)
+        self.title = title
         self.root.resizable(True, True)
         self.width = width
         self.height = height
         self.running = True
         self.config_file = config_file
+        # Pending config file check, scheduled only while the file exists
+        self._config_watch: Optional[str] = None
         
         # Load configuration
         self.config = self._load_config()
         
         # Extended ANSI color configuration
-        self.ansi_colors = {
-            # Basic colors
-            '30': '#000000',        # Black
-            '31': '#ff0000',        # Red
-            '32': '#00ff00',        # Green
-            '33': '#ffff00',        # Yellow
-            '34': '#0000ff',        # Blue
-            '35': '#ff00ff',        # Magenta
-            '36': '#00ffff',        # Cyan
-            '37': '#ffffff',        # White
-            
-            # Bright colors
-            '90': '#808080',        # Gray
-            '91': '#ff8080',        # Bright red
-            '92': '#80ff80',        # Bright green
-            '93': '#ffff80',        # Bright yellow
-            '94': '#8080ff',        # Bright blue
-            '95': '#ff80ff',        # Bright magenta
-            '96': '#80ffff',        # Bright cyan
-            '97': '#ffffff',        # Bright white
-            
-            # Background colors
-            '40': '#1a1a1a',        # Black background
-            '41': '#ff0000',        # Red background
-            '42': '#00ff00',        # Green background
-            '43': '#ffff00',        # Yellow background
-            '44': '#0000ff',        # Blue background
-            '45': '#ff00ff',        # Magenta background
-            '46': '#00ffff',        # Cyan background
-            '47': '#ffffff',        # White background
-            
-            # Extended 256 colors
-            '38;5;0': '#000000',    # Black
-            '38;5;1': '#800000',    # Dark red
-            '38;5;2': '#008000',    # Dark green
-            '38;5;3': '#808000',    # Dark yellow
-            '38;5;4': '#000080',    # Dark blue
-            '38;5;5': '#800080',    # Dark magenta
-            '38;5;6': '#008080',    # Dark cyan
-            '38;5;7': '#c0c0c0',    # Light gray
-            '38;5;8': '#808080',    # Dark gray
-            '38;5;9': '#ff0000',    # Red
-            '38;5;10': '#00ff00',   # Green
-            '38;5;11': '#ffff00',   # Yellow
-            '38;5;12': '#0000ff',   # Blue
-            '38;5;13': '#ff00ff',   # Magenta
-            '38;5;14': '#00ffff',   # Cyan
-            '38;5;15': '#ffffff',   # White
-            
-            # Extended background colors
-            '48;5;0': '#000000',    # Black background
-            '48;5;1': '#800000',    # Dark red background
-            '48;5;2': '#008000',    # Dark green background
-            '48;5;3': '#808000',    # Dark yellow background
-            '48;5;4': '#000080',    # Dark blue background
-            '48;5;5': '#800080',    # Dark magenta background
-            '48;5;6': '#008080',    # Dark cyan background
-            '48;5;7': '#c0c0c0',    # Light gray background
-            
-            # True Color support
-            '38;2;0;0;0': '#000000',    # Black
-            '38;2;255;0;0': '#ff0000',  # Red
-            '38;2;0;255;0': '#00ff00',  # Green
-            '38;2;0;0;255': '#0000ff',  # Blue
-        }
+        self.ansi_colors = dict(_ANSI_COLORS)
         
         # Color name to hex mapping
         self.color_name_to_hex = {
@@ -122,12 +1476,8 @@ class Py2GUI:
             'light gray': '#c0c0c0',
         }
         
-        # Available fonts
-        try:
-            self.available_fonts = font.families()
-        except Exception:
-            self.available_fonts = ["Courier", "Consolas", "Monaco", "Menlo"]
-            warnings.warn(f"Could not load font families, using fallback fonts: {self.available_fonts}")
+        # Available fonts, enumerated on first use of available_fonts
+        self._available_fonts: Optional[Any] = None
         
         # Current text style state
         self.current_style = {
@@ -141,56 +1491,164 @@ class Py2GUI:
         # Defined text tags
         self.tag_names: Set[str] = set()
         
-        # Handle window close
-        self.root.protocol("WM_DELETE_WINDOW", self.exit)
+        # Frame mode state: last rendered frame, the text line it starts on and the
+        # escape-driven screen
+        self._frame_lines: Optional[List[Tuple[Run, ...]]] = None
+        self._frame_top = 1
+        self._screen: Optional[List[List[Run]]] = None
+        self._screen_row = 0
+        self._screen_col = 0
+        self._screen_pending = False
         
-        # Main frame
-        self.main_frame = Frame(self.root)
-        self.main_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # Autoscroll state: follow output only while the view is at the bottom
+        self.scroll_lock = False
+        self._scroll_pending = False
+        self._follow_output = True
+        self._pending_lines = 0
+        self._unseen_lines = 0
         
-        # Output area
-        self.text_area = scrolledtext.ScrolledText(
-            self.main_frame,
-            wrap=tk.WORD,
-            width=width,
-            height=height,
-            font=("Courier", 10),
-            bg="black",
+        # Long-line handling: lines past max_line_length are truncated or folded
+        self.wrap = wrap
+        self.max_line_length = max_line_length
+        self.long_lines = long_lines
+        self._line_length = 0
+        self._truncated: Dict[str, List[Run]] = {}
+        self._open_truncation: Optional[str] = None
+        self._truncation_count = 0
+        
+        # Scrollback limit: the oldest lines are dropped once output passes max_lines
+        self.max_lines = max_lines
+        
+        # Searchable copy of the output and find bar state
+        self._line_index = _LineIndex()
+        self.find_frame: Optional[Frame] = None
+        self._find_visible = False
+        self._find_match: Optional[Tuple[int, int, int]] = None
+        self._find_pattern_cache: Tuple[Any, Optional[Pattern], Optional[Pattern]] = (None, None, None)
+        self._find_refresh_pending = False
+        
+        # Full styled history and the live filter applied to it
+        self._history = _LineStore()
+        self._filter_pattern: Optional[Pattern] = None
+        self._filter_matches = 0
+        
+        # Extra outputs (log files, stdout) served by a background writer
+        self._sink_writer = _SinkWriter(self._safe_print)
+        for sink in sinks or []:
+            self.add_sink(sink)
+        
+        # Endpoint for output from other processes (see listen())
+        self._listener: Optional[Any] = None
+        
+        # Browser mirror of the output, fed as a sink (see start_mirror())
+        self._mirror: Optional[Any] = None
+        
+        # Output path counters and latency histograms (see metrics())
+        self._metrics = _Metrics()
+        self._metrics_visible = False
+        self._watchdog: Optional[_Watchdog] = None
+        
+        # Opt-in timeline tracer (see start_trace())
+        self._tracer: Optional[_Tracer] = None
+        self._trace_path: Optional[str] = None
+        self._tcl_counter: Optional[_TclCounter] = None
+        
+        # Sampling profiler for the worker and Tk threads (see start_profile())
+        self._sampler: Optional[_Sampler] = None
+        self._profile_path: Optional[str] = None
+        self._tk_thread = threading.get_ident()
+        self._worker_thread: Optional[int] = None
+        
+        # Session recording (asciicast v2)
+        self._recorder: Optional[_Recorder] = None
+        if record:
+            self.start_recording(record, title)
+        
+        # Handle window close
+        self.root.protocol("WM_DELETE_WINDOW", self.exit)
+        
+        # Main frame
+        self.main_frame = Frame(self.root)
+        self.main_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        # Shared named fonts: all text uses one of these, so zooming reconfigures each
+        # font once and Tk updates every widget and tag that uses it
+        self._fonts: Dict[str, Tuple[font.Font, Tuple[str, int, str]]] = {}
+        self.zoom_level = 0
+        text_font = self._shared_font("default", "Courier", 10, "normal")
+        
+        # Output area
+        self.text_area = scrolledtext.ScrolledText(
+            self.main_frame,
+            wrap=wrap,
+            width=width,
+            height=height,
+            font=text_font,
+            bg="black",
             fg="white",
             insertbackground="white"
         )
         self.text_area.pack(padx=5, pady=5, fill=tk.BOTH, expand=True)
-        self.text_area.config(state=tk.DISABLED)
+        self.text_area.config(state=tk.DISABLED, yscrollcommand=self._on_text_scroll)
+        
+        # "N new lines" indicator shown while output arrives off-screen
+        self.new_lines_label = tk.Label(
+            self.text_area,
+            font=("Courier", 9),
+            fg="black",
+            bg="#ffff80",
+            cursor="hand2"
+        )
+        self.new_lines_label.bind('<Button-1>', lambda event: self._scroll_to_end())
+        
+        # Active filter indicator; clicking it clears the filter
+        self.filter_label = tk.Label(
+            self.text_area,
+            font=("Courier", 9),
+            fg="black",
+            bg="#80ffff",
+            cursor="hand2"
+        )
+        self.filter_label.bind('<Button-1>', lambda event: self.clear_filter())
+        
+        # Live performance metrics overlay (View > Performance Metrics)
+        self.metrics_label = tk.Label(
+            self.text_area,
+            font=("Courier", 9),
+            fg="#80ff80",
+            bg="#202020",
+            justify=tk.LEFT,
+            anchor=tk.W
+        )
+        
+        # Horizontal scrollbar, shown only when lines do not wrap
+        self.hbar = tk.Scrollbar(self.main_frame, orient=tk.HORIZONTAL, command=self.text_area.xview)
+        self.text_area.config(xscrollcommand=self.hbar.set)
+        if wrap == "none":
+            self.hbar.pack(fill=tk.X, padx=5, after=self.text_area.frame)
         
         # Configure default tag
         self.text_area.tag_configure("default", 
-            font=("Courier", 10, "normal"),
+            font=text_font,
             foreground="white",
             background="black"
         )
         
-        # Configure color tags
-        for code, color_hex in self.ansi_colors.items():
-            # Skip disabled colors
-            if 'disabled_colors' in self.config and code in self.config['disabled_colors']:
-                continue
-                
-            tag_name = f"ansi_{code}"
-            if (code.startswith('3') and ';' not in code) or code.startswith('38'):
-                # Foreground color
-                self.text_area.tag_configure(tag_name, foreground=color_hex)
-            elif code.startswith('4') or code.startswith('48'):
-                # Background color
-                self.text_area.tag_configure(tag_name, background=color_hex)
-            self.tag_names.add(tag_name)
+        # Color tags are configured on first use (see _create_ansi_tag)
         
         # Configure style tags
-        self.text_area.tag_configure("bold", font=("Courier", 10, "bold"))
-        self.text_area.tag_configure("italic", font=("Courier", 10, "italic"))
+        self.text_area.tag_configure("bold", font=self._shared_font("bold", "Courier", 10, "bold"))
+        self.text_area.tag_configure("italic", font=self._shared_font("italic", "Courier", 10, "italic"))
         self.text_area.tag_configure("underline", underline=True)
         self.text_area.tag_configure("strikethrough", overstrike=True)
         self.text_area.tag_configure("reverse", foreground="black", background="white")
         
+        # Marker left in place of the hidden part of an over-long line
+        self.text_area.tag_configure("truncated", foreground="#808080", underline=True)
+        self.text_area.tag_bind("truncated", "<Button-1>", self._expand_truncated)
+        self.text_area.tag_bind("truncated", "<Enter>", lambda event: self.text_area.config(cursor="hand2"))
+        self.text_area.tag_bind("truncated", "<Leave>", lambda event: self.text_area.config(cursor=""))
+        
         # Add style tags to tag set
         for tag in ["bold", "italic", "underline", "strikethrough", "reverse"]:
             self.tag_names.add(tag)
@@ -200,7 +1658,7 @@ class Py2GUI:
         self.input_frame.pack(fill=tk.X, padx=5, pady=5)
         
         # Input label
-        self.input_label = tk.Label(self.input_frame, text=">> ", font=("Courier", 10), fg="white", bg="black")
+        self.input_label = tk.Label(self.input_frame, text=">> ", font=text_font, fg="white", bg="black")
         self.input_label.pack(side=tk.LEFT, padx=(0, 5))
         
         # Terminal style input field
@@ -208,7 +1666,7 @@ class Py2GUI:
         self.input_entry = Entry(
             self.input_frame,
             textvariable=self.input_var,
-            font=("Courier", 10),
+            font=text_font,
             bg="black",
             fg="white",
             insertbackground="white"
@@ -228,37 +1686,137 @@ class Py2GUI:
         self.input_queue = queue.Queue()
         self.type_in_queue = queue.Queue()
         
+        # Optional scripted input that answers prompts without a human
+        self.input_source: Optional[ScriptedInput] = None
+        if input_source is not None:
+            self.set_input_source(input_source)
+        
         # Bind Enter key
         self.input_entry.bind('<Return>', self._on_enter_pressed)
         
+        # Scroll Lock key toggles following output
+        self.root.bind('<Scroll_Lock>', lambda event: self.set_scroll_lock(not self.scroll_lock))
+        
+        # Find bar
+        self.root.bind('<Control-f>', lambda event: self.show_find_bar())
+        self.root.bind('<F3>', lambda event: self.find_next())
+        self.root.bind('<Shift-F3>', lambda event: self.find_previous())
+        
+        # Zoom: Ctrl + / Ctrl - / Ctrl 0, also on the keypad
+        for sequence, steps in (('<Control-plus>', 1), ('<Control-equal>', 1), ('<Control-KP_Add>', 1),
+                                ('<Control-minus>', -1), ('<Control-KP_Subtract>', -1)):
+            self.root.bind(sequence, lambda event, steps=steps: self.zoom(steps))
+        self.root.bind('<Control-0>', lambda event: self.set_zoom(0))
+        
+        # Menu check marks, kept in step by the methods they stand for; the menu items
+        # showing them are built the first time a menu opens
+        self.wrap_var = StringVar(value=self.wrap)
+        self.scroll_lock_var = tk.BooleanVar(value=self.scroll_lock)
+        self.metrics_var = tk.BooleanVar(value=self._metrics_visible)
+        self.profile_var = tk.BooleanVar(value=self._sampler is not None)
+        
         # Create menus
         self._setup_menus()
+        
+        # Apply the configured theme, then watch the config file for edits
+        self.theme_name = "default"
+        self.theme = _complete_theme(_THEMES["default"])
+        self._apply_theme(self.config.theme or "default")
+        self._update_config_watch()
+        
+        # Startup timing: constructor time now, time to first paint once the output is drawn
+        self.startup_times: Dict[str, float] = {"init": time.perf_counter() - started}
+        self._started = started
+        self.text_area.bind('<Expose>', self._on_first_expose)
     
-    def _load_config(self) -> Dict[str, Any]:
-        """Load configuration from JSON file"""
-        default_config = {
-            "disabled_menus": [],
-            "disabled_views": [],
-            "disabled_colors": [],
-            "show_clear_button": True,
-            "show_demo_button": True
-        }
+    @property
+    def available_fonts(self) -> Any:
+        """Installed font families; enumerating them is slow on hosts with many fonts"""
+        if self._available_fonts is None:
+            try:
+                self._available_fonts = font.families()
+            except Exception:
+                self._available_fonts = ["Courier", "Consolas", "Monaco", "Menlo"]
+                warnings.warn(f"Could not load font families, using fallback fonts: {self._available_fonts}")
+        return self._available_fonts
+    
+    @available_fonts.setter
+    def available_fonts(self, fonts: Any) -> None:
+        self._available_fonts = fonts
+    
+    def _on_first_expose(self, event: tk.Event) -> None:
+        """Record time to first paint: the redraw runs at idle after the first Expose"""
+        self.text_area.unbind('<Expose>')
         
+        def _painted():
+            self.startup_times["first_paint"] = time.perf_counter() - self._started
+        
+        self.root.after_idle(_painted)
+    
+    def _load_config(self) -> _Config:
+        """Load and validate the config file; defaults if it is missing or invalid"""
+        self._config_mtime = self._config_file_mtime()
+        if self._config_mtime is not None:
+            try:
+                return _Config.from_file(self.config_file)
+            except (ValueError, OSError) as e:
+                self._safe_print(f"Error loading config file {self.config_file}: {e}")
+        return _Config()
+    
+    def _config_file_mtime(self) -> Optional[int]:
+        """Modification time of the config file, None if there is none"""
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    # Merge with default config
-                    for key, value in default_config.items():
-                        if key not in config:
-                            config[key] = value
-                    return config
-        except (json.JSONDecodeError, IOError, OSError) as e:
-            self._safe_print(f"Error loading config file: {e}")
-        except Exception as e:
-            self._safe_print(f"Unexpected error loading config: {e}")
+            return os.stat(self.config_file).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _watch_config(self) -> None:
+        """Reload the config file whenever its modification time changes (Tk thread)"""
+        self._config_watch = None
+        if not self.running:
+            return
+        if self._config_file_mtime() != self._config_mtime:
+            self._reload_config()
+        self._update_config_watch()
+    
+    def _update_config_watch(self) -> None:
+        """Poll the config file while it exists; once it is gone, until reload_config() finds it"""
+        if self._config_mtime is not None and self._config_watch is None:
+            self._config_watch = self.root.after(_CONFIG_POLL_MS, self._watch_config)
+    
+    def reload_config(self) -> None:
+        """Thread-safe: re-read the config file and apply it to the running window"""
+        if self.running:
+            self._call_soon(self._reload_config)
+    
+    def _reload_config(self) -> None:
+        """Apply changed colours, menus and theme; an invalid file keeps the current settings (Tk thread)"""
+        self._config_mtime = self._config_file_mtime()
+        self._update_config_watch()
+        try:
+            config = _Config.from_file(self.config_file) if self._config_mtime is not None else _Config()
+        except (ValueError, OSError) as e:
+            self._safe_print(f"Error reloading config file {self.config_file}, keeping current settings: {e}")
+            return
         
-        return default_config
+        old, self.config = self.config, config
+        try:
+            if config.disabled_colors != old.disabled_colors:
+                # Only the tags change: text already shown recolors without being redrawn
+                for tag in self.tag_names:
+                    if tag.startswith("ansi_"):
+                        self._configure_ansi_tag(tag[5:])
+            themes_changed = config.themes != old.themes
+            if (config.disabled_menus != old.disabled_menus or config.disabled_views != old.disabled_views
+                    or themes_changed):
+                self._setup_menus()
+            if config.theme is not None and config.theme != old.theme:
+                self._apply_theme(config.theme)
+            elif themes_changed:
+                self._apply_theme(self.theme_name)
+        except tk.TclError as e:
+            if self.running:
+                self._safe_print(f"Tkinter error applying config: {e}")
     
     def _safe_print(self, message: str) -> None:
         """Safely print message (for initialization and error handling)"""
@@ -268,123 +1826,96 @@ class Py2GUI:
             pass  # Ignore print errors
     
     def _setup_menus(self) -> None:
-        """Set up menu system"""
-        menubar = Menu(self.root)
+        """Set up the menu bar; each menu's items are built the first time it opens"""
+        old_menubar = getattr(self, 'menubar', None)
+        menubar = self.menubar = Menu(self.root)
         self.root.config(menu=menubar)
+        if old_menubar is not None:
+            # Rebuilt after a config reload
+            old_menubar.destroy()
         
-        # File menu
-        if 'disabled_menus' not in self.config or 'File' not in self.config['disabled_menus']:
-            file_menu = Menu(menubar, tearoff=0)
-            menubar.add_cascade(label="File", menu=file_menu)
-            file_menu.add_command(label="Exit", command=self.exit)
-        
-        # Edit menu
-        if 'disabled_menus' not in self.config or 'Edit' not in self.config['disabled_menus']:
-            edit_menu = Menu(menubar, tearoff=0)
-            menubar.add_cascade(label="Edit", menu=edit_menu)
-            edit_menu.add_command(label="Copy", command=self.copy_text)
-            edit_menu.add_command(label="Select All", command=self.select_all)
-        
-        # View menu
-        if 'disabled_menus' not in self.config or 'View' not in self.config['disabled_menus']:
-            view_menu = Menu(menubar, tearoff=0)
-            menubar.add_cascade(label="View", menu=view_menu)
-            
-            if 'disabled_views' not in self.config or 'Focus Input' not in self.config['disabled_views']:
-                view_menu.add_command(label="Focus Input", command=self.focus_input)
-            
-            if 'disabled_views' not in self.config or 'Clear Output' not in self.config['disabled_views']:
-                view_menu.add_command(label="Clear Output", command=self.clear)
-            
-            if 'disabled_views' not in self.config or 'Demo ANSI Colors' not in self.config['disabled_views']:
-                view_menu.add_command(label="Demo ANSI Colors", command=self._demo_colors)
-        
-        # Colors menu
-        if 'disabled_menus' not in self.config or 'Colors' not in self.config['disabled_menus']:
-            colors_menu = Menu(menubar, tearoff=0)
-            menubar.add_cascade(label="Colors", menu=colors_menu)
-            colors_menu.add_command(label="Default Theme", command=lambda: self.set_theme("default"))
-            colors_menu.add_command(label="Dark Theme", command=lambda: self.set_theme("dark"))
-            colors_menu.add_command(label="Light Theme", command=lambda: self.set_theme("light"))
-            colors_menu.add_command(label="Green on Black", command=lambda: self.set_theme("matrix"))
+        menus = (
+            ("File", self._fill_file_menu),
+            ("Edit", self._fill_edit_menu),
+            ("View", self._fill_view_menu),
+            ("Colors", self._fill_colors_menu),
+            ("Debug", self._fill_debug_menu),
+        )
+        for label, fill in menus:
+            if label not in self.config.disabled_menus:
+                menu = Menu(menubar, tearoff=0)
+                menu.config(postcommand=lambda menu=menu, fill=fill: self._fill_menu(menu, fill))
+                menubar.add_cascade(label=label, menu=menu)
+    
+    def _fill_menu(self, menu: Menu, fill: Callable[[Menu], None]) -> None:
+        """Menu postcommand: add the items once, just before the menu is first shown"""
+        menu.config(postcommand="")
+        fill(menu)
+    
+    def _fill_file_menu(self, file_menu: Menu) -> None:
+        """File menu items"""
+        file_menu.add_command(label="Save Output As...", command=self._ask_export)
+        file_menu.add_separator()
+        file_menu.add_command(label="Exit", command=self.exit)
+    
+    def _fill_edit_menu(self, edit_menu: Menu) -> None:
+        """Edit menu items"""
+        edit_menu.add_command(label="Copy", command=self.copy_text)
+        edit_menu.add_command(label="Select All", command=self.select_all)
+        edit_menu.add_command(label="Find...", command=self.show_find_bar, accelerator="Ctrl+F")
+    
+    def _fill_view_menu(self, view_menu: Menu) -> None:
+        """View menu items, minus those listed in disabled_views"""
+        disabled_views = self.config.disabled_views
+        if 'Focus Input' not in disabled_views:
+            view_menu.add_command(label="Focus Input", command=self.focus_input)
+        
+        if 'Clear Output' not in disabled_views:
+            view_menu.add_command(label="Clear Output", command=self.clear)
+        
+        if 'Demo ANSI Colors' not in disabled_views:
+            view_menu.add_command(label="Demo ANSI Colors", command=self._demo_colors)
+        
+        if 'Filter Output' not in disabled_views:
+            view_menu.add_command(label="Filter Output...", command=self._ask_filter)
+            view_menu.add_command(label="Clear Filter", command=self.clear_filter)
+        
+        if 'Wrap' not in disabled_views:
+            wrap_menu = Menu(view_menu, tearoff=0)
+            view_menu.add_cascade(label="Wrap", menu=wrap_menu)
+            for label, mode in (("No Wrap", "none"), ("Wrap Characters", "char"), ("Wrap Words", "word")):
+                wrap_menu.add_radiobutton(label=label, value=mode, variable=self.wrap_var,
+                                          command=lambda mode=mode: self.set_wrap(mode))
+        
+        if 'Scroll Lock' not in disabled_views:
+            view_menu.add_checkbutton(label="Scroll Lock", variable=self.scroll_lock_var,
+                                      command=lambda: self.set_scroll_lock(self.scroll_lock_var.get()))
+        
+        if 'Zoom' not in disabled_views:
+            zoom_menu = Menu(view_menu, tearoff=0)
+            view_menu.add_cascade(label="Zoom", menu=zoom_menu)
+            zoom_menu.add_command(label="Zoom In", command=lambda: self.zoom(1), accelerator="Ctrl++")
+            zoom_menu.add_command(label="Zoom Out", command=lambda: self.zoom(-1), accelerator="Ctrl+-")
+            zoom_menu.add_command(label="Actual Size", command=lambda: self.set_zoom(0), accelerator="Ctrl+0")
+        
+        if 'Performance Metrics' not in disabled_views:
+            view_menu.add_checkbutton(label="Performance Metrics", variable=self.metrics_var,
+                                      command=lambda: self.show_metrics(self.metrics_var.get()))
+    
+    def _fill_colors_menu(self, colors_menu: Menu) -> None:
+        """Colors menu items: one per built-in or configured theme"""
+        for name, theme in self.available_themes.items():
+            label = theme.get("label") or f"{name.replace('_', ' ').title()} Theme"
+            colors_menu.add_command(label=label, command=lambda name=name: self.set_theme(name))
+    
+    def _fill_debug_menu(self, debug_menu: Menu) -> None:
+        """Debug menu items"""
+        debug_menu.add_checkbutton(label="Profile", variable=self.profile_var,
+                                   command=self._toggle_profile)
     
     def _parse_ansi_codes(self, text: str) -> List[Tuple[str, List[str]]]:
         """Parse ANSI escape sequences in text"""
-        # ANSI escape sequence regex pattern
-        ansi_pattern = re.compile(r'(\x1b\[[\d;]*m)')
-        
-        parts = []
-        last_end = 0
-        current_codes: List[str] = []
-        
-        for match in ansi_pattern.finditer(text):
-            # Add normal text
-            if match.start() > last_end:
-                normal_text = text[last_end:match.start()]
-                if normal_text:
-                    parts.append((normal_text, current_codes.copy()))
-            
-            # Parse ANSI code
-            ansi_code = match.group(0)
-            code_str = ansi_code[2:-1]  # Remove \x1b[ and m
-            
-            if code_str == '':
-                # Reset all attributes
-                current_codes = ['0']
-            else:
-                codes = code_str.split(';')
-                for code in codes:
-                    if code == '0':
-                        # Reset
-                        current_codes = ['0']
-                    elif code in ['1', '3', '4', '7', '9']:
-                        # Style codes
-                        if code not in current_codes:
-                            if code == '1' and '22' in current_codes:
-                                current_codes.remove('22')
-                            current_codes.append(code)
-                    elif code in ['22', '23', '24', '27', '29']:
-                        # Reset specific styles
-                        reset_map = {'22': '1', '23': '3', '24': '4', '27': '7', '29': '9'}
-                        if reset_map[code] in current_codes:
-                            current_codes.remove(reset_map[code])
-                    elif code in self.ansi_colors or code.startswith('38;') or code.startswith('48;'):
-                        # Color codes
-                        if 'disabled_colors' in self.config and code in self.config['disabled_colors']:
-                            continue
-                            
-                        # Remove same type color codes
-                        if code in ['30', '31', '32', '33', '34', '35', '36', '37',
-                                   '90', '91', '92', '93', '94', '95', '96', '97']:
-                            # Remove other basic foreground colors
-                            for c in list(current_codes):
-                                if c in ['30', '31', '32', '33', '34', '35', '36', '37',
-                                        '90', '91', '92', '93', '94', '95', '96', '97']:
-                                    current_codes.remove(c)
-                        elif code in ['40', '41', '42', '43', '44', '45', '46', '47']:
-                            # Remove other basic background colors
-                            for c in list(current_codes):
-                                if c in ['40', '41', '42', '43', '44', '45', '46', '47']:
-                                    current_codes.remove(c)
-                        elif code.startswith('38;'):
-                            # Remove other foreground colors
-                            for c in list(current_codes):
-                                if c.startswith('38;'):
-                                    current_codes.remove(c)
-                        elif code.startswith('48;'):
-                            # Remove other background colors
-                            for c in list(current_codes):
-                                if c.startswith('48;'):
-                                    current_codes.remove(c)
-                        current_codes.append(code)
-        
-        # Add remaining text
-        if last_end < len(text):
-            remaining_text = text[last_end:]
-            if remaining_text:
-                parts.append((remaining_text, current_codes.copy()))
-        
-        return parts
+        return _parse_sgr(text, self.config.disabled_colors)
     
     def _get_tags_for_codes(self, codes: List[str]) -> List[str]:
         """Get corresponding tag list based on ANSI codes"""
@@ -401,279 +1932,1766 @@ class Py2GUI:
                             '7': 'reverse', '9': 'strikethrough'}
                 if code in style_map:
                     tags.append(style_map[code])
-            elif code in self.ansi_colors or code.startswith('38;') or code.startswith('48;'):
+            elif _is_color(code):
                 # Skip disabled colors
-                if 'disabled_colors' in self.config and code in self.config['disabled_colors']:
+                if code in self.config.disabled_colors:
                     continue
                 # Color tags
                 tag_name = f"ansi_{code}"
-                if tag_name in self.tag_names:
+                if tag_name in self.tag_names or self._create_ansi_tag(code):
                     tags.append(tag_name)
         
-        return tags if tags else ['default']
+        return tags if tags else ['default']
+    
+    def _code_tags(self, codes: List[str], font_tags: Tuple[str, ...]) -> Tuple[str, ...]:
+        """Tags for a run's ANSI codes under an optional custom font tag"""
+        tags = self._get_tags_for_codes(codes)
+        if font_tags and ('bold' in tags or 'italic' in tags):
+            # Tk uses a single font per character; fold the style into the custom font
+            return (self._restyled_font_tag(font_tags[0], tags),) + tuple(tags)
+        return font_tags + tuple(tags)
+    
+    def _create_ansi_tag(self, code: str) -> bool:
+        """Configure the tag for an ANSI color code on first use; False if there is none"""
+        if _ansi_color(code, self.ansi_colors) is None or code in self.config.disabled_colors:
+            return False
+        
+        tag_name = f"ansi_{code}"
+        self._configure_ansi_tag(code)
+        # Newer tags win in Tk; keep colors below the style tags as when they were created first
+        self.text_area.tag_lower(tag_name, "bold")
+        self.tag_names.add(tag_name)
+        return True
+    
+    def _configure_ansi_tag(self, code: str) -> None:
+        """Set an ANSI color tag from the theme palette; a disabled color shows as plain text"""
+        color_hex = "" if code in self.config.disabled_colors else _ansi_color(code, self.ansi_colors) or ""
+        if _is_background(code):
+            self.text_area.tag_configure(f"ansi_{code}", background=color_hex)
+        else:
+            self.text_area.tag_configure(f"ansi_{code}", foreground=color_hex)
+    
+    def _styled_runs(self, text: str, font_tags: Tuple[str, ...] = ()) -> List[Run]:
+        """Parse ANSI text into (text, tags) runs, font tags first"""
+        start = time.perf_counter()
+        parts = self._parse_ansi_codes(text)
+        parsed = time.perf_counter()
+        runs = [(part_text, self._code_tags(codes, font_tags)) for part_text, codes in parts]
+        end = time.perf_counter()
+        self._metrics.parse.add(end - start)
+        tracer = self._tracer
+        if tracer is not None:
+            tracer.span("_parse_ansi_codes", "tk", start, parsed)
+            tracer.span("_get_tags_for_codes", "tk", parsed, end)
+        return runs
+    
+    @staticmethod
+    def _coalesce_runs(runs: List[Run]) -> Tuple[Run, ...]:
+        """Merge adjacent runs that carry the same tags and drop empty ones"""
+        merged: List[Run] = []
+        for run_text, tags in runs:
+            if not run_text:
+                continue
+            if merged and merged[-1][1] == tags:
+                merged[-1] = (merged[-1][0] + run_text, tags)
+            else:
+                merged.append((run_text, tags))
+        return tuple(merged)
+    
+    @staticmethod
+    def _process_escape_sequences(text: str) -> str:
+        """Process escape sequences like \n, \t, etc."""
+        # Replace common escape sequences
+        replacements = {
+            '\\n': '\n',
+            '\\t': '\t',
+            '\\r': '\r',
+            '\\b': '\b',
+            '\\f': '\f',
+            '\\v': '\v',
+            '\\\\': '\\',
+            '\\"': '"',
+            "\\'": "'"
+        }
+        
+        for esc_seq, char in replacements.items():
+            text = text.replace(esc_seq, char)
+        
+        return text
+    
+    def display_paragraph(self, text: str, parse_ansi: bool = True, font_family: Optional[str] = None, 
+                         font_size: Optional[int] = None, font_style: Optional[str] = None) -> None:
+        """Thread-safe display paragraph (no auto newline)"""
+        called = time.perf_counter()
+        # Process escape sequences
+        text_processed = self._process_escape_sequences(text)
+        
+        def _update():
+            try:
+                self.text_area.config(state=tk.NORMAL)
+                
+                # Check custom font settings
+                font_tags = []
+                if font_family or font_size or font_style:
+                    font_tags.append(self._font_tag(font_family, font_size, font_style))
+                
+                if self._uses_screen(text_processed, parse_ansi):
+                    # Frame mode: write at the screen cursor
+                    self._screen_write(text_processed, parse_ansi, tuple(font_tags))
+                elif parse_ansi and ('\x1b[' in text_processed or '\033[' in text_processed):
+                    # Parse and apply ANSI colors
+                    runs = self._styled_runs(text_processed, tuple(font_tags))
+                    
+                    # Insert all segments with one Tk call
+                    self._insert_output(runs)
+                else:
+                    # Normal text
+                    tags = ['default']
+                    if font_tags:
+                        tags = font_tags
+                    self._insert_output([(text_processed, tuple(tags))])
+                
+                self.text_area.config(state=tk.DISABLED)
+            except tk.TclError as e:
+                if self.running:
+                    self._safe_print(f"Tkinter error in display_paragraph: {e}")
+            except Exception as e:
+                if self.running:
+                    self._safe_print(f"Error in display_paragraph: {e}")
+        
+        if self.running:
+            self._tee(text_processed)
+            self._schedule_output(_update, called)
+    
+    def display(self, text: str, parse_ansi: bool = True, font_family: Optional[str] = None, 
+               font_size: Optional[int] = None, font_style: Optional[str] = None) -> None:
+        """Thread-safe display text (auto newline)"""
+        called = time.perf_counter()
+        def _update():
+            try:
+                self.text_area.config(state=tk.NORMAL)
+                
+                # Check custom font settings
+                font_tags = []
+                if font_family or font_size or font_style:
+                    font_tags.append(self._font_tag(font_family, font_size, font_style))
+                
+                if self._uses_screen(str(text), parse_ansi):
+                    # Frame mode: write at the screen cursor
+                    self._screen_write(str(text) + "\n", parse_ansi, tuple(font_tags))
+                elif parse_ansi and ('\x1b[' in str(text) or '\033[' in str(text)):
+                    # Parse and apply ANSI colors
+                    runs = self._styled_runs(str(text), tuple(font_tags))
+                    
+                    # Add newline
+                    runs.append(("\n", tuple(font_tags) or ('default',)))
+                    
+                    # Insert all segments with one Tk call
+                    self._insert_output(runs)
+                else:
+                    # Normal text
+                    tags = ['default']
+                    if font_tags:
+                        tags = font_tags
+                    self._insert_output([(str(text) + "\n", tuple(tags))])
+                
+                self.text_area.config(state=tk.DISABLED)
+            except tk.TclError as e:
+                if self.running:
+                    self._safe_print(f"Tkinter error in display: {e}")
+            except Exception as e:
+                if self.running:
+                    self._safe_print(f"Error in display: {e}")
+        
+        if self.running:
+            self._tee(f"{text}\n")
+            self._schedule_output(_update, called)
+    
+    def _colored_tags(self, fg_color: Optional[str], bg_color: Optional[str], bold: bool, underline: bool,
+                      italic: bool, strikethrough: bool, reverse: bool, font_family: Optional[str],
+                      font_size: Optional[int], font_style: Optional[str]) -> List[str]:
+        """Tags for display_colored, configuring custom color and font tags as needed (Tk thread)"""
+        tags = ['default']
+        
+        # Process foreground color
+        if fg_color is not None and fg_color != "":
+            fg_color_lower = fg_color.lower()
+            if fg_color_lower in self.color_name_to_hex:
+                color_value = self.color_name_to_hex[fg_color_lower]
+                custom_fg_tag = f"custom_fg_{color_value}"
+                tags.append(custom_fg_tag)
+                if custom_fg_tag not in self.tag_names:
+                    self.text_area.tag_configure(custom_fg_tag, foreground=color_value)
+                    self.tag_names.add(custom_fg_tag)
+            elif fg_color.isdigit():
+                # ANSI code
+                if fg_color not in self.config.disabled_colors:
+                    if f"ansi_{fg_color}" in self.tag_names or self._create_ansi_tag(fg_color):
+                        tags.append(f"ansi_{fg_color}")
+            elif fg_color.startswith('#') and len(fg_color) in [4, 5, 7, 9]:
+                # Hex color
+                color_value = fg_color
+                custom_fg_tag = f"custom_fg_{color_value}"
+                tags.append(custom_fg_tag)
+                if custom_fg_tag not in self.tag_names:
+                    self.text_area.tag_configure(custom_fg_tag, foreground=color_value)
+                    self.tag_names.add(custom_fg_tag)
+            elif ';' in fg_color and fg_color.startswith('38;'):
+                # Extended ANSI color codes
+                if f"ansi_{fg_color}" in self.tag_names or self._create_ansi_tag(fg_color):
+                    tags.append(f"ansi_{fg_color}")
+            else:
+                # Try named color
+                try:
+                    if fg_color.strip():
+                        self.text_area.tag_configure(f"custom_fg_{fg_color}", foreground=fg_color)
+                        tags.append(f"custom_fg_{fg_color}")
+                        self.tag_names.add(f"custom_fg_{fg_color}")
+                except tk.TclError:
+                    pass
+        
+        # Process background color
+        if bg_color is not None and bg_color != "":
+            bg_color_lower = bg_color.lower()
+            if bg_color_lower in self.color_name_to_hex:
+                color_value = self.color_name_to_hex[bg_color_lower]
+                custom_bg_tag = f"custom_bg_{color_value}"
+                tags.append(custom_bg_tag)
+                if custom_bg_tag not in self.tag_names:
+                    self.text_area.tag_configure(custom_bg_tag, background=color_value)
+                    self.tag_names.add(custom_bg_tag)
+            elif bg_color.isdigit():
+                # ANSI code
+                if bg_color not in self.config.disabled_colors:
+                    if f"ansi_{bg_color}" in self.tag_names or self._create_ansi_tag(bg_color):
+                        tags.append(f"ansi_{bg_color}")
+            elif bg_color.startswith('#') and len(bg_color) in [4, 5, 7, 9]:
+                # Hex color
+                color_value = bg_color
+                custom_bg_tag = f"custom_bg_{color_value}"
+                tags.append(custom_bg_tag)
+                if custom_bg_tag not in self.tag_names:
+                    self.text_area.tag_configure(custom_bg_tag, background=color_value)
+                    self.tag_names.add(custom_bg_tag)
+            elif ';' in bg_color and bg_color.startswith('48;'):
+                # Extended ANSI color codes
+                if f"ansi_{bg_color}" in self.tag_names or self._create_ansi_tag(bg_color):
+                    tags.append(f"ansi_{bg_color}")
+            else:
+                # Try named color
+                try:
+                    if bg_color.strip():
+                        self.text_area.tag_configure(f"custom_bg_{bg_color}", background=bg_color)
+                        tags.append(f"custom_bg_{bg_color}")
+                        self.tag_names.add(f"custom_bg_{bg_color}")
+                except tk.TclError:
+                    pass
+        
+        # Process font
+        if font_family or font_size or font_style:
+            font_tag = self._font_tag(font_family, font_size, font_style)
+            if bold or italic:
+                # Tk uses a single font per character; fold the style into the custom font
+                styles = [tag for tag, enabled in (("bold", bold), ("italic", italic)) if enabled]
+                font_tag = self._restyled_font_tag(font_tag, styles)
+            tags.append(font_tag)
+        
+        # Process styles
+        if bold:
+            tags.append('bold')
+        if underline:
+            tags.append('underline')
+        if italic:
+            tags.append('italic')
+        if strikethrough:
+            tags.append('strikethrough')
+        if reverse:
+            tags.append('reverse')
+        return tags
+    
+    def _font_tag(self, font_family: Optional[str], font_size: Optional[int], font_style: Optional[str]) -> str:
+        """Tag for a custom font, configured with a shared font on first use (Tk thread)"""
+        font_family_val = font_family or "Courier"
+        font_size_val = font_size or 10
+        font_style_val = font_style or "normal"
+        font_key = f"font_{font_family_val}_{font_size_val}_{font_style_val}"
+        
+        if font_key not in self.tag_names:
+            shared = self._shared_font(font_key, font_family_val, font_size_val, font_style_val)
+            self.text_area.tag_configure(font_key, font=shared)
+            self.tag_names.add(font_key)
+        return font_key
+    
+    def _restyled_font_tag(self, font_tag: str, tags: List[str]) -> str:
+        """The font tag with the run's bold/italic added, which a custom font would otherwise hide"""
+        family, size, style = self._fonts[font_tag][1]
+        words = [word for word in style.split() if word != "normal"]
+        words += [tag for tag in ("bold", "italic") if tag in tags and tag not in words]
+        return self._font_tag(family, size, " ".join(words) or "normal")
+    
+    def _shared_font(self, key: str, family: str, size: int, style: str) -> font.Font:
+        """Create the named font for key at the current zoom (Tk thread)"""
+        words = style.split()
+        shared = font.Font(root=self.root, family=family, size=self._zoomed(size),
+                           weight="bold" if "bold" in words else "normal",
+                           slant="italic" if "italic" in words else "roman",
+                           underline="underline" in words, overstrike="overstrike" in words)
+        self._fonts[key] = (shared, (family, size, style))
+        return shared
+    
+    def _zoomed(self, size: int) -> int:
+        """Font size at the current zoom level"""
+        return max(1, round(size * (1 + _ZOOM_STEP * self.zoom_level)))
+    
+    def set_zoom(self, level: int) -> None:
+        """Thread-safe: set the text zoom level (0 is actual size, each step is 10%)"""
+        if self.running:
+            self._call_soon(lambda: self._apply_zoom(level))
+    
+    def zoom(self, steps: int = 1) -> None:
+        """Thread-safe: zoom in (positive steps) or out (negative steps)"""
+        if self.running:
+            self._call_soon(lambda: self._apply_zoom(self.zoom_level + steps))
+    
+    def _apply_zoom(self, level: int) -> None:
+        """Resize the shared fonts; Tk relayouts everything that uses them (Tk thread)"""
+        level = max(_ZOOM_LEVELS[0], min(_ZOOM_LEVELS[1], level))
+        if level == self.zoom_level:
+            return
+        self.zoom_level = level
+        try:
+            for shared, (_, size, _) in self._fonts.values():
+                shared.configure(size=self._zoomed(size))
+        except tk.TclError as e:
+            if self.running:
+                self._safe_print(f"Tkinter error zooming: {e}")
+    
+    def display_colored(self, text: str, fg_color: Optional[str] = None, bg_color: Optional[str] = None, 
+                       bold: bool = False, underline: bool = False, italic: bool = False,
+                       strikethrough: bool = False, reverse: bool = False,
+                       font_family: Optional[str] = None, font_size: Optional[int] = None, 
+                       font_style: Optional[str] = None) -> None:
+        """Directly display colored text"""
+        called = time.perf_counter()
+        def _update():
+            try:
+                self.text_area.config(state=tk.NORMAL)
+                
+                tags = self._colored_tags(fg_color, bg_color, bold, underline, italic, strikethrough,
+                                          reverse, font_family, font_size, font_style)
+                
+                if self._uses_screen(str(text), False):
+                    # Frame mode: write at the screen cursor
+                    self._screen_write(str(text) + "\n", False, tuple(tags))
+                else:
+                    self._insert_output([(str(text) + "\n", tuple(tags))])
+                self.text_area.config(state=tk.DISABLED)
+            except tk.TclError as e:
+                if self.running:
+                    self._safe_print(f"Tkinter error in display_colored: {e}")
+            except Exception as e:
+                if self.running:
+                    self._safe_print(f"Error in display_colored: {e}")
+        
+        if self.running:
+            self._tee(self._colored_ansi(f"{text}", fg_color, bg_color, bold, underline, italic,
+                                         strikethrough, reverse) + "\n")
+            self._schedule_output(_update, called)
+    
+    def display_frame(self, lines: List[str], parse_ansi: bool = True) -> None:
+        """Thread-safe full-screen redraw: show lines as a screen below the output, patching only what changed"""
+        called = time.perf_counter()
+        def _update():
+            try:
+                # Split embedded newlines so every entry is one screen row
+                rows: List[str] = []
+                for line in lines:
+                    rows.extend(str(line).split("\n"))
+                frame = [self._line_runs(row, parse_ansi) for row in rows]
+                
+                # An explicit frame replaces any escape-driven screen
+                self._screen = None
+                self.text_area.config(state=tk.NORMAL)
+                self._render_frame(frame)
+                self.text_area.config(state=tk.DISABLED)
+            except tk.TclError as e:
+                if self.running:
+                    self._safe_print(f"Tkinter error in display_frame: {e}")
+            except Exception as e:
+                if self.running:
+                    self._safe_print(f"Error in display_frame: {e}")
+        
+        if self.running:
+            if self._recorder is not None:
+                # Recorded as a cursor-home redraw so replay goes through frame mode
+                self._recorder.output("\x1b[H\x1b[2J" + "\n".join(str(line) for line in lines) + "\n")
+            self._schedule_output(_update, called)
+    
+    def end_frame(self) -> None:
+        """Leave frame mode; the last frame stays in the output as normal text"""
+        def _update():
+            if self._screen_pending:
+                self._commit_screen()
+            self._leave_frame()
+        
+        if self.running:
+            self._call_soon(_update)
+    
+    def _call_soon(self, call: Callable[[], None]) -> None:
+        """Queue call for the Tk thread, in order with every other window's calls"""
+        self._scheduler.submit(self, call)
+    
+    def _schedule_output(self, update: Callable[[], None], called: float) -> None:
+        """Queue an output update for the Tk thread, timing it from the display call to insert"""
+        metrics = self._metrics
+        metrics.submit()
+        tracer = self._tracer
+        if tracer is None:
+            def _deliver():
+                update()
+                metrics.deliver(called)
+            
+            self._call_soon(_deliver)
+            return
+        
+        # Traced: the calling method's span on this thread and the update's on the Tk thread
+        name = update.__qualname__.split('.')[-3]
+        
+        def _deliver_traced():
+            start = time.perf_counter()
+            update()
+            metrics.deliver(called)
+            self._trace(name, "tk", start)
+        
+        scheduled = time.perf_counter()
+        self._call_soon(_deliver_traced)
+        end = time.perf_counter()
+        tracer.span("after", "worker", scheduled, end)
+        tracer.span(name, "worker", called, end)
+    
+    def _trace(self, name: str, category: str, start: float) -> None:
+        """Record a span from start until now if tracing is on"""
+        tracer = self._tracer
+        if tracer is not None:
+            tracer.span(name, category, start, time.perf_counter())
+    
+    def _uses_screen(self, text: str, parse_ansi: bool) -> bool:
+        """Check whether output goes to the frame-mode screen (Tk thread)"""
+        if self._screen is not None or (parse_ansi and _SCREEN_ENTER_RE.search(text)):
+            return True
+        if self._frame_lines is not None:
+            # Plain output ends frame mode; the last frame becomes scrollback
+            self._leave_frame()
+        return False
+    
+    def _leave_frame(self) -> None:
+        """Drop frame mode state, end the last frame line and keep the frame as history (Tk thread)"""
+        frame = self._frame_lines
+        try:
+            if frame and frame[-1]:
+                self.text_area.config(state=tk.NORMAL)
+                self.text_area.insert("end-1c", "\n", 'default')
+                self.text_area.config(state=tk.DISABLED)
+                self._line_index.append("\n")
+        except tk.TclError as e:
+            if self.running:
+                self._safe_print(f"Tkinter error leaving frame mode: {e}")
+        if frame is not None:
+            runs: List[Run] = []
+            for row, line in enumerate(frame):
+                if row:
+                    runs.append(("\n", ('default',)))
+                runs.extend(line)
+            if frame and frame[-1]:
+                runs.append(("\n", ('default',)))
+            self._history.append_runs(runs)
+        self._frame_lines = None
+        self._screen = None
+        self._line_length = 0
+    
+    def _line_runs(self, text: str, parse_ansi: bool) -> Tuple[Run, ...]:
+        """Convert one line of text into (text, tags) runs"""
+        if parse_ansi and '\x1b[' in text:
+            # Cursor escapes have no meaning inside an explicit frame
+            text = _CURSOR_ESCAPE_RE.sub('', text)
+            return self._coalesce_runs(self._styled_runs(text))
+        return ((text, ('default',)),) if text else ()
+    
+    def _insert_runs(self, index: str, runs: Tuple[Run, ...]) -> None:
+        """Insert (text, tags) runs at index with a single Tk call"""
+        if runs:
+            args: List[Any] = []
+            for run_text, tags in runs:
+                args.extend((run_text, tags))
+            start = time.perf_counter()
+            self.text_area.insert(index, *args)
+            end = time.perf_counter()
+            self._metrics.insert.add(end - start)
+            tracer = self._tracer
+            if tracer is not None:
+                tracer.span("text_area.insert", "tk", start, end)
+    
+    def _render_frame(self, frame: List[Tuple[Run, ...]]) -> None:
+        """Patch text_area to show frame, touching only changed lines (Tk thread)"""
+        if self._frame_lines is None:
+            # Entering frame mode: the frame goes on a line of its own below the output,
+            # which stays as scrollback
+            if self._history.lines[-1]:
+                self._history.append_runs([("\n", ('default',))])
+            if self._line_index.lines[-1]:
+                self.text_area.insert("end-1c", "\n", 'default')
+                self._line_index.append("\n")
+            self._open_truncation = None
+            self._line_length = 0
+            self._frame_top = len(self._line_index)
+            self._frame_lines = []
+        
+        old_frame = self._frame_lines
+        top = self._frame_top
+        self._track_output(max(len(frame) - len(old_frame), 0))
+        for row, runs in enumerate(frame):
+            if row >= len(old_frame):
+                # Line below the previous frame
+                if row > 0:
+                    runs = (("\n", ('default',)),) + runs
+                self._insert_runs("end-1c", runs)
+            elif runs != old_frame[row]:
+                self._patch_frame_line(top + row, old_frame[row], runs)
+        
+        if len(frame) < len(old_frame):
+            # Drop lines the new frame no longer has
+            start = f"{top + len(frame) - 1}.end" if frame else f"{top}.0"
+            self.text_area.delete(start, "end-1c")
+        
+        self._frame_lines = list(frame)
+        self._line_index.replace_from(top - 1, ["".join(run_text for run_text, _ in runs) for runs in frame] or [""])
+    
+    def _patch_frame_line(self, line: int, old_runs: Tuple[Run, ...], new_runs: Tuple[Run, ...]) -> None:
+        """Replace only the runs that differ between two versions of text line line"""
+        limit = min(len(old_runs), len(new_runs))
+        prefix = 0
+        while prefix < limit and old_runs[prefix] == new_runs[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old_runs[-1 - suffix] == new_runs[-1 - suffix]:
+            suffix += 1
+        
+        start = sum(len(run_text) for run_text, _ in old_runs[:prefix])
+        end = sum(len(run_text) for run_text, _ in old_runs[:len(old_runs) - suffix])
+        if end > start:
+            self.text_area.delete(f"{line}.{start}", f"{line}.{end}")
+        self._insert_runs(f"{line}.{start}", new_runs[prefix:len(new_runs) - suffix])
+    
+    def _screen_write(self, text: str, parse_ansi: bool, extra_tags: Tuple[str, ...] = ()) -> None:
+        """Write text into the frame-mode screen at the cursor (Tk thread)"""
+        if self._screen is None:
+            self._screen = []
+            self._screen_row = 0
+            self._screen_col = 0
+        
+        pos = 0
+        if parse_ansi:
+            for match in _CURSOR_ESCAPE_RE.finditer(text):
+                self._screen_put(text[pos:match.start()], parse_ansi, extra_tags)
+                self._screen_control(*match.groups())
+                pos = match.end()
+        self._screen_put(text[pos:], parse_ansi, extra_tags)
+        
+        # Coalesce all writes of this event-loop pass into one frame
+        if not self._screen_pending:
+            self._screen_pending = True
+            self.root.after_idle(self._commit_screen)
+    
+    def _screen_put(self, text: str, parse_ansi: bool, extra_tags: Tuple[str, ...]) -> None:
+        """Put styled characters on the screen, overwriting cells like a terminal"""
+        if not text:
+            return
+        if parse_ansi and '\x1b[' in text:
+            segments = self._styled_runs(text, extra_tags)
+        else:
+            segments = [(text, extra_tags or ('default',))]
+        
+        screen = self._screen
+        blank: Run = (' ', ('default',))
+        for part_text, tags in segments:
+            for char in part_text:
+                if char == '\n':
+                    self._screen_row += 1
+                    self._screen_col = 0
+                elif char == '\r':
+                    self._screen_col = 0
+                else:
+                    while len(screen) <= self._screen_row:
+                        screen.append([])
+                    line = screen[self._screen_row]
+                    col = self._screen_col
+                    if col < len(line):
+                        line[col] = (char, tags)
+                    else:
+                        line.extend([blank] * (col - len(line)))
+                        line.append((char, tags))
+                    self._screen_col = col + 1
+    
+    def _screen_control(self, private: str, first: str, second: Optional[str], command: str) -> None:
+        """Apply a cursor-addressing escape to the screen"""
+        if private or command in 'hl':
+            # Mode switches (cursor visibility, alternate screen...) do not affect rendering
+            return
+        
+        screen = self._screen
+        count = int(first) if first else 0
+        row, col = self._screen_row, self._screen_col
+        line = screen[row] if row < len(screen) else None
+        blank: Run = (' ', ('default',))
+        
+        if command in 'Hf':
+            self._screen_row = max(count - 1, 0)
+            self._screen_col = max(int(second or 1) - 1, 0)
+        elif command == 'J':
+            if count in (2, 3):
+                screen.clear()
+            elif count == 1:
+                for r in range(min(row, len(screen))):
+                    screen[r] = []
+                if line is not None:
+                    line[:col + 1] = [blank] * min(col + 1, len(line))
+            else:
+                del screen[row + 1:]
+                if line is not None:
+                    del line[col:]
+        elif command == 'K':
+            if line is None:
+                return
+            if count == 2:
+                line.clear()
+            elif count == 1:
+                line[:col + 1] = [blank] * min(col + 1, len(line))
+            else:
+                del line[col:]
+        elif command == 'A':
+            self._screen_row = max(row - (count or 1), 0)
+        elif command == 'B':
+            self._screen_row = row + (count or 1)
+        elif command == 'C':
+            self._screen_col = col + (count or 1)
+        elif command == 'D':
+            self._screen_col = max(col - (count or 1), 0)
+    
+    def _commit_screen(self) -> None:
+        """Render the escape-driven screen as a frame (Tk thread)"""
+        self._screen_pending = False
+        if self._screen is None or not self.running:
+            return
+        
+        frame = []
+        for cells in self._screen:
+            runs = tuple((''.join(char for char, _ in group), tags)
+                         for tags, group in itertools.groupby(cells, key=operator.itemgetter(1)))
+            frame.append(runs)
+        
+        try:
+            self.text_area.config(state=tk.NORMAL)
+            self._render_frame(frame)
+            self.text_area.config(state=tk.DISABLED)
+        except tk.TclError as e:
+            if self.running:
+                self._safe_print(f"Tkinter error rendering frame: {e}")
+    
+    def _track_output(self, new_lines: int) -> None:
+        """Record output about to be inserted and schedule one autoscroll per flush (Tk thread)"""
+        if not self._scroll_pending:
+            # Decide once per flush, before this batch moves the end of the buffer
+            self._scroll_pending = True
+            self._follow_output = not self.scroll_lock and self._view_at_bottom()
+            self.root.after_idle(self._flush_autoscroll)
+        self._pending_lines += new_lines
+    
+    def _view_at_bottom(self) -> bool:
+        """Check whether the last line of output is visible"""
+        try:
+            return self.text_area.yview()[1] >= 1.0
+        except tk.TclError:
+            return True
+    
+    def _flush_early_output(self, items: List[Tuple[Any, ...]]) -> None:
+        """Show output written before the window existed, as one insert (see _EarlyOutput)"""
+        called = time.perf_counter()
+        for item in items:
+            if item[0] == "colored":
+                self._tee(self._colored_ansi(item[1], *item[2][:7]) + "\n")
+            else:
+                self._tee(item[3])
+        
+        def _update():
+            try:
+                runs: List[Run] = []
+                for item in items:
+                    if item[0] == "colored":
+                        runs.append((item[1] + "\n", tuple(self._colored_tags(*item[2]))))
+                        continue
+                    _, parts, font_spec, _ = item
+                    font_tags = (self._font_tag(*font_spec),) if any(font_spec) else ()
+                    for part_text, codes in parts:
+                        if codes is None:
+                            runs.append((part_text, font_tags or ('default',)))
+                        else:
+                            runs.append((part_text, self._code_tags(codes, font_tags)))
+                self.text_area.config(state=tk.NORMAL)
+                self._insert_output(runs)
+                self.text_area.config(state=tk.DISABLED)
+            except tk.TclError as e:
+                if self.running:
+                    self._safe_print(f"Tkinter error showing early output: {e}")
+        
+        self._schedule_output(_update, called)
+    
+    def _flush_autoscroll(self) -> None:
+        """Follow new output, or count it while the user reads history (Tk thread)"""
+        self._scroll_pending = False
+        new_lines, self._pending_lines = self._pending_lines, 0
+        if not self.running:
+            return
+        try:
+            if self._follow_output and not self.scroll_lock:
+                self.text_area.see(tk.END)
+            elif new_lines:
+                self._unseen_lines += new_lines
+                self._update_new_lines_indicator()
+        except tk.TclError as e:
+            if self.running:
+                self._safe_print(f"Tkinter error scrolling output: {e}")
+    
+    def _update_new_lines_indicator(self) -> None:
+        """Show or hide the "N new lines" indicator"""
+        if self._unseen_lines:
+            # Keep the label short however long the user stays scrolled up
+            if self._unseen_lines > _MAX_UNSEEN_LINES:
+                count = f"{_MAX_UNSEEN_LINES}+"
+            else:
+                count = str(self._unseen_lines)
+            plural = "" if self._unseen_lines == 1 else "s"
+            self.new_lines_label.config(text=f" {count} new line{plural} \u2193 ")
+            self.new_lines_label.place(relx=1.0, rely=1.0, anchor=tk.SE, x=-4, y=-4)
+        else:
+            self.new_lines_label.place_forget()
+    
+    def _on_text_scroll(self, first: str, last: str) -> None:
+        """Forward scroll position to the scrollbar and drop the indicator at the bottom"""
+        self.text_area.vbar.set(first, last)
+        if self._unseen_lines and not self.scroll_lock and float(last) >= 1.0:
+            self._unseen_lines = 0
+            self._update_new_lines_indicator()
+        
+        # Matches are highlighted only in the visible region, so follow the view
+        if self._find_visible and not self._find_refresh_pending:
+            self._find_refresh_pending = True
+            self.root.after_idle(self._highlight_visible_matches)
+    
+    def scroll_to_end(self) -> None:
+        """Thread-safe: scroll output to the newest line"""
+        if self.running:
+            self._call_soon(self._scroll_to_end)
+    
+    def _scroll_to_end(self) -> None:
+        """Scroll output to the newest line (Tk thread)"""
+        try:
+            self.text_area.see(tk.END)
+            self._unseen_lines = 0
+            self._update_new_lines_indicator()
+        except tk.TclError as e:
+            if self.running:
+                self._safe_print(f"Tkinter error scrolling output: {e}")
+    
+    def set_scroll_lock(self, locked: bool) -> None:
+        """Thread-safe scroll lock: keep the view still while output keeps arriving"""
+        def _set_scroll_lock():
+            self.scroll_lock = locked
+            self.scroll_lock_var.set(locked)
+            if not locked:
+                # Releasing the lock resumes following output
+                self._scroll_to_end()
+        
+        if self.running:
+            self._call_soon(_set_scroll_lock)
+    
+    def _insert_output(self, runs: List[Run]) -> None:
+        """Record runs in the history and show them unless the filter hides them (Tk thread)"""
+        history = self._history
+        first = len(history) - 1
+        history.append_runs(runs)
+        self._metrics.output(sum(run_text.count('\n') for run_text, _ in runs),
+                             sum(len(run_text) for run_text, _ in runs))
+        if self._filter_pattern is None:
+            self._render_output(runs)
+        else:
+            # Filtered view: test only the lines this output completed
+            shown = [line for line in range(first, len(history) - 1)
+                     if self._filter_pattern.search(history.lines[line])]
+            if shown:
+                self._render_output(history.line_runs(shown))
+                self._filter_matches += len(shown)
+                self._update_filter_indicator()
+        
+        excess = self._scrollback_excess(len(history))
+        if excess:
+            if self._filter_pattern is not None:
+                # Matches on the trimmed lines no longer count
+                self._filter_matches -= len(history.matching_lines(self._filter_pattern, excess - 1))
+                self._update_filter_indicator()
+            history.drop(excess)
+    
+    def _render_output(self, runs: List[Run]) -> None:
+        """Append runs to text_area, applying the long-line limit (Tk thread)"""
+        self._track_output(sum(run_text.count('\n') for run_text, _ in runs))
+        
+        markers: List[Tuple[int, str]] = []
+        if self.max_line_length and self.max_line_length > 0:
+            runs, markers = self._limit_line_length(runs)
+        else:
+            # Track the length of the last buffer line in case a limit is set later
+            for run_text, _ in runs:
+                newline = run_text.rfind('\n')
+                if newline < 0:
+                    self._line_length += len(run_text)
+                else:
+                    self._line_length = len(run_text) - newline - 1
+        
+        start = self.text_area.index("end-1c") if markers else None
+        runs = self._coalesce_runs(runs)
+        self._insert_runs(tk.END, runs)
+        self._line_index.append("".join(run_text for run_text, _ in runs))
+        
+        # Marks remember where each truncation marker starts
+        for offset, truncation in markers:
+            self.text_area.mark_set(truncation, f"{start}+{offset}c")
+        
+        excess = self._scrollback_excess(len(self._line_index))
+        if excess:
+            self._drop_lines(excess)
+    
+    def _scrollback_excess(self, lines: int) -> int:
+        """Lines to drop from a buffer this long; trims in batches of max_lines // 8 or more"""
+        limit = self.max_lines
+        if not limit or lines <= limit + limit // 8:
+            return 0
+        return lines - limit
+    
+    def _drop_lines(self, count: int) -> None:
+        """Delete the oldest count lines from text_area (Tk thread)"""
+        cut = f"{count + 1}.0"
+        
+        # Forget the hidden text of truncation markers on the dropped lines
+        dropped = []
+        mark = self.text_area.mark_next("1.0")
+        while mark and self.text_area.compare(mark, "<", cut):
+            if mark in self._truncated:
+                dropped.append(mark)
+            mark = self.text_area.mark_next(mark)
+        for mark in dropped:
+            del self._truncated[mark]
+            self.text_area.mark_unset(mark)
+        
+        self.text_area.delete("1.0", cut)
+        self._line_index.drop(count)
+        self._find_match = None
+    
+    def _limit_line_length(self, runs: List[Run]) -> Tuple[List[Run], List[Tuple[int, str]]]:
+        """Truncate or fold the parts of runs past max_line_length; also return marker offsets"""
+        limit = self.max_line_length
+        line_length = self._line_length
+        visible: List[Run] = []
+        markers: List[Tuple[int, str]] = []
+        offset = 0
+        hidden: List[Run] = []
+        
+        # The previous call may have left this line truncated; its marker is rewritten below
+        truncation = self._open_truncation
+        if truncation is not None:
+            hidden = self._truncated[truncation]
+            marker = self.text_area.tag_nextrange("truncated", truncation)
+            if marker:
+                self.text_area.delete(*marker)
+                last = len(self._line_index) - 1
+                marker_col = int(str(marker[0]).split('.')[1])
+                self._line_index.set_line(last, self._line_index.lines[last][:marker_col])
+        
+        def _emit(run: Run) -> None:
+            nonlocal offset
+            visible.append(run)
+            offset += len(run[0])
+        
+        def _emit_marker() -> None:
+            markers.append((offset, truncation))
+            hidden_chars = sum(len(run_text) for run_text, _ in hidden)
+            _emit((f" \u2026 [+{hidden_chars} chars]", ("truncated",)))
+        
+        for run_text, tags in runs:
+            for index, piece in enumerate(run_text.split('\n')):
+                if index:
+                    # Line break: close the current line
+                    if hidden:
+                        _emit_marker()
+                    _emit(("\n", tags))
+                    line_length = 0
+                    hidden = []
+                    truncation = None
+                
+                if self.long_lines == "fold":
+                    while len(piece) > limit - line_length:
+                        room = limit - line_length
+                        _emit((piece[:room], tags))
+                        _emit(("\n", tags))
+                        piece = piece[room:]
+                        line_length = 0
+                    _emit((piece, tags))
+                    line_length += len(piece)
+                else:
+                    room = max(limit - line_length, 0)
+                    if room:
+                        _emit((piece[:room], tags))
+                        line_length += len(piece[:room])
+                    if len(piece) > room:
+                        if truncation is None:
+                            self._truncation_count += 1
+                            truncation = f"truncated_{self._truncation_count}"
+                            self._truncated[truncation] = hidden
+                        hidden.append((piece[room:], tags))
+        
+        if hidden:
+            # Line still open: keep collecting its hidden text on the next call
+            _emit_marker()
+        self._open_truncation = truncation if hidden else None
+        self._line_length = line_length
+        return visible, markers
+    
+    def _expand_truncated(self, event: tk.Event) -> None:
+        """Replace a truncation marker with the hidden original text"""
+        try:
+            index = self.text_area.index(f"@{event.x},{event.y}")
+            marker = self.text_area.tag_prevrange("truncated", f"{index}+1c")
+            if not marker:
+                return
+            
+            # Find the mark that names this marker's hidden text
+            truncation = self.text_area.mark_next(marker[0])
+            while truncation and truncation not in self._truncated:
+                truncation = self.text_area.mark_next(truncation)
+            if not truncation or self.text_area.compare(truncation, "!=", marker[0]):
+                return
+            
+            hidden = self._truncated.pop(truncation)
+            self.text_area.mark_unset(truncation)
+            self.text_area.config(state=tk.NORMAL)
+            self.text_area.delete(*marker)
+            self._insert_runs(marker[0], self._coalesce_runs(hidden))
+            self.text_area.config(state=tk.DISABLED)
+            
+            line = int(str(marker[0]).split('.')[0])
+            self._line_index.set_line(line - 1, self.text_area.get(f"{line}.0", f"{line}.end"))
+            
+            if self._open_truncation == truncation:
+                # Further text for this line starts a new truncation
+                self._open_truncation = None
+        except tk.TclError as e:
+            if self.running:
+                self._safe_print(f"Tkinter error expanding line: {e}")
+    
+    def set_wrap(self, mode: str) -> None:
+        """Thread-safe wrap mode: none (with horizontal scrollbar), char or word"""
+        if mode not in _WRAP_MODES:
+            raise ValueError(f"wrap must be one of {_WRAP_MODES}, not {mode!r}")
+        
+        def _set_wrap():
+            try:
+                self.wrap = mode
+                self.text_area.config(wrap=mode)
+                if mode == "none":
+                    self.hbar.pack(fill=tk.X, padx=5, after=self.text_area.frame)
+                else:
+                    self.hbar.pack_forget()
+                self.wrap_var.set(mode)
+            except tk.TclError as e:
+                if self.running:
+                    self._safe_print(f"Tkinter error setting wrap: {e}")
+        
+        if self.running:
+            self._call_soon(_set_wrap)
+    
+    def set_max_line_length(self, length: Optional[int], long_lines: Optional[str] = None) -> None:
+        """Thread-safe long-line limit for new output (None disables it)"""
+        if long_lines is not None and long_lines not in _LONG_LINE_MODES:
+            raise ValueError(f"long_lines must be one of {_LONG_LINE_MODES}, not {long_lines!r}")
+        
+        def _set_limit():
+            self.max_line_length = length
+            if long_lines is not None:
+                self.long_lines = long_lines
+        
+        if self.running:
+            self._call_soon(_set_limit)
+    
+    def _build_find_bar(self) -> None:
+        """Create the find bar widgets (first use only)"""
+        self.find_frame = Frame(self.main_frame)
+        tk.Label(self.find_frame, text="Find:", font=("Courier", 9)).pack(side=tk.LEFT)
+        
+        self.find_var = StringVar()
+        self.find_entry = Entry(self.find_frame, textvariable=self.find_var, font=("Courier", 10))
+        self.find_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.find_entry.bind('<Return>', lambda event: self.find_next())
+        self.find_entry.bind('<Shift-Return>', lambda event: self.find_previous())
+        self.find_entry.bind('<Escape>', lambda event: self.hide_find_bar())
+        
+        # Typing searches again from the current match
+        self.find_var.trace_add("write", lambda *args: self._find(backwards=False, from_current=True))
+        
+        self.find_regex_var = tk.BooleanVar(value=False)
+        self.find_case_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.find_frame, text="Regex", variable=self.find_regex_var,
+                       command=lambda: self._find(backwards=False, from_current=True)).pack(side=tk.LEFT)
+        tk.Checkbutton(self.find_frame, text="Match case", variable=self.find_case_var,
+                       command=lambda: self._find(backwards=False, from_current=True)).pack(side=tk.LEFT)
+        Button(self.find_frame, text="Prev", command=self.find_previous, font=("Courier", 9)).pack(side=tk.LEFT)
+        Button(self.find_frame, text="Next", command=self.find_next, font=("Courier", 9)).pack(side=tk.LEFT)
+        Button(self.find_frame, text="x", command=self.hide_find_bar, font=("Courier", 9)).pack(side=tk.LEFT)
+        
+        self.find_status = tk.Label(self.find_frame, width=16, anchor=tk.W, font=("Courier", 9))
+        self.find_status.pack(side=tk.LEFT, padx=(5, 0))
+        
+        self.text_area.tag_configure("find_match", background="#ffff80", foreground="black")
+        self.text_area.tag_configure("find_current", background="#ff8000", foreground="black")
+    
+    def show_find_bar(self) -> None:
+        """Show the find bar and focus its entry"""
+        try:
+            if self.find_frame is None:
+                self._build_find_bar()
+            if not self._find_visible:
+                self.find_frame.pack(fill=tk.X, padx=5, before=self.input_frame)
+                self._find_visible = True
+            self.find_entry.focus_set()
+            self.find_entry.select_range(0, tk.END)
+            self._highlight_visible_matches()
+        except tk.TclError as e:
+            if self.running:
+                self._safe_print(f"Tkinter error showing find bar: {e}")
+    
+    def hide_find_bar(self) -> None:
+        """Hide the find bar and remove match highlighting"""
+        try:
+            if self.find_frame is not None:
+                self.find_frame.pack_forget()
+            self._find_visible = False
+            self._find_match = None
+            self.text_area.tag_remove("find_match", "1.0", tk.END)
+            self.text_area.tag_remove("find_current", "1.0", tk.END)
+            self.focus_input()
+        except tk.TclError as e:
+            if self.running:
+                self._safe_print(f"Tkinter error hiding find bar: {e}")
+    
+    def find_next(self) -> None:
+        """Jump to the next match of the find bar pattern"""
+        self._find(backwards=False)
+    
+    def find_previous(self) -> None:
+        """Jump to the previous match of the find bar pattern"""
+        self._find(backwards=True)
+    
+    def _current_find_pattern(self) -> Optional[Pattern]:
+        """Compile the find bar pattern, reusing the last compiled one"""
+        if self.find_frame is None:
+            return None
+        key = (self.find_var.get(), self.find_regex_var.get(), self.find_case_var.get())
+        if key != self._find_pattern_cache[0]:
+            text, use_regex, match_case = key
+            pattern = folded_pattern = None
+            if text:
+                try:
+                    pattern = re.compile(text if use_regex else re.escape(text),
+                                         re.MULTILINE if match_case else re.MULTILINE | re.IGNORECASE)
+                except re.error:
+                    self.find_status.config(text="Invalid pattern")
+                    return None
+                if not use_regex and not match_case:
+                    # Plain text: search lowercased chunks instead of using IGNORECASE
+                    folded_pattern = re.compile(re.escape(text.lower()), re.MULTILINE)
+            self._find_pattern_cache = (key, pattern, folded_pattern)
+        return self._find_pattern_cache[1]
+    
+    def _find(self, backwards: bool, from_current: bool = False) -> None:
+        """Move the current match forwards or backwards through the line index"""
+        if not self._find_visible:
+            self.show_find_bar()
+        try:
+            pattern = self._current_find_pattern()
+            self.text_area.tag_remove("find_current", "1.0", tk.END)
+            if pattern is None:
+                self._find_match = None
+                if self.find_var.get() == "":
+                    self.find_status.config(text="")
+                self._highlight_visible_matches()
+                return
+            
+            if self._find_match is not None:
+                line, col, _ = self._find_match
+                if not backwards and not from_current:
+                    col += 1
+            else:
+                # Start from the top of the view
+                line = int(self.text_area.index("@0,0").split('.')[0]) - 1
+                col = 0
+            
+            self._find_match = self._line_index.search(pattern, line, col, backwards,
+                                                       self._find_pattern_cache[2])
+            if self._find_match is None:
+                self.find_status.config(text="No matches")
+            else:
+                line, col, length = self._find_match
+                start = f"{line + 1}.{col}"
+                self.text_area.tag_add("find_current", start, f"{start}+{length}c")
+                self.text_area.see(start)
+                self.find_status.config(text=f"Line {line + 1}")
+            self._highlight_visible_matches()
+        except tk.TclError as e:
+            if self.running:
+                self._safe_print(f"Tkinter error searching output: {e}")
+    
+    def _highlight_visible_matches(self) -> None:
+        """Highlight matches on the lines currently in view"""
+        self._find_refresh_pending = False
+        try:
+            self.text_area.tag_remove("find_match", "1.0", tk.END)
+            pattern = self._current_find_pattern() if self._find_visible else None
+            if pattern is None:
+                return
+            
+            first = int(self.text_area.index("@0,0").split('.')[0]) - 1
+            last = int(self.text_area.index(f"@0,{self.text_area.winfo_height()}").split('.')[0]) - 1
+            ranges: List[str] = []
+            for line, col, length in self._line_index.find_all(pattern, first, last):
+                ranges.extend((f"{line + 1}.{col}", f"{line + 1}.{col + length}"))
+            if ranges:
+                self.text_area.tag_add("find_match", *ranges)
+            
+            # Keep highlights above colour tags created later
+            self.text_area.tag_raise("find_match")
+            self.text_area.tag_raise("find_current")
+        except tk.TclError as e:
+            if self.running:
+                self._safe_print(f"Tkinter error highlighting matches: {e}")
+    
+    def set_filter(self, pattern: Optional[str], regex: bool = True, match_case: bool = True) -> None:
+        """Thread-safe live filter: show only lines matching pattern (None or "" shows everything)"""
+        compiled = None
+        if pattern:
+            compiled = re.compile(pattern if regex else re.escape(pattern),
+                                  re.MULTILINE if match_case else re.MULTILINE | re.IGNORECASE)
+        
+        def _set_filter():
+            try:
+                if self._frame_lines is not None:
+                    self._leave_frame()
+                self._filter_pattern = compiled
+                self._render_history()
+            except tk.TclError as e:
+                if self.running:
+                    self._safe_print(f"Tkinter error applying filter: {e}")
+        
+        if self.running:
+            self._call_soon(_set_filter)
+    
+    def clear_filter(self) -> None:
+        """Thread-safe: show the full output again"""
+        self.set_filter(None)
+    
+    def _ask_filter(self) -> None:
+        """Prompt for a filter pattern (View menu)"""
+        current = self._filter_pattern.pattern if self._filter_pattern is not None else ""
+        pattern = simpledialog.askstring("Filter Output", "Show only lines matching (regex):",
+                                         initialvalue=current, parent=self.root)
+        if pattern is None:
+            return
+        try:
+            self.set_filter(pattern)
+        except re.error as e:
+            self._safe_print(f"Invalid filter pattern: {e}")
+    
+    def _render_history(self) -> None:
+        """Redraw text_area from the history, through the filter if one is set (Tk thread)"""
+        history = self._history
+        self._reset_view()
+        
+        # The last history line is still open, so it is shown only without a filter
+        if self._filter_pattern is None:
+            lines = list(range(len(history) - 1))
+            self._filter_matches = 0
+        else:
+            lines = history.matching_lines(self._filter_pattern, len(history) - 2)
+            self._filter_matches = len(lines)
+        runs = history.line_runs(lines)
+        if self._filter_pattern is None:
+            runs.extend(history.runs[-1])
+        
+        self.text_area.config(state=tk.NORMAL)
+        self._render_output(runs)
+        self.text_area.config(state=tk.DISABLED)
+        self._update_filter_indicator()
+        self._scroll_to_end()
+    
+    def _update_filter_indicator(self) -> None:
+        """Show the active filter and its match count"""
+        if self._filter_pattern is not None:
+            plural = "" if self._filter_matches == 1 else "s"
+            self.filter_label.config(
+                text=f" filter: {self._filter_pattern.pattern} ({self._filter_matches} line{plural}) \u2715 ")
+            self.filter_label.place(relx=1.0, rely=0.0, anchor=tk.NE, x=-4, y=4)
+        else:
+            self.filter_label.place_forget()
+    
+    def export(self, path: str, format: str = "text") -> threading.Thread:
+        """Stream the output history to path as "text", "ansi" or "html" from a background thread"""
+        if format not in _EXPORT_FORMATS:
+            raise ValueError(f"format must be one of {_EXPORT_FORMATS}, not {format!r}")
+        
+        # Snapshot on the Tk thread, after the output queued before this call: complete
+        # lines never change, only the open last line is copied
+        snapshot: List[Any] = []
+        taken = threading.Event()
+        
+        def _snapshot():
+            runs = self._history.runs
+            snapshot[:] = [runs, len(runs) - 1, list(runs[-1])]
+            taken.set()
+        
+        def _write():
+            while not taken.wait(0.1):
+                if not self.running:
+                    # Closed before the snapshot ran: nothing more will arrive
+                    _snapshot()
+            try:
+                with open(path, 'w', encoding='utf-8', newline='') as f:
+                    self._write_export(f, format, *snapshot)
+            except (IOError, OSError) as e:
+                self._safe_print(f"Error exporting output: {e}")
+            except Exception as e:
+                self._safe_print(f"Unexpected error exporting output: {e}")
+        
+        # Not a daemon: closing the window must not cut the file short
+        thread = threading.Thread(target=_write, name="py2gui-export")
+        thread.start()
+        if threading.get_ident() == self._tk_thread:
+            # Joining the thread here must not wait on this thread's own queue
+            _snapshot()
+        else:
+            self._call_soon(_snapshot)
+        return thread
+    
+    def _ask_export(self) -> None:
+        """Ask for a file and export the output (File menu)"""
+        path = filedialog.asksaveasfilename(
+            parent=self.root,
+            title="Save Output As",
+            defaultextension=".txt",
+            filetypes=[("Text", "*.txt"), ("ANSI text", "*.ans"), ("HTML", "*.html"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        extension = os.path.splitext(path)[1].lower()
+        if extension in (".html", ".htm"):
+            self.export(path, "html")
+        elif extension in (".ans", ".ansi"):
+            self.export(path, "ansi")
+        else:
+            self.export(path, "text")
+    
+    def _write_export(self, f: Any, format: str, runs: List[List[Run]], count: int,
+                      last_line: List[Run]) -> None:
+        """Write lines chunk by chunk so memory stays bounded"""
+        styles: Dict[Tuple[str, ...], Tuple[str, str]] = {}
+        if format == "html":
+            colors = html.escape(f"background:{self.theme['background']};color:{self.theme['foreground']}",
+                                 quote=True)
+            f.write('<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"><title>Py2GUI output</title></head>\n'
+                    f'<body style="{colors}">\n'
+                    '<pre style="font-family:Courier,monospace;font-size:10pt">\n')
+        
+        chunk: List[str] = []
+        for index in range(count + 1):
+            line = runs[index] if index < count else last_line
+            parts = []
+            for run_text, tags in line:
+                if format == "text":
+                    parts.append(run_text)
+                    continue
+                style = styles.get(tags)
+                if style is None:
+                    codes, css = self._export_style(tags)
+                    style = styles[tags] = (codes, html.escape(css, quote=True))
+                codes, css = style
+                if format == "ansi":
+                    parts.append(f"\x1b[{codes}m{run_text}\x1b[0m" if codes else run_text)
+                elif css:
+                    parts.append(f'<span style="{css}">{html.escape(run_text)}</span>')
+                else:
+                    parts.append(html.escape(run_text))
+            if index < count:
+                parts.append("\n")
+            chunk.append("".join(parts))
+            
+            if len(chunk) >= _EXPORT_CHUNK_LINES:
+                f.write("".join(chunk))
+                chunk.clear()
+        f.write("".join(chunk))
+        
+        if format == "html":
+            f.write('</pre>\n</body>\n</html>\n')
+    
+    def _export_style(self, tags: Tuple[str, ...]) -> Tuple[str, str]:
+        """Turn text tags back into an SGR parameter string and an inline CSS style"""
+        codes: List[str] = []
+        css: List[str] = []
+        decorations: List[str] = []
+        for tag in tags:
+            if tag.startswith('ansi_'):
+                code = tag[5:]
+                codes.append(code)
+                color = _ansi_color(code, self.ansi_colors)
+                if color:
+                    css.append(f"background:{color}" if _is_background(code) else f"color:{color}")
+            elif tag.startswith(('custom_fg_', 'custom_bg_')):
+                color = tag[10:]
+                background = tag.startswith('custom_bg_')
+                css.append(f"background:{color}" if background else f"color:{color}")
+                rgb = self._hex_to_rgb(self.color_name_to_hex.get(color.lower(), color))
+                if rgb:
+                    codes.append(f"{48 if background else 38};2;{rgb[0]};{rgb[1]};{rgb[2]}")
+            elif tag.startswith('font_'):
+                family, size, style = tag[5:].rsplit('_', 2)
+                # Quoted as a CSS string; the caller escapes the whole style for HTML
+                family = re.sub(r'[\x00-\x1f\\\'"]', lambda m: f"\\{ord(m.group()):x} ", family)
+                css.append(f"font-family:'{family}';font-size:{size}pt")
+                if 'bold' in style:
+                    codes.append('1')
+                    css.append('font-weight:bold')
+                if 'italic' in style:
+                    codes.append('3')
+                    css.append('font-style:italic')
+            elif tag in _STYLE_TAG_CODES:
+                codes.append(_STYLE_TAG_CODES[tag])
+                if tag in ('underline', 'strikethrough'):
+                    decorations.append(_STYLE_TAG_CSS[tag].split(':')[1])
+                elif tag == 'reverse':
+                    css.append(f"color:{self.theme['background']};background:{self.theme['foreground']}")
+                else:
+                    css.append(_STYLE_TAG_CSS[tag])
+        if decorations:
+            css.append(f"text-decoration:{' '.join(decorations)}")
+        return ";".join(codes), ";".join(css)
+    
+    @staticmethod
+    def _hex_to_rgb(color: str) -> Optional[Tuple[int, int, int]]:
+        """Parse #rgb or #rrggbb"""
+        if re.fullmatch(r'#[0-9a-fA-F]{6}', color):
+            return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+        if re.fullmatch(r'#[0-9a-fA-F]{3}', color):
+            return int(color[1] * 2, 16), int(color[2] * 2, 16), int(color[3] * 2, 16)
+        return None
+    
+    def add_sink(self, sink: Any, strip_ansi: Optional[bool] = None) -> None:
+        """Also write all output to sink: a file path (appended to) or a writable stream
+        
+        Writes happen on a background thread in batches. ANSI escapes are stripped
+        unless the stream is a terminal; pass strip_ansi to override.
+        """
+        self._sink_writer.add(sink, strip_ansi)
     
-    def _process_escape_sequences(self, text: str) -> str:
-        """Process escape sequences like \n, \t, etc."""
-        # Replace common escape sequences
-        replacements = {
-            '\\n': '\n',
-            '\\t': '\t',
-            '\\r': '\r',
-            '\\b': '\b',
-            '\\f': '\f',
-            '\\v': '\v',
-            '\\\\': '\\',
-            '\\"': '"',
-            "\\'": "'"
-        }
+    def remove_sink(self, sink: Any) -> None:
+        """Stop writing output to sink"""
+        self._sink_writer.remove(sink)
+    
+    def listen(self, address: Any = None, backlog: int = 128) -> Any:
+        """Show output sent by other local processes; returns the address listened on
         
-        for esc_seq, char in replacements.items():
-            text = text.replace(esc_seq, char)
+        address is a Unix socket path, a port or (host, port), or a "host:port" string;
+        by default a free port on 127.0.0.1. Processes write with py2gui.ipc.Client, and
+        messages naming a pane go to a window of that name, opened on first use. One
+        thread serves every connection.
+        """
+        from .ipc import Listener
         
-        return text
+        self.stop_listening()
+        self._listener = Listener(self, address, backlog)
+        return self._listener.address
     
-    def display_paragraph(self, text: str, parse_ansi: bool = True, font_family: Optional[str] = None, 
-                         font_size: Optional[int] = None, font_style: Optional[str] = None) -> None:
-        """Thread-safe display paragraph (no auto newline)"""
+    def stop_listening(self) -> None:
+        """Close the IPC endpoint and disconnect its clients"""
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.close()
+    
+    def start_mirror(self, address: Any = None) -> str:
+        """Mirror the output to web browsers; returns the URL of the page to open
+        
+        address is a port or (host, port), by default a free port on 127.0.0.1. Viewers
+        get the recent output (up to max_lines, or 10000 lines) with its colours and
+        styles, then new output as it arrives. The mirror is fed by the sink thread and
+        serves viewers from a thread of its own, so viewers add no work to the GUI.
+        Like other sinks it does not receive display_frame() output.
+        """
+        from .mirror import Mirror
+        
+        self.stop_mirror()
+        limit = self.max_lines or _MIRROR_LINES
+        mirror = self._mirror = Mirror(self.title, self.theme, address, limit)
+        
+        # Output from here on reaches the mirror as a sink; what the window already
+        # holds is rendered on the Tk thread, after the updates queued before this call
+        self.add_sink(mirror, strip_ansi=False)
+        
+        def _seed():
+            lines = self._history.runs[-limit:]
+            styles: Dict[Tuple[str, ...], Tuple[str, str]] = {}
+            parts: List[str] = []
+            for index, line in enumerate(lines):
+                for run_text, tags in line:
+                    style = styles.get(tags)
+                    if style is None:
+                        style = styles[tags] = self._export_style(tags)
+                    codes = style[0]
+                    parts.append(f"\x1b[{codes}m{run_text}\x1b[0m" if codes else run_text)
+                if index < len(lines) - 1:
+                    parts.append("\n")
+            mirror.seed("".join(parts))
+        
+        self._call_soon(_seed)
+        return mirror.url
+    
+    def stop_mirror(self) -> None:
+        """Stop the browser mirror and disconnect its viewers"""
+        mirror, self._mirror = self._mirror, None
+        if mirror is not None:
+            self.remove_sink(mirror)
+            mirror.close()
+    
+    def _tee(self, text: str) -> None:
+        """Hand output text to the sinks and the session recorder (caller thread)"""
+        self._sink_writer.write(text)
+        if self._recorder is not None:
+            self._recorder.output(text)
+    
+    def _colored_ansi(self, text: str, fg_color: Optional[str], bg_color: Optional[str], bold: bool,
+                      underline: bool, italic: bool, strikethrough: bool, reverse: bool) -> str:
+        """Express display_colored arguments as SGR-wrapped text for sinks and recordings"""
+        codes = []
+        for color, base in ((fg_color, 38), (bg_color, 48)):
+            if not color:
+                continue
+            if color.isdigit() or color.startswith(f"{base};"):
+                codes.append(color)
+                continue
+            rgb = self._hex_to_rgb(self.color_name_to_hex.get(color.lower(), color))
+            if rgb:
+                codes.append(f"{base};2;{rgb[0]};{rgb[1]};{rgb[2]}")
+        for enabled, code in ((bold, '1'), (italic, '3'), (underline, '4'), (reverse, '7'), (strikethrough, '9')):
+            if enabled:
+                codes.append(code)
+        return f"\x1b[{';'.join(codes)}m{text}\x1b[0m" if codes else text
+    
+    def write(self, text: str, parse_ansi: bool = True) -> None:
+        """Thread-safe raw write: text as-is, no newline added and no escape processing"""
+        called = time.perf_counter()
         def _update():
             try:
                 self.text_area.config(state=tk.NORMAL)
-                
-                # Process escape sequences
-                text_processed = self._process_escape_sequences(text)
-                
-                # Check custom font settings
-                font_tags = []
-                if font_family or font_size or font_style:
-                    # Create unique tag for font combination
-                    font_family_val = font_family or "Courier"
-                    font_size_val = font_size or 10
-                    font_style_val = font_style or "normal"
-                    font_key = f"font_{font_family_val}_{font_size_val}_{font_style_val}"
-                    
-                    if font_key not in self.tag_names:
-                        self.text_area.tag_configure(font_key, 
-                                                     font=(font_family_val, font_size_val, font_style_val))
-                        self.tag_names.add(font_key)
-                    font_tags.append(font_key)
-                
-                if parse_ansi and ('\x1b[' in text_processed or '\033[' in text_processed):
-                    # Parse and apply ANSI colors
-                    parts = self._parse_ansi_codes(text_processed)
-                    
-                    for part_text, codes in parts:
-                        tags = self._get_tags_for_codes(codes)
-                        
-                        # Add font tags (if specified)
-                        if font_tags:
-                            tags = font_tags + tags
-                        
-                        # Insert text and apply tags
-                        self.text_area.insert(tk.END, part_text, tuple(tags))
+                if self._uses_screen(text, parse_ansi):
+                    self._screen_write(text, parse_ansi)
+                elif parse_ansi and '\x1b[' in text:
+                    self._insert_output(self._styled_runs(text))
                 else:
-                    # Normal text
-                    tags = ['default']
-                    if font_tags:
-                        tags = font_tags
-                    self.text_area.insert(tk.END, text_processed, tuple(tags))
-                
+                    self._insert_output([(text, ('default',))])
                 self.text_area.config(state=tk.DISABLED)
-                self.text_area.see(tk.END)
             except tk.TclError as e:
                 if self.running:
-                    self._safe_print(f"Tkinter error in display_paragraph: {e}")
+                    self._safe_print(f"Tkinter error in write: {e}")
             except Exception as e:
                 if self.running:
-                    self._safe_print(f"Error in display_paragraph: {e}")
+                    self._safe_print(f"Error in write: {e}")
         
         if self.running:
-            self.root.after(0, _update)
+            self._tee(text)
+            self._schedule_output(_update, called)
     
-    def display(self, text: str, parse_ansi: bool = True, font_family: Optional[str] = None, 
-               font_size: Optional[int] = None, font_style: Optional[str] = None) -> None:
-        """Thread-safe display text (auto newline)"""
-        def _update():
-            try:
-                self.text_area.config(state=tk.NORMAL)
-                
-                # Check custom font settings
-                font_tags = []
-                if font_family or font_size or font_style:
-                    # Create unique tag for font combination
-                    font_family_val = font_family or "Courier"
-                    font_size_val = font_size or 10
-                    font_style_val = font_style or "normal"
-                    font_key = f"font_{font_family_val}_{font_size_val}_{font_style_val}"
-                    
-                    if font_key not in self.tag_names:
-                        self.text_area.tag_configure(font_key, 
-                                                     font=(font_family_val, font_size_val, font_style_val))
-                        self.tag_names.add(font_key)
-                    font_tags.append(font_key)
-                
-                if parse_ansi and ('\x1b[' in str(text) or '\033[' in str(text)):
-                    # Parse and apply ANSI colors
-                    parts = self._parse_ansi_codes(str(text))
-                    
-                    for part_text, codes in parts:
-                        tags = self._get_tags_for_codes(codes)
-                        
-                        # Add font tags (if specified)
-                        if font_tags:
-                            tags = font_tags + tags
-                        
-                        # Insert text and apply tags
-                        self.text_area.insert(tk.END, part_text, tuple(tags))
-                    
-                    # Add newline
-                    if font_tags:
-                        self.text_area.insert(tk.END, "\n", tuple(font_tags))
-                    else:
-                        self.text_area.insert(tk.END, "\n", 'default')
-                else:
-                    # Normal text
-                    tags = ['default']
-                    if font_tags:
-                        tags = font_tags
-                    self.text_area.insert(tk.END, str(text) + "\n", tuple(tags))
-                
-                self.text_area.config(state=tk.DISABLED)
-                self.text_area.see(tk.END)
-            except tk.TclError as e:
-                if self.running:
-                    self._safe_print(f"Tkinter error in display: {e}")
-            except Exception as e:
-                if self.running:
-                    self._safe_print(f"Error in display: {e}")
+    def start_recording(self, path: str, title: Optional[str] = None) -> None:
+        """Record all output and input to path as an asciicast v2 file"""
+        self.stop_recording()
+        self._recorder = _Recorder(path, self.width, self.height, title or self.title, self._safe_print)
+    
+    def stop_recording(self) -> None:
+        """Finish the current recording, if any"""
+        recorder, self._recorder = self._recorder, None
+        if recorder is not None:
+            recorder.close()
+    
+    def replay(self, path: str, speed: Optional[float] = 1.0) -> Dict[str, float]:
+        """Play an asciicast recording into this window; blocks, so call it from the worker
+        
+        speed scales the recorded timing (2.0 plays twice as fast); None or 0 plays at
+        max speed. Returns event/byte counts and the seconds taken until the last chunk
+        was rendered, which makes max-speed replay a rendering benchmark.
+        """
+        events = 0
+        chunk_bytes = 0
+        start = time.monotonic()
+        with open(path, 'r', encoding='utf-8') as f:
+            f.readline()  # Header
+            for line in f:
+                if not self.running:
+                    break
+                if not line.strip():
+                    continue
+                timestamp, code, data = json.loads(line)
+                if speed:
+                    delay = start + timestamp / speed - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                if code == "o":
+                    self.write(data.replace("\r\n", "\n"))
+                    chunk_bytes += len(data)
+                elif code == "m" and data == "clear":
+                    self.clear()
+                events += 1
         
+        # Wait until the GUI has drawn everything that was queued
+        rendered = threading.Event()
         if self.running:
-            self.root.after(0, _update)
+            self._call_soon(lambda: self.root.after_idle(rendered.set))
+            while self.running and not rendered.wait(0.1):
+                pass
+        return {"events": events, "bytes": chunk_bytes, "seconds": time.monotonic() - start}
     
-    def display_colored(self, text: str, fg_color: Optional[str] = None, bg_color: Optional[str] = None, 
-                       bold: bool = False, underline: bool = False, italic: bool = False,
-                       strikethrough: bool = False, reverse: bool = False,
-                       font_family: Optional[str] = None, font_size: Optional[int] = None, 
-                       font_style: Optional[str] = None) -> None:
-        """Directly display colored text"""
-        def _update():
+    def set_input_source(self, source: Any, delay: float = 0.0) -> Optional[ScriptedInput]:
+        """Answer user_type_in/user_write from a script: a file path, an iterable of lines
+        or a callable taking the prompt. Falls back to the human once the script runs out.
+        Pass None to go back to interactive input.
+        """
+        if source is None or isinstance(source, ScriptedInput):
+            self.input_source = source
+        else:
+            self.input_source = ScriptedInput(source, delay)
+        return self.input_source
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of output performance counters and latency histograms
+        
+        latency runs from a display call to its text being inserted, parse and insert
+        time the ANSI parser and the Tk insert call; queue_depth counts output handed to
+        the Tk thread but not yet applied.
+        """
+        metrics = self._metrics
+        lines_per_sec, chars_per_sec = metrics.rates()
+        return {
+            "uptime": time.perf_counter() - metrics.started,
+            "queue_depth": max(metrics.submitted - metrics.delivered, 0),
+            "max_queue_depth": metrics.max_queue_depth,
+            "updates": metrics.delivered,
+            "sink_backlog": self._sink_writer.backlog(),
+            "latency": metrics.latency.summary(),
+            "parse": metrics.parse.summary(),
+            "insert": metrics.insert.summary(),
+            "lines": metrics.lines,
+            "chars": metrics.chars,
+            "lines_per_sec": lines_per_sec,
+            "chars_per_sec": chars_per_sec,
+            "tags": len(self.tag_names),
+            "scrollback_lines": len(self._history),
+            "loop_lag": metrics.loop_lag.summary(),
+            "startup_ms": {name: seconds * 1000 for name, seconds in self.startup_times.items()},
+            "stalls": self._watchdog.stalls if self._watchdog is not None else 0,
+        }
+    
+    def start_watchdog(self, threshold: float = 0.25, log: Any = None, interval: float = 0.05) -> None:
+        """Log the GUI thread's stack whenever the event loop stalls for threshold seconds
+        
+        log is a path (appended to) or a stream, stderr by default. Loop lag measured by
+        the heartbeat every interval seconds shows up in metrics().
+        """
+        self.stop_watchdog()
+        self._watchdog = _Watchdog(self.root, threshold, interval, log, self._metrics.loop_lag,
+                                   self._safe_print)
+        self._watchdog.start()
+    
+    def stop_watchdog(self) -> None:
+        """Stop the stall watchdog"""
+        if self._watchdog is not None:
+            self._watchdog.stop()
+            self._watchdog = None
+    
+    def start_trace(self, path: str, capacity: int = _TRACE_CAPACITY) -> None:
+        """Record a timeline of py2gui internals, written to path by stop_trace()
+        
+        The file is Chrome trace-event JSON for chrome://tracing or ui.perfetto.dev. Only
+        the last capacity spans are kept.
+        """
+        self.stop_trace()
+        self._trace_path = path
+        self._tracer = _Tracer(capacity)
+    
+    def stop_trace(self) -> int:
+        """Stop tracing and write the trace file; returns the number of spans written"""
+        tracer, self._tracer = self._tracer, None
+        if tracer is None or self._trace_path is None:
+            return 0
+        try:
+            return tracer.write(self._trace_path)
+        except OSError as e:
+            self._safe_print(f"Error writing trace file: {e}")
+            return 0
+    
+    def start_tcl_accounting(self) -> None:
+        """Debug mode: count and time every Python-to-Tcl call, per Py2GUI method
+        
+        The interpreter of every widget and Tk variable of this window, and of the
+        shared root that schedules its updates, is swapped for a counting wrapper, so
+        this slows the GUI down noticeably; use it to compare call counts, not absolute
+        speed. Calls made through the shared root count for every window accounting.
+        """
+        if self._tcl_counter is not None:
+            return
+        tkapp = self.root.tk
+        if isinstance(tkapp, _TclFanout):
+            tkapp = tkapp.tkapp  # Opened while another window was counting
+        counter = _TclCounter(tkapp, _TclCounter.operations_of(type(self)))
+        self._swap_interpreter(counter, tkapp, self.root.tk)
+        _count_shared_calls(counter)
+        self._tcl_counter = counter
+    
+    def stop_tcl_accounting(self) -> Dict[str, Dict[str, Any]]:
+        """Restore the plain interpreter and return the final tcl_stats()"""
+        stats = self.tcl_stats()
+        counter, self._tcl_counter = self._tcl_counter, None
+        if counter is not None:
+            counter.active = False
+            _uncount_shared_calls(counter)
+            self._swap_interpreter(counter.tkapp, counter)
+        return stats
+    
+    def tcl_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Tcl calls, seconds and calls per Tcl command for each Py2GUI method, costliest first"""
+        counter = self._tcl_counter
+        if counter is None:
+            return {}
+        stats = {}
+        for operation, (calls, seconds) in sorted(counter.stats.items(), key=lambda item: -item[1][1]):
+            commands = counter.commands.get(operation, {})
+            stats[operation] = {
+                "calls": calls,
+                "seconds": seconds,
+                "commands": dict(sorted(commands.items(), key=lambda item: -item[1])),
+            }
+        return stats
+    
+    def _swap_interpreter(self, new: Any, *old: Any) -> None:
+        """Point every widget and Tk variable of this window that uses an interpreter in old at new"""
+        try:
+            widgets = [self.root]
+            while widgets:
+                widget = widgets.pop()
+                if any(widget.tk is tkapp for tkapp in old):
+                    widget.tk = new
+                widgets.extend(widget.children.values())
+            for value in vars(self).values():
+                if isinstance(value, tk.Variable) and any(value._tk is tkapp for tkapp in old):
+                    value._tk = new
+        except tk.TclError as e:
+            self._safe_print(f"Tkinter error switching Tcl accounting: {e}")
+    
+    def start_profile(self, path: Optional[str] = None, interval: float = _PROFILE_INTERVAL) -> None:
+        """Sample the worker thread started by run() and the GUI thread until stop_profile()
+        
+        Each thread is saved to its own pstats file next to path, e.g. app.worker.pstats
+        and app.gui.pstats for path "app.pstats"; by default a timestamped name in the
+        current directory is used.
+        """
+        self.stop_profile()
+        self._profile_path = path or time.strftime("py2gui-%Y%m%d-%H%M%S.pstats")
+        threads = {"gui": self._tk_thread}
+        if self._worker_thread is not None:
+            threads["worker"] = self._worker_thread
+        self._sampler = _Sampler(threads, interval)
+        self._sampler.start()
+        if self.running:
+            self._call_soon(lambda: self.profile_var.set(True))
+    
+    def stop_profile(self) -> List[str]:
+        """Stop profiling and save the pstats files; returns their paths"""
+        sampler, self._sampler = self._sampler, None
+        if sampler is None or self._profile_path is None:
+            return []
+        sampler.stop()
+        if self.running:
+            self._call_soon(lambda: self.profile_var.set(False))
+        
+        base, ext = os.path.splitext(self._profile_path)
+        paths = []
+        for label in sampler.threads:
+            path = f"{base}.{label}{ext or '.pstats'}"
             try:
-                self.text_area.config(state=tk.NORMAL)
-                
-                tags = ['default']
-                
-                # Process foreground color
-                if fg_color is not None and fg_color != "":
-                    fg_color_lower = fg_color.lower()
-                    if fg_color_lower in self.color_name_to_hex:
-                        color_value = self.color_name_to_hex[fg_color_lower]
-                        custom_fg_tag = f"custom_fg_{color_value}"
-                        tags.append(custom_fg_tag)
-                        if custom_fg_tag not in self.tag_names:
-                            self.text_area.tag_configure(custom_fg_tag, foreground=color_value)
-                            self.tag_names.add(custom_fg_tag)
-                    elif fg_color.isdigit():
-                        # ANSI code
-                        if ('disabled_colors' not in self.config or 
-                            fg_color not in self.config.get('disabled_colors', [])):
-                            if fg_color in self.ansi_colors:
-                                tags.append(f"ansi_{fg_color}")
-                    elif fg_color.startswith('#') and len(fg_color) in [4, 5, 7, 9]:
-                        # Hex color
-                        color_value = fg_color
-                        custom_fg_tag = f"custom_fg_{color_value}"
-                        tags.append(custom_fg_tag)
-                        if custom_fg_tag not in self.tag_names:
-                            self.text_area.tag_configure(custom_fg_tag, foreground=color_value)
-                            self.tag_names.add(custom_fg_tag)
-                    elif ';' in fg_color and fg_color.startswith('38;'):
-                        # Extended ANSI color codes
-                        if fg_color in self.ansi_colors:
-                            tags.append(f"ansi_{fg_color}")
-                    else:
-                        # Try named color
-                        try:
-                            if fg_color.strip():
-                                self.text_area.tag_configure(f"custom_fg_{fg_color}", foreground=fg_color)
-                                tags.append(f"custom_fg_{fg_color}")
-                                self.tag_names.add(f"custom_fg_{fg_color}")
-                        except tk.TclError:
-                            pass
-                
-                # Process background color
-                if bg_color is not None and bg_color != "":
-                    bg_color_lower = bg_color.lower()
-                    if bg_color_lower in self.color_name_to_hex:
-                        color_value = self.color_name_to_hex[bg_color_lower]
-                        custom_bg_tag = f"custom_bg_{color_value}"
-                        tags.append(custom_bg_tag)
-                        if custom_bg_tag not in self.tag_names:
-                            self.text_area.tag_configure(custom_bg_tag, background=color_value)
-                            self.tag_names.add(custom_bg_tag)
-                    elif bg_color.isdigit():
-                        # ANSI code
-                        if ('disabled_colors' not in self.config or 
-                            bg_color not in self.config.get('disabled_colors', [])):
-                            if bg_color in self.ansi_colors:
-                                tags.append(f"ansi_{bg_color}")
-                    elif bg_color.startswith('#') and len(bg_color) in [4, 5, 7, 9]:
-                        # Hex color
-                        color_value = bg_color
-                        custom_bg_tag = f"custom_bg_{color_value}"
-                        tags.append(custom_bg_tag)
-                        if custom_bg_tag not in self.tag_names:
-                            self.text_area.tag_configure(custom_bg_tag, background=color_value)
-                            self.tag_names.add(custom_bg_tag)
-                    elif ';' in bg_color and bg_color.startswith('48;'):
-                        # Extended ANSI color codes
-                        if bg_color in self.ansi_colors:
-                            tags.append(f"ansi_{bg_color}")
-                    else:
-                        # Try named color
-                        try:
-                            if bg_color.strip():
-                                self.text_area.tag_configure(f"custom_bg_{bg_color}", background=bg_color)
-                                tags.append(f"custom_bg_{bg_color}")
-                                self.tag_names.add(f"custom_bg_{bg_color}")
-                        except tk.TclError:
-                            pass
-                
-                # Process font
-                if font_family or font_size or font_style:
-                    font_family_val = font_family or "Courier"
-                    font_size_val = font_size or 10
-                    font_style_val = font_style or "normal"
-                    font_key = f"font_{font_family_val}_{font_size_val}_{font_style_val}"
-                    
-                    if font_key not in self.tag_names:
-                        self.text_area.tag_configure(font_key, 
-                                                     font=(font_family_val, font_size_val, font_style_val))
-                        self.tag_names.add(font_key)
-                    tags.append(font_key)
-                
-                # Process styles
-                if bold:
-                    tags.append('bold')
-                if underline:
-                    tags.append('underline')
-                if italic:
-                    tags.append('italic')
-                if strikethrough:
-                    tags.append('strikethrough')
-                if reverse:
-                    tags.append('reverse')
-                
-                self.text_area.insert(tk.END, str(text) + "\n", tuple(tags))
-                self.text_area.config(state=tk.DISABLED)
-                self.text_area.see(tk.END)
-            except tk.TclError as e:
-                if self.running:
-                    self._safe_print(f"Tkinter error in display_colored: {e}")
-            except Exception as e:
-                if self.running:
-                    self._safe_print(f"Error in display_colored: {e}")
+                sampler.write(label, path)
+                paths.append(path)
+            except OSError as e:
+                self._safe_print(f"Error writing profile: {e}")
+        return paths
+    
+    def _toggle_profile(self) -> None:
+        """Debug > Profile: start or stop profiling, reporting the saved files on stderr"""
+        if self.profile_var.get():
+            self.start_profile()
+        else:
+            for path in self.stop_profile():
+                self._safe_print(f"Profile saved to {path}")
+    
+    def show_metrics(self, visible: bool = True) -> None:
+        """Thread-safe toggle of the live metrics overlay"""
+        def _show_metrics():
+            was_visible = self._metrics_visible
+            self._metrics_visible = visible
+            self.metrics_var.set(visible)
+            if not visible:
+                self.metrics_label.place_forget()
+            elif not was_visible:
+                self._refresh_metrics()
         
         if self.running:
-            self.root.after(0, _update)
+            self._call_soon(_show_metrics)
+    
+    def _refresh_metrics(self) -> None:
+        """Redraw the metrics overlay and schedule the next refresh (Tk thread)"""
+        if not self._metrics_visible or not self.running:
+            return
+        m = self.metrics()
+        
+        def _times(name: str, label: Optional[str] = None) -> str:
+            h = m[name]
+            return f"{label or name:<8}p50 {h['p50_ms']:7.2f}  p99 {h['p99_ms']:7.2f}  max {h['max_ms']:7.2f} ms"
+        
+        text = "\n".join((
+            f"queue   {m['queue_depth']:>6} (max {m['max_queue_depth']})  sinks {m['sink_backlog']}",
+            _times("latency"),
+            _times("parse"),
+            _times("insert"),
+            _times("loop_lag", "loop lag") if m["loop_lag"]["count"] else f"stalls  {m['stalls']:>6}",
+            f"rate    {m['lines_per_sec']:>8.0f} lines/s {m['chars_per_sec']:>10.0f} chars/s",
+            f"tags    {m['tags']:>6}  scrollback {m['scrollback_lines']} lines",
+            f"startup init {m['startup_ms'].get('init', 0):.0f} ms, "
+            f"first paint {m['startup_ms'].get('first_paint', 0):.0f} ms",
+        ))
+        try:
+            self.metrics_label.config(text=text)
+            self.metrics_label.place(relx=1.0, rely=0.0, anchor=tk.NE, x=-4, y=4)
+        except tk.TclError:
+            return
+        self.root.after(_METRICS_REFRESH_MS, self._refresh_metrics)
     
     def _demo_colors(self) -> None:
         """Display ANSI color demo"""
@@ -703,36 +3721,56 @@ class Py2GUI:
         for text, parse_ansi in demo_texts:
             self.display(text, parse_ansi)
     
+    @property
+    def available_themes(self) -> Dict[str, Dict[str, Any]]:
+        """Theme definitions by name: the built-in ones plus those defined in the config"""
+        return {**_THEMES, **self.config.themes}
+    
     def set_theme(self, theme_name: str) -> None:
-        """Set theme"""
-        def _set_theme():
-            try:
-                if theme_name == "dark":
-                    self.text_area.config(bg="black", fg="white", insertbackground="white")
-                    self.text_area.tag_configure("default", foreground="white", background="black")
-                elif theme_name == "light":
-                    self.text_area.config(bg="white", fg="black", insertbackground="black")
-                    self.text_area.tag_configure("default", foreground="black", background="white")
-                elif theme_name == "matrix":
-                    self.text_area.config(bg="black", fg="#00ff00", insertbackground="#00ff00")
-                    self.text_area.tag_configure("default", foreground="#00ff00", background="black")
-                else:  # Default theme
-                    self.text_area.config(bg="black", fg="white", insertbackground="white")
-                    self.text_area.tag_configure("default", foreground="white", background="black")
-                
-                self.text_area.see(tk.END)
-            except tk.TclError as e:
-                if self.running:
-                    self._safe_print(f"Tkinter error setting theme: {e}")
-        
+        """Thread-safe: switch to a built-in or configured theme"""
         if self.running:
-            self.root.after(0, _set_theme)
+            self._call_soon(lambda: self._apply_theme(theme_name))
+    
+    def _apply_theme(self, theme_name: str) -> None:
+        """Recolor the window by reconfiguring widgets and existing tags only (Tk thread)
+        
+        Colored text keeps its ansi_* tags and only the tag colors change, so switching
+        costs one call per tag however much output there is.
+        """
+        theme = self.available_themes.get(theme_name)
+        if theme is None:
+            self._safe_print(f"Unknown theme {theme_name!r}, using the default theme")
+            theme_name, theme = "default", _THEMES["default"]
+        theme = _complete_theme(theme)
+        background, foreground, cursor = theme["background"], theme["foreground"], theme["cursor"]
+        try:
+            self.text_area.config(bg=background, fg=foreground, insertbackground=cursor)
+            self.text_area.tag_configure("default", foreground=foreground, background=background)
+            self.text_area.tag_configure("reverse", foreground=background, background=foreground)
+            self.input_label.config(fg=foreground, bg=background)
+            self.input_entry.config(fg=foreground, bg=background, insertbackground=cursor)
+            
+            self.theme_name = theme_name
+            self.theme = theme
+            self.ansi_colors = _theme_colors(theme)
+            for tag in self.tag_names:
+                if tag.startswith("ansi_"):
+                    self._configure_ansi_tag(tag[5:])
+        except tk.TclError as e:
+            if self.running:
+                self._safe_print(f"Tkinter error setting theme {theme_name!r}: {e}")
     
     def user_write(self, prompt: str = "Input:") -> Optional[str]:
         """Thread-safe input dialog (opens in new window)"""
         if not self.running:
             return None
         
+        # A scripted input source answers instead of the dialog
+        if self.input_source is not None:
+            scripted = self.input_source.next_line(prompt)
+            if scripted is not None:
+                return scripted
+        
         def _ask():
             try:
                 result = simpledialog.askstring("Input", prompt, parent=self.root)
@@ -743,12 +3781,15 @@ class Py2GUI:
                 self._safe_print(f"Error in user_write dialog: {e}")
                 self.input_queue.put(None)
         
-        self.root.after(0, _ask)
+        self._call_soon(_ask)
         
         # Wait for input, but check if still running
+        waited = time.perf_counter()
         while self.running:
             try:
-                return self.input_queue.get(timeout=0.1)
+                result = self.input_queue.get(timeout=0.1)
+                self._trace("user_write wait", "input", waited)
+                return result
             except queue.Empty:
                 continue
         return None
@@ -757,6 +3798,13 @@ class Py2GUI:
         """Thread-safe terminal-style input (embedded in main window)"""
         if not self.running:
             return None
+        
+        # A scripted input source answers instead of the input field
+        if self.input_source is not None:
+            scripted = self.input_source.next_line(prompt)
+            if scripted is not None:
+                self._call_soon(lambda: self._echo_input(prompt, scripted))
+                return scripted
             
         def _prepare_input():
             try:
@@ -784,16 +3832,19 @@ class Py2GUI:
         
         # Prepare input field
         try:
-            self.root.after(0, _prepare_input)
+            self._call_soon(_prepare_input)
         except tk.TclError as e:
             if self.running:
                 self._safe_print(f"Tkinter error scheduling input preparation: {e}")
             return None
         
         # Block and wait for user input
+        waited = time.perf_counter()
         while self.running:
             try:
-                return self.type_in_queue.get(timeout=0.1)
+                result = self.type_in_queue.get(timeout=0.1)
+                self._trace("user_type_in wait", "input", waited)
+                return result
             except queue.Empty:
                 continue
         return None
@@ -813,10 +3864,7 @@ class Py2GUI:
                 self.type_in_queue.put(user_input)
                 
                 # Display user input in output area
-                self.text_area.config(state=tk.NORMAL)
-                self.text_area.insert(tk.END, f"{self.input_label.cget('text')}{user_input}\n", 'default')
-                self.text_area.config(state=tk.DISABLED)
-                self.text_area.see(tk.END)
+                self._echo_input(self.input_label.cget('text'), user_input)
                 
                 # Clear input field
                 self.input_var.set("")
@@ -827,6 +3875,20 @@ class Py2GUI:
             if self.running:
                 self._safe_print(f"Error sending input: {e}")
     
+    def _echo_input(self, prompt: str, user_input: str) -> None:
+        """Show a submitted input line in the output, like a terminal (Tk thread)"""
+        try:
+            echo = f"{prompt}{user_input}\n"
+            self._tee(echo)
+            if self._recorder is not None:
+                self._recorder.input(f"{user_input}\n")
+            self.text_area.config(state=tk.NORMAL)
+            self._insert_output([(echo, ('default',))])
+            self.text_area.config(state=tk.DISABLED)
+        except tk.TclError as e:
+            if self.running:
+                self._safe_print(f"Tkinter error echoing input: {e}")
+    
     def _clear_input(self) -> None:
         """Clear terminal-style input field"""
         try:
@@ -845,15 +3907,46 @@ class Py2GUI:
                 self._safe_print(f"Tkinter error focusing input: {e}")
     
     def clear(self) -> None:
-        """Clear output area"""
+        """Thread-safe: clear output area"""
+        if self._recorder is not None:
+            self._recorder.marker("clear")
+        self._sink_writer.marker("clear")
+        if self.running:
+            self._call_soon(self._clear)
+    
+    def _clear(self) -> None:
+        """Forget the history and empty the output area (Tk thread)"""
         try:
-            self.text_area.config(state=tk.NORMAL)
-            self.text_area.delete(1.0, tk.END)
-            self.text_area.config(state=tk.DISABLED)
+            self._history.reset()
+            self._reset_view()
+            self._update_filter_indicator()
         except tk.TclError as e:
             if self.running:
                 self._safe_print(f"Tkinter error clearing text: {e}")
     
+    def _reset_view(self) -> None:
+        """Empty text_area and everything that mirrors it; the history is kept"""
+        self.text_area.config(state=tk.NORMAL)
+        self.text_area.delete(1.0, tk.END)
+        self.text_area.config(state=tk.DISABLED)
+        
+        # Start over outside frame mode
+        self._frame_lines = None
+        self._screen = None
+        
+        # Forget the search index and hidden parts of truncated lines
+        self._line_index.reset()
+        self._find_match = None
+        for truncation in self._truncated:
+            self.text_area.mark_unset(truncation)
+        self._truncated.clear()
+        self._open_truncation = None
+        self._line_length = 0
+        
+        # Nothing left to catch up on
+        self._unseen_lines = 0
+        self._update_new_lines_indicator()
+    
     def copy_text(self) -> None:
         """Copy selected text"""
         try:
@@ -881,64 +3974,193 @@ class Py2GUI:
     def exit(self) -> None:
         """Exit GUI"""
         self.running = False
+        self.stop_recording()
+        self.stop_watchdog()
+        self.stop_trace()
+        self.stop_profile()
+        self.stop_tcl_accounting()
+        self.stop_listening()
+        self.stop_mirror()
+        self._sink_writer.close()
         try:
-            self.root.quit()
             self.root.destroy()
         except tk.TclError:
             pass  # Already destroyed
         except Exception as e:
             self._safe_print(f"Error exiting GUI: {e}")
+        _close_window(self)
+    
+    def open_window(self, title: str = "Py2GUI", **options: Any) -> "Py2GUI":
+        """
+        Thread-safe: open another window on this window's Tk root and event loop
+        Options are the constructor's. The window is built on the Tk thread; from other
+        threads this waits until it exists. Each window closes on its own, and run()
+        returns once the last one is closed.
+        """
+        if threading.get_ident() == self._tk_thread:
+            return Py2GUI(title, **options)
+        
+        opened: queue.Queue = queue.Queue()
+        
+        def _open():
+            try:
+                opened.put(Py2GUI(title, **options))
+            except Exception as e:
+                opened.put(e)
+        
+        self._call_soon(_open)
+        while True:
+            try:
+                gui = opened.get(timeout=0.1)
+            except queue.Empty:
+                if not self.running:
+                    raise RuntimeError("cannot open a window: the GUI has exited")
+                continue
+            if isinstance(gui, Exception):
+                raise gui
+            return gui
     
-    def run(self, func: Optional[Callable] = None, *args, **kwargs) -> Any:
+    def run(self, func: Optional[Callable] = None, *args, profile: Optional[str] = None, **kwargs) -> Any:
         """
         Run GUI and optional worker function
         Tkinter operations stay in main thread; logic runs in another thread
+        With profile (or the PY2GUI_PROFILE environment variable) set to a path, both
+        threads are profiled for the whole run (see start_profile())
         """
-        result_queue = queue.Queue()
+        worker = _start_worker(func, args, kwargs, self.display) if func else None
+        return self._main_loop(worker, profile)
+    
+    def _main_loop(self, worker: Optional[Tuple[threading.Thread, queue.Queue]],
+                   profile: Optional[str] = None) -> Any:
+        """Run mainloop on this thread, then return the result of the started worker"""
+        self._tk_thread = threading.get_ident()
+        profile = profile or os.environ.get("PY2GUI_PROFILE")
+        if worker is not None:
+            self._worker_thread = worker[0].ident
         
-        if func:
-            def worker():
-                try:
-                    result = func(*args, **kwargs)
-                    result_queue.put(result)
-                except Exception as e:
-                    self.display(f"Error: {e}\n{traceback.format_exc()}")
-                    result_queue.put(e)
-            thread = threading.Thread(target=worker, daemon=True)
-            thread.start()
+        if profile:
+            self.start_profile(profile)
         
         try:
+            # Serves every open window; returns once the last one is closed
             self.root.mainloop()
         except KeyboardInterrupt:
-            self.exit()
+            _close_all_windows()
         except Exception as e:
             self._safe_print(f"Error in mainloop: {e}")
-            self.exit()
+            _close_all_windows()
         
-        if func:
+        if worker is not None:
             # Wait for function to complete, but make it interruptible
             while self.running:
                 try:
-                    return result_queue.get(timeout=0.1)
+                    return worker[1].get(timeout=0.1)
                 except queue.Empty:
                     continue
         return None
 
 
+def _start_worker(func: Callable, args: Tuple[Any, ...], kwargs: Dict[str, Any],
+                  report: Callable[[str], None]) -> Tuple[threading.Thread, queue.Queue]:
+    """Run func in a daemon thread; its result or exception goes to the returned queue"""
+    result_queue: queue.Queue = queue.Queue()
+    
+    def worker():
+        try:
+            result = func(*args, **kwargs)
+            result_queue.put(result)
+        except Exception as e:
+            report(f"Error: {e}\n{traceback.format_exc()}")
+            result_queue.put(e)
+    
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread, result_queue
+
+
+class _EarlyOutput:
+    """Output from the module-level helpers written before the window exists
+    
+    The writing thread parses ANSI codes up front and keeps (text, codes) parts, so once
+    the window is ready everything is shown with a single insert. From then on calls
+    are forwarded to the window in order.
+    """
+    
+    def __init__(self) -> None:
+        self.items: List[Tuple[Any, ...]] = []
+        self.target: Optional[Py2GUI] = None
+        self._lock = threading.Lock()
+    
+    def add(self, item: Tuple[Any, ...], method: str, *args: Any) -> None:
+        """Buffer item, or call method(*args) on the window once there is one"""
+        with self._lock:
+            if self.target is None:
+                self.items.append(item)
+                return
+            target = self.target
+        getattr(target, method)(*args)
+    
+    def flush_to(self, gui: Py2GUI) -> None:
+        """Hand everything buffered to gui as one batch"""
+        with self._lock:
+            self.target = gui
+            if self.items:
+                gui._flush_early_output(self.items)
+                self.items = []
+
+
+def _early_parts(text: str, parse_ansi: bool, end: str) -> List[Tuple[str, Optional[List[str]]]]:
+    """Pre-parsed parts for early output; codes of None mark plain text"""
+    if parse_ansi and '\x1b[' in text:
+        parts: List[Tuple[str, Optional[List[str]]]] = list(_parse_sgr(text))
+        if end:
+            parts.append((end, None))
+        return parts
+    return [(text + end, None)]
+
+
 # Global instance and helper functions
 _gui_instance = None
+_instance_lock = threading.Lock()
+_early_output = _EarlyOutput()
 
 def _get_instance() -> Py2GUI:
     """Get or create global instance"""
-    global _gui_instance
+    gui = _gui_instance
+    if gui is not None and gui.running:
+        return gui
+    with _instance_lock:
+        return _create_instance()
+
+def _create_instance() -> Py2GUI:
+    """Create the global instance if needed and flush early output to it (_instance_lock held)"""
+    global _gui_instance, _early_output
     if _gui_instance is None or not _gui_instance.running:
-        _gui_instance = Py2GUI()
+        gui = Py2GUI()
+        _early_output.flush_to(gui)
+        _gui_instance = gui
+        _early_output = _EarlyOutput()
     return _gui_instance
 
+def _pending_output(text: Any, parse_ansi: bool) -> Optional[_EarlyOutput]:
+    """The early-output buffer while there is no window, unless text needs frame mode"""
+    gui = _gui_instance
+    if gui is not None and gui.running:
+        return None
+    if parse_ansi and _SCREEN_ENTER_RE.search(str(text)):
+        return None
+    return _early_output
+
 def display(text: str, parse_ansi: bool = True, font_family: Optional[str] = None, 
             font_size: Optional[int] = None, font_style: Optional[str] = None) -> None:
     """Display text (auto newline)"""
-    _get_instance().display(text, parse_ansi, font_family, font_size, font_style)
+    early = _pending_output(text, parse_ansi)
+    if early is None:
+        _get_instance().display(text, parse_ansi, font_family, font_size, font_style)
+        return
+    text_str = str(text)
+    early.add(("runs", _early_parts(text_str, parse_ansi, "\n"), (font_family, font_size, font_style),
+               f"{text}\n"), "display", text, parse_ansi, font_family, font_size, font_style)
 
 def display_colored(text: str, fg_color: Optional[str] = None, bg_color: Optional[str] = None, 
                    bold: bool = False, underline: bool = False, italic: bool = False,
@@ -946,14 +4168,32 @@ def display_colored(text: str, fg_color: Optional[str] = None, bg_color: Optiona
                    font_family: Optional[str] = None, font_size: Optional[int] = None, 
                    font_style: Optional[str] = None) -> None:
     """Directly display colored text"""
-    _get_instance().display_colored(text, fg_color, bg_color, bold, underline, 
-                                   italic, strikethrough, reverse, font_family, 
-                                   font_size, font_style)
+    style = (fg_color, bg_color, bold, underline, italic, strikethrough, reverse,
+             font_family, font_size, font_style)
+    early = _pending_output(text, False)
+    if early is None:
+        _get_instance().display_colored(text, *style)
+        return
+    early.add(("colored", str(text), style), "display_colored", text, *style)
 
 def display_paragraph(text: str, parse_ansi: bool = True, font_family: Optional[str] = None, 
                      font_size: Optional[int] = None, font_style: Optional[str] = None) -> None:
     """Display paragraph (no auto newline)"""
-    _get_instance().display_paragraph(text, parse_ansi, font_family, font_size, font_style)
+    processed = Py2GUI._process_escape_sequences(text)
+    early = _pending_output(processed, parse_ansi)
+    if early is None:
+        _get_instance().display_paragraph(text, parse_ansi, font_family, font_size, font_style)
+        return
+    early.add(("runs", _early_parts(processed, parse_ansi, ""), (font_family, font_size, font_style),
+               processed), "display_paragraph", text, parse_ansi, font_family, font_size, font_style)
+
+def display_frame(lines: List[str], parse_ansi: bool = True) -> None:
+    """Redraw the whole output as a frame"""
+    _get_instance().display_frame(lines, parse_ansi)
+
+def end_frame() -> None:
+    """Leave frame mode"""
+    _get_instance().end_frame()
 
 def user_write(prompt: str = "Input:") -> Optional[str]:
     """User input (dialog)"""
@@ -975,13 +4215,145 @@ def select_all() -> None:
     """Select all"""
     _get_instance().select_all()
 
+def open_window(title: str = "Py2GUI", **options: Any) -> Py2GUI:
+    """Open another window sharing the main window's event loop"""
+    return _get_instance().open_window(title, **options)
+
+def listen(address: Any = None, backlog: int = 128) -> Any:
+    """Show output sent by other local processes (see py2gui.ipc)"""
+    return _get_instance().listen(address, backlog)
+
+def stop_listening() -> None:
+    """Close the IPC endpoint"""
+    _get_instance().stop_listening()
+
+def start_mirror(address: Any = None) -> str:
+    """Mirror the output to web browsers; returns the page URL"""
+    return _get_instance().start_mirror(address)
+
+def stop_mirror() -> None:
+    """Stop the browser mirror"""
+    _get_instance().stop_mirror()
+
 def exit_gui() -> None:
     """Exit GUI"""
     _get_instance().exit()
 
-def run(func: Optional[Callable] = None, *args, **kwargs) -> Any:
-    """Run GUI"""
-    return _get_instance().run(func, *args, **kwargs)
+def run(func: Optional[Callable] = None, *args, profile: Optional[str] = None, **kwargs) -> Any:
+    """Run GUI; func starts before the window is created and its early output is buffered"""
+    worker = None
+    with _instance_lock:
+        if func is not None and (_gui_instance is None or not _gui_instance.running):
+            # Tk initializes on this thread while func gets going
+            worker = _start_worker(func, args, kwargs, display)
+        gui = _create_instance()
+    if worker is None:
+        return gui.run(func, *args, profile=profile, **kwargs)
+    return gui._main_loop(worker, profile)
+
+def scroll_to_end() -> None:
+    """Scroll output to the newest line"""
+    _get_instance().scroll_to_end()
+
+def set_scroll_lock(locked: bool) -> None:
+    """Enable or disable scroll lock"""
+    _get_instance().set_scroll_lock(locked)
+
+def set_wrap(mode: str) -> None:
+    """Set wrap mode ("none", "char" or "word")"""
+    _get_instance().set_wrap(mode)
+
+def set_max_line_length(length: Optional[int], long_lines: Optional[str] = None) -> None:
+    """Set the long-line limit"""
+    _get_instance().set_max_line_length(length, long_lines)
+
+def set_filter(pattern: Optional[str], regex: bool = True, match_case: bool = True) -> None:
+    """Show only output lines matching pattern"""
+    _get_instance().set_filter(pattern, regex, match_case)
+
+def clear_filter() -> None:
+    """Show the full output again"""
+    _get_instance().clear_filter()
+
+def export(path: str, format: str = "text") -> threading.Thread:
+    """Save the output to a file ("text", "ansi" or "html")"""
+    return _get_instance().export(path, format)
+
+def add_sink(sink: Any, strip_ansi: Optional[bool] = None) -> None:
+    """Also write output to a file path or stream"""
+    _get_instance().add_sink(sink, strip_ansi)
+
+def remove_sink(sink: Any) -> None:
+    """Stop writing output to a sink"""
+    _get_instance().remove_sink(sink)
+
+def write(text: str, parse_ansi: bool = True) -> None:
+    """Write text as-is (no newline)"""
+    early = _pending_output(text, parse_ansi)
+    if early is None:
+        _get_instance().write(text, parse_ansi)
+        return
+    early.add(("runs", _early_parts(text, parse_ansi, ""), (None, None, None), text), "write", text, parse_ansi)
+
+def start_recording(path: str, title: Optional[str] = None) -> None:
+    """Record the session to an asciicast file"""
+    _get_instance().start_recording(path, title)
+
+def stop_recording() -> None:
+    """Stop recording the session"""
+    _get_instance().stop_recording()
+
+def replay(path: str, speed: Optional[float] = 1.0) -> Dict[str, float]:
+    """Play an asciicast recording into the window"""
+    return _get_instance().replay(path, speed)
+
+def set_input_source(source: Any, delay: float = 0.0) -> Optional[ScriptedInput]:
+    """Answer input prompts from a script"""
+    return _get_instance().set_input_source(source, delay)
+
+def metrics() -> Dict[str, Any]:
+    """Output performance counters and latency histograms"""
+    return _get_instance().metrics()
+
+def start_watchdog(threshold: float = 0.25, log: Any = None, interval: float = 0.05) -> None:
+    """Log the GUI thread's stack whenever the event loop stalls"""
+    _get_instance().start_watchdog(threshold, log, interval)
+
+def stop_watchdog() -> None:
+    """Stop the stall watchdog"""
+    _get_instance().stop_watchdog()
+
+def start_trace(path: str, capacity: int = _TRACE_CAPACITY) -> None:
+    """Record a timeline of py2gui internals as Chrome trace-event JSON"""
+    _get_instance().start_trace(path, capacity)
+
+def stop_trace() -> int:
+    """Stop tracing and write the trace file"""
+    return _get_instance().stop_trace()
+
+def start_tcl_accounting() -> None:
+    """Count and time Tcl calls per Py2GUI method (debug mode)"""
+    _get_instance().start_tcl_accounting()
+
+def stop_tcl_accounting() -> Dict[str, Dict[str, Any]]:
+    """Stop counting Tcl calls and return the final counts"""
+    return _get_instance().stop_tcl_accounting()
+
+def tcl_stats() -> Dict[str, Dict[str, Any]]:
+    """Tcl calls and time per Py2GUI method"""
+    return _get_instance().tcl_stats()
+
+def start_profile(path: Optional[str] = None, interval: float = _PROFILE_INTERVAL) -> None:
+    """Profile the worker and GUI threads"""
+    _get_instance().start_profile(path, interval)
+
+def stop_profile() -> List[str]:
+    """Stop profiling and save one pstats file per thread"""
+    return _get_instance().stop_profile()
+
+def show_metrics(visible: bool = True) -> None:
+    """Show or hide the live metrics overlay"""
+    _get_instance().show_metrics(visible)
 
 def focus_input() -> None:
     """Focus on input field"""
@@ -989,4 +4361,13 @@ def focus_input() -> None:
 
 def set_theme(theme_name: str) -> None:
     """Set theme"""
-    _get_instance().set_theme(theme_name)
\ No newline at end of file
+    _get_instance().set_theme(theme_name)
+
+def set_zoom(level: int) -> None:
+    """Set the text zoom level (0 is actual size)"""
+    _get_instance().set_zoom(level)
+
+
+def zoom(steps: int = 1) -> None:
+    """Zoom text in (positive steps) or out (negative steps)"""
+    _get_instance().zoom(steps)
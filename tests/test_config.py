@@ -0,0 +1,64 @@
+"""Config file validation, which needs no display"""
+import json
+import os
+import tempfile
+import unittest
+
+from py2gui.py2gui import _Config
+
+
+class ConfigTest(unittest.TestCase):
+    def test_defaults(self):
+        config = _Config()
+        self.assertEqual(config.disabled_colors, frozenset())
+        self.assertTrue(config.show_clear_button)
+        self.assertIsNone(config.theme)
+
+    def test_sets_accept_numbers_and_read_back_sorted(self):
+        config = _Config({"disabled_colors": [31, "41"]})
+        self.assertEqual(config.disabled_colors, frozenset({"31", "41"}))
+        self.assertEqual(config["disabled_colors"], ["31", "41"])
+
+    def test_unknown_keys_are_kept(self):
+        config = _Config({"custom": 1})
+        self.assertIn("custom", config)
+        self.assertEqual(config.get("custom"), 1)
+        self.assertEqual(config.get("missing", 5), 5)
+
+    def test_wrong_types_are_rejected(self):
+        for data in ({"disabled_colors": "31"}, {"show_demo_button": "yes"}, {"theme": 3},
+                     {"themes": []}):
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                _Config(data)
+
+    def test_themes_are_validated(self):
+        with self.assertRaises(ValueError):
+            _Config({"themes": {"x": {"bg": "black"}}})
+        with self.assertRaises(ValueError):
+            _Config({"themes": {"x": {"palette": ["#000000"]}}})
+        with self.assertRaises(ValueError):
+            _Config({"themes": {"x": {"colors": {"30": 0}}}})
+        config = _Config({"themes": {"x": {"background": "navy", "colors": {"30": "#111111"}}}})
+        self.assertEqual(config.themes["x"]["background"], "navy")
+
+    def test_from_file_reads_theme_files_next_to_it(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "mine.json"), "w", encoding="utf-8") as f:
+                json.dump({"foreground": "#00ff00"}, f)
+            path = os.path.join(directory, "config.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"theme": "mine", "themes": {"mine": "mine.json"}}, f)
+            config = _Config.from_file(path)
+        self.assertEqual(config.themes["mine"], {"foreground": "#00ff00"})
+
+    def test_from_file_rejects_non_objects(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "config.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([1, 2], f)
+            with self.assertRaises(ValueError):
+                _Config.from_file(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
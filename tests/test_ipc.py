@@ -0,0 +1,135 @@
+"""IPC framing and addresses, which need no display"""
+import json
+import socket
+import struct
+import time
+import unittest
+
+from py2gui import ipc
+
+
+def _frame(payload):
+    data = json.dumps(payload).encode("utf-8")
+    return struct.pack("!I", len(data)) + data
+
+
+class FramingTest(unittest.TestCase):
+    def test_round_trip(self):
+        messages = [{"op": "display", "text": "héllo"}, {"op": "clear", "pane": "tests"}]
+        buffer = bytearray(ipc.encode(messages))
+        self.assertEqual(ipc.decode(buffer), messages)
+        self.assertEqual(buffer, bytearray())
+
+    def test_partial_frame_is_kept(self):
+        frame = ipc.encode([{"op": "display", "text": "a"}])
+        buffer = bytearray(frame + frame[:5])
+        self.assertEqual(len(ipc.decode(buffer)), 1)
+        self.assertEqual(buffer, bytearray(frame[:5]))
+        buffer += frame[5:]
+        self.assertEqual(ipc.decode(buffer), [{"op": "display", "text": "a"}])
+
+    def test_bad_messages_are_rejected(self):
+        for payload in ({"op": "display"}, [{"op": "nope"}], [{"op": "display"}],
+                        [{"op": "clear", "pane": 3}], [{"op": "display_colored", "text": "x", "bold": "yes"}],
+                        [{"op": "display_colored", "text": "x", "fg_color": 1}]):
+            with self.subTest(payload=payload), self.assertRaises(ValueError):
+                ipc.decode(bytearray(_frame(payload)))
+
+    def test_oversized_frame_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ipc.decode(bytearray(struct.pack("!I", ipc._MAX_FRAME + 1)))
+
+    def test_style_keys_pass(self):
+        message = {"op": "display_colored", "text": "x", "fg_color": "red", "font_family": "Mono", "bold": True}
+        self.assertEqual(ipc.decode(bytearray(ipc.encode([message]))), [message])
+
+
+class ParseAddressTest(unittest.TestCase):
+    def test_port(self):
+        self.assertEqual(ipc.parse_address(8000), (socket.AF_INET, ("127.0.0.1", 8000)))
+
+    def test_host_and_port(self):
+        self.assertEqual(ipc.parse_address("localhost:80"), (socket.AF_INET, ("localhost", 80)))
+        self.assertEqual(ipc.parse_address(":9"), (socket.AF_INET, ("127.0.0.1", 9)))
+        self.assertEqual(ipc.parse_address(("::1", "80")), (socket.AF_INET6, ("::1", 80)))
+        self.assertEqual(ipc.parse_address("[::1]:80"), (socket.AF_INET6, ("::1", 80)))
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "no Unix sockets")
+    def test_path(self):
+        self.assertEqual(ipc.parse_address("/tmp/py2gui.sock"), (socket.AF_UNIX, "/tmp/py2gui.sock"))
+
+    def test_other_types(self):
+        with self.assertRaises(TypeError):
+            ipc.parse_address(1.5)
+
+
+class _Window:
+    """Stands in for Py2GUI; calls queued for the Tk thread run on run_queued()"""
+
+    def __init__(self):
+        self.running = True
+        self.output = []
+        self.panes = {}
+        self.queued = []
+
+    def write(self, text):
+        self.output.append(text)
+
+    def display_colored(self, text, **style):
+        self.output.append((text, style))
+
+    def clear(self):
+        self.output.append("<clear>")
+
+    def open_window(self, name):
+        pane = self.panes[name] = _Window()
+        return pane
+
+    def _call_soon(self, call):
+        self.queued.append(call)
+
+    def _safe_print(self, message):
+        pass
+
+    def run_queued(self):
+        calls, self.queued = self.queued, []
+        for call in calls:
+            call()
+
+
+class ListenerTest(unittest.TestCase):
+    def setUp(self):
+        self.window = _Window()
+        self.listener = ipc.Listener(self.window)
+        self.addCleanup(self.listener.close)
+
+    def _wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline, "timed out")
+            time.sleep(0.01)
+
+    def test_display_lines_are_joined(self):
+        with ipc.Client(self.listener.address) as client:
+            client.display("a")
+            client.display("b")
+            client.display_colored("c", fg_color="red")
+        self._wait_for(lambda: len(self.window.output) == 2)
+        self.assertEqual(self.window.output, ["a\nb\n", ("c", {"fg_color": "red"})])
+
+    def test_panes_open_without_blocking(self):
+        with ipc.Client(self.listener.address) as client:
+            client.display("early", pane="p")
+            client.display("main")
+        # The main window is served while the pane's window does not exist yet
+        self._wait_for(lambda: self.window.output == ["main\n"])
+        self.assertEqual(self.window.panes, {})
+        self.window.run_queued()
+        with ipc.Client(self.listener.address) as client:
+            client.clear(pane="p")
+        self._wait_for(lambda: len(self.window.panes["p"].output) == 2)
+        self.assertEqual(self.window.panes["p"].output, ["early\n", "<clear>"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Search index of the output and the history built on it, which need no display"""
+import re
+import unittest
+
+from py2gui.py2gui import _LineIndex, _LineStore
+
+
+def _index(text, chunk_lines=None):
+    index = _LineIndex()
+    if chunk_lines is not None:
+        # Small chunks so searches cross chunk boundaries
+        index.CHUNK_LINES = chunk_lines
+    index.append(text)
+    return index
+
+
+class LineIndexTest(unittest.TestCase):
+    def test_append_splits_lines(self):
+        index = _index("one\ntw")
+        index.append("o\nthree")
+        self.assertEqual(index.lines, ["one", "two", "three"])
+
+    def test_search_forward_from_position(self):
+        index = _index("cat\ndog cat\ncow")
+        self.assertEqual(index.search(re.compile("cat"), 0, 1), (1, 4, 3))
+
+    def test_search_wraps_around(self):
+        index = _index("cat\ndog\ncow", chunk_lines=2)
+        self.assertEqual(index.search(re.compile("cat"), 2, 0), (0, 0, 3))
+
+    def test_search_backwards(self):
+        index = _index("cat\ncat\ncat", chunk_lines=2)
+        self.assertEqual(index.search(re.compile("cat"), 2, 0, backwards=True), (1, 0, 3))
+        self.assertEqual(index.search(re.compile("cat"), 0, 0, backwards=True), (2, 0, 3))
+
+    def test_search_across_chunks(self):
+        index = _index("\n".join(f"line {i}" for i in range(10)), chunk_lines=3)
+        self.assertEqual(index.search(re.compile(r"line 7"), 1, 0), (7, 0, 6))
+
+    def test_search_without_match(self):
+        self.assertIsNone(_index("abc\ndef").search(re.compile("xyz"), 0, 0))
+
+    def test_folded_search(self):
+        index = _index("Hello\nWORLD")
+        found = index.search(re.compile("world", re.IGNORECASE), 0, 0, folded_pattern=re.compile("world"))
+        self.assertEqual(found, (1, 0, 5))
+
+    def test_set_line_refreshes_cached_chunks(self):
+        index = _index("abc\ndef")
+        self.assertIsNone(index.search(re.compile("xyz"), 0, 0))
+        index.set_line(1, "xyz")
+        self.assertEqual(index.search(re.compile("xyz"), 0, 0), (1, 0, 3))
+
+    def test_drop_and_replace_from(self):
+        index = _index("a\nb\nc\nd", chunk_lines=2)
+        index.search(re.compile("d"), 0, 0)
+        index.drop(1)
+        self.assertEqual(index.lines, ["b", "c", "d"])
+        index.replace_from(1, ["x"])
+        self.assertEqual(index.lines, ["b", "x"])
+        self.assertIsNone(index.search(re.compile("d"), 0, 0))
+        self.assertEqual(index.search(re.compile("x"), 0, 0), (1, 0, 1))
+
+    def test_matching_lines(self):
+        index = _index("\n".join(["ok", "error 1", "ok", "error 2 error"]), chunk_lines=3)
+        self.assertEqual(index.matching_lines(re.compile("error", re.MULTILINE)), [1, 3])
+        self.assertEqual(index.matching_lines(re.compile("error", re.MULTILINE), 2), [1])
+
+    def test_find_all(self):
+        index = _index("a b a\nb\na")
+        self.assertEqual(index.find_all(re.compile("a"), 0, 1), [(0, 0, 1), (0, 4, 1)])
+
+
+class LineStoreTest(unittest.TestCase):
+    def test_runs_follow_lines(self):
+        store = _LineStore()
+        store.append_runs([("red\nbo", ("ansi_31",)), ("ld", ("bold",))])
+        self.assertEqual(store.lines, ["red", "bold"])
+        self.assertEqual(store.runs, [[("red", ("ansi_31",))], [("bo", ("ansi_31",)), ("ld", ("bold",))]])
+
+    def test_drop_and_line_runs(self):
+        store = _LineStore()
+        store.append_runs([("a\nb\nc\n", ("default",))])
+        store.drop(1)
+        self.assertEqual(store.line_runs([1]), [("c", ("default",)), ("\n", ("default",))])
+
+    def test_reset(self):
+        store = _LineStore()
+        store.append_runs([("a\nb", ("default",))])
+        store.reset()
+        self.assertEqual((store.lines, store.runs), ([""], [[]]))
+
+
+if __name__ == "__main__":
+    unittest.main()
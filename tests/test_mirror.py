@@ -0,0 +1,43 @@
+"""Browser mirror server checks, which need no display"""
+import unittest
+import urllib.error
+import urllib.request
+
+from py2gui.mirror import Mirror
+from py2gui.py2gui import _THEMES, _complete_theme
+
+
+class MirrorTest(unittest.TestCase):
+    def setUp(self):
+        self.mirror = Mirror("Test <page>", _complete_theme(_THEMES["default"]))
+        self.addCleanup(self.mirror.close)
+        self.host = f"localhost:{self.mirror.address[1]}"
+
+    def test_same_origin_is_allowed(self):
+        self.assertTrue(self.mirror._allowed({"host": self.host}))
+        self.assertTrue(self.mirror._allowed({"host": self.host, "origin": f"http://{self.host}"}))
+        self.assertTrue(self.mirror._allowed({"host": "[::1]:8765"}))
+
+    def test_other_origins_are_refused(self):
+        self.assertFalse(self.mirror._allowed({"host": self.host, "origin": "http://evil.example"}))
+        self.assertFalse(self.mirror._allowed({"host": self.host, "origin": "null"}))
+
+    def test_rebound_host_names_are_refused_on_loopback(self):
+        self.assertFalse(self.mirror._allowed({"host": "evil.example:8765"}))
+        self.assertFalse(self.mirror._allowed({}))
+
+    def test_page_is_served_with_the_theme(self):
+        with urllib.request.urlopen(self.mirror.url, timeout=5) as response:
+            page = response.read().decode("utf-8")
+        self.assertIn("Test &lt;page&gt;", page)
+        self.assertIn('"40": "#1a1a1a"', page)
+
+    def test_unknown_path_is_not_found(self):
+        with self.assertRaises(urllib.error.HTTPError) as caught:
+            urllib.request.urlopen(self.mirror.url + "nope", timeout=5)
+        caught.exception.close()
+        self.assertEqual(caught.exception.code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
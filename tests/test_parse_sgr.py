@@ -0,0 +1,45 @@
+"""SGR parsing, which needs no display"""
+import unittest
+
+from py2gui.py2gui import _parse_sgr
+
+
+class ParseSgrTest(unittest.TestCase):
+    def test_plain_text(self):
+        self.assertEqual(_parse_sgr("plain"), [("plain", [])])
+
+    def test_basic_codes_and_reset(self):
+        self.assertEqual(_parse_sgr("\x1b[1;31mred\x1b[0m plain"),
+                         [("red", ["1", "31"]), (" plain", [])])
+
+    def test_color_replaces_color_of_same_kind(self):
+        self.assertEqual(_parse_sgr("\x1b[31;41m\x1b[32mx"), [("x", ["41", "32"])])
+
+    def test_default_color_codes(self):
+        self.assertEqual(_parse_sgr("\x1b[1;31;41m\x1b[39mx"), [("x", ["1", "41"])])
+
+    def test_256_colors(self):
+        self.assertEqual(_parse_sgr("\x1b[38;5;196;48;5;21mx"), [("x", ["38;5;196", "48;5;21"])])
+
+    def test_true_color(self):
+        self.assertEqual(_parse_sgr("\x1b[38;2;255;128;0mx"), [("x", ["38;2;255;128;0"])])
+
+    def test_leading_zeros_are_normalised(self):
+        self.assertEqual(_parse_sgr("\x1b[38;5;007mx"), [("x", ["38;5;7"])])
+
+    def test_malformed_256_color_is_skipped(self):
+        # 38;5 without its color index: the bold after it still applies
+        self.assertEqual(_parse_sgr("\x1b[38;5m\x1b[1mx"), [("x", ["1"])])
+        self.assertEqual(_parse_sgr("\x1b[31;38;5mx"), [("x", ["31"])])
+
+    def test_malformed_extended_color_keeps_later_codes(self):
+        self.assertEqual(_parse_sgr("\x1b[38;5;300;1mx"), [("x", ["1"])])
+        self.assertEqual(_parse_sgr("\x1b[38;2;1;2mx"), [("x", [])])
+        self.assertEqual(_parse_sgr("\x1b[38;9;4mx"), [("x", ["4"])])
+
+    def test_disabled_colors_are_dropped(self):
+        self.assertEqual(_parse_sgr("\x1b[31;1mx", {"31"}), [("x", ["1"])])
+
+
+if __name__ == "__main__":
+    unittest.main()
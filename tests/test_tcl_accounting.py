@@ -0,0 +1,33 @@
+"""Tcl accounting of a real window; skipped where Tk cannot open a display"""
+import tkinter as tk
+import unittest
+
+from py2gui import py2gui
+
+
+class TclAccountingTest(unittest.TestCase):
+    def setUp(self):
+        try:
+            self.gui = py2gui.Py2GUI("Tcl accounting", config_file="")
+        except tk.TclError as e:
+            self.skipTest(f"no display: {e}")
+        self.addCleanup(self.gui.exit)
+
+    def test_display_is_counted(self):
+        self.gui.start_tcl_accounting()
+        self.gui.display("counted")
+        self.gui.root.update()
+        stats = self.gui.stop_tcl_accounting()
+        self.assertGreater(stats["display"]["calls"], 0)
+        # Scheduling the update goes through the shared root
+        self.assertIn("after", stats["display"]["commands"])
+
+    def test_stop_restores_the_shared_root(self):
+        self.gui.start_tcl_accounting()
+        self.gui.stop_tcl_accounting()
+        self.assertNotIsInstance(py2gui._tk_root.tk, py2gui._TclFanout)
+        self.assertNotIsInstance(self.gui.root.tk, py2gui._TclCounter)
+
+
+if __name__ == "__main__":
+    unittest.main()